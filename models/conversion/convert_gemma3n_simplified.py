@@ -5,11 +5,17 @@ Works without PyTorch/TensorFlow dependencies
 """
 
 import os
+import sys
 import json
-import shutil
 import logging
 from pathlib import Path
 
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from model_store import ModelStore
+from shard_selection import INDEX_FILE, SELECTION_FILE, weight_files, write_filtered_index
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -19,6 +25,8 @@ class SimplifiedGemma3NConverter:
     def __init__(self):
         self.base_path = Path("/Users/naderrahimizad/Projects/AI/POICompanion")
         self.models_path = self.base_path / "models"
+        # Bundles link to shared blobs instead of holding their own copies of each file
+        self.store = ModelStore(self.models_path / ".model-store")
         
     def prepare_ios_model(self, variant="e2b"):
         """Prepare model for iOS deployment"""
@@ -41,18 +49,11 @@ class SimplifiedGemma3NConverter:
             "generation_config.json"
         ]
         
-        for file_name in files_to_copy:
-            source_file = source_path / file_name
-            if source_file.exists():
-                dest_file = model_bundle_path / file_name
-                shutil.copy2(source_file, dest_file)
-                logger.info(f"Copied {file_name} to iOS bundle")
+        # Model weights: only the shards a tensor selection kept, if the download used one
+        files_to_copy += weight_files(source_path)
         
-        # Copy safetensors files (model weights)
-        for safetensor_file in source_path.glob("*.safetensors*"):
-            dest_file = model_bundle_path / safetensor_file.name
-            logger.info(f"Copying {safetensor_file.name} to iOS bundle...")
-            shutil.copy2(safetensor_file, dest_file)
+        for file_name, method in self.stage_files(variant, model_bundle_path, files_to_copy).items():
+            logger.info(f"Linked {file_name} into iOS bundle ({method})")
         
         # Create iOS model configuration
         ios_config = {
@@ -104,18 +105,11 @@ class SimplifiedGemma3NConverter:
             "generation_config.json"
         ]
         
-        for file_name in files_to_copy:
-            source_file = source_path / file_name
-            if source_file.exists():
-                dest_file = model_path / file_name
-                shutil.copy2(source_file, dest_file)
-                logger.info(f"Copied {file_name} to Android assets")
+        # Model weights: only the shards a tensor selection kept, if the download used one
+        files_to_copy += weight_files(source_path)
         
-        # Copy safetensors files (model weights)
-        for safetensor_file in source_path.glob("*.safetensors*"):
-            dest_file = model_path / safetensor_file.name
-            logger.info(f"Copying {safetensor_file.name} to Android assets...")
-            shutil.copy2(safetensor_file, dest_file)
+        for file_name, method in self.stage_files(variant, model_path, files_to_copy).items():
+            logger.info(f"Linked {file_name} into Android assets ({method})")
         
         # Create Android model configuration
         android_config = {
@@ -147,6 +141,21 @@ class SimplifiedGemma3NConverter:
         logger.info(f"✅ Android model assets created at: {model_path}")
         return model_path
     
+    def stage_files(self, variant, dest_path, file_names):
+        """Store the variant's files once and link the requested ones into dest_path
+
+        The weight index is linked as-is for a full download. After a
+        selective download it is rewritten to cover only the staged shards.
+        """
+        model_id = f"gemma-3n-{variant}"
+        source_path = self.models_path / "llm" / model_id
+        self.store.ingest(model_id, source_path, exclude=("manifest.json", SELECTION_FILE))
+        if write_filtered_index(source_path, dest_path / INDEX_FILE):
+            methods = self.store.materialize(model_id, dest_path, file_names)
+            methods[INDEX_FILE] = "filtered"
+            return methods
+        return self.store.materialize(model_id, dest_path, file_names + [INDEX_FILE])
+    
     def create_model_wrapper_ios(self, variant="e2b"):
         """Create Swift wrapper for model loading"""
         logger.info("Creating iOS model wrapper...")
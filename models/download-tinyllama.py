@@ -8,6 +8,9 @@ import os
 import sys
 import json
 from pathlib import Path
+from typing import Optional
+
+from transfer_engine import MIRROR_ENV, FetchJob, ModelFetchScheduler, RetryPolicy, SegmentedDownloader
 
 # Check if transformers is installed
 try:
@@ -19,6 +22,29 @@ except ImportError:
     from transformers import AutoModelForCausalLM, AutoTokenizer
     import torch
 
+# Repository files from_pretrained() needs, fetched directly when a LAN mirror is configured
+TINYLLAMA_FILES = [
+    "config.json",
+    "generation_config.json",
+    "model.safetensors",
+    "special_tokens_map.json",
+    "tokenizer.json",
+    "tokenizer.model",
+    "tokenizer_config.json"
+]
+
+def fetch_via_mirror(model_id: str, dest_dir: Path) -> Optional[Path]:
+    """Fetch the repo files through the shared transfer engine when $ROADTRIP_MODEL_MIRROR is set"""
+    if not os.environ.get(MIRROR_ENV):
+        return None
+    print(f"   Using model mirror {os.environ[MIRROR_ENV]}")
+    base_url = f"https://huggingface.co/{model_id}/resolve/main"
+    jobs = [FetchJob(f"{base_url}/{file_name}", dest_dir / file_name) for file_name in TINYLLAMA_FILES]
+    report = ModelFetchScheduler(SegmentedDownloader(retry=RetryPolicy())).fetch(jobs)
+    for dest_path, error in report.failed.items():
+        print(f"   ⚠ {dest_path.name}: {error}")
+    return None if report.failed else dest_dir
+
 def download_tinyllama():
     """Download TinyLlama model and tokenizer"""
     
@@ -34,16 +60,19 @@ def download_tinyllama():
     print(f"   Destination: {base_path}")
     
     try:
+        # Prefer the LAN mirror; otherwise the Hugging Face hub client downloads directly
+        source = fetch_via_mirror(model_id, base_path / ".source") or model_id
+
         # Download tokenizer
         print("\n1️⃣ Downloading tokenizer...")
-        tokenizer = AutoTokenizer.from_pretrained(model_id, trust_remote_code=True)
+        tokenizer = AutoTokenizer.from_pretrained(source, trust_remote_code=True)
         tokenizer.save_pretrained(base_path)
         print("   ✅ Tokenizer downloaded")
         
         # Download model (in FP16 for smaller size)
         print("\n2️⃣ Downloading model (this may take a few minutes)...")
         model = AutoModelForCausalLM.from_pretrained(
-            model_id,
+            source,
             torch_dtype=torch.float16,
             low_cpu_mem_usage=True,
             trust_remote_code=True
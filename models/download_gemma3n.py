@@ -9,12 +9,17 @@ Gemma-3N variants:
 import os
 import sys
 import json
-import hashlib
-import requests
+import argparse
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import time
 
+from transfer_engine import (FetchJob, MetadataCache, ModelFetchScheduler, PartialDownload, RetryPolicy,
+                             SegmentedDownloader, create_session, is_retryable, sha256_file, sha256_files)
+from shard_selection import (INDEX_FILE, SELECTION_FILE, ShardPlan, TensorSelection, add_selection_arguments,
+                             load_weight_map, plan_shards, selection_from_args, write_selection)
+from model_store import ModelStore
+
 class Gemma3NDownloader:
     """Downloads and validates Gemma-3N models"""
     
@@ -55,20 +60,36 @@ class Gemma3NDownloader:
         }
     }
     
-    def __init__(self, output_dir: str = "llm"):
+    BROWSER_HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36"
+    }
+    
+    def __init__(self, output_dir: str = "llm", connections: int = 8,
+                 selection: Optional[TensorSelection] = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        # Large shards are split into byte ranges fetched over several connections
+        # Transient failures (5xx, timeouts, dropped connections) back off and resume the .part file
+        self.transfer = SegmentedDownloader(create_session(connections, self.BROWSER_HEADERS),
+                                            connections=connections, retry=RetryPolicy(),
+                                            on_retry=self.report_retry)
+        # SHA-256 computed while downloading, keyed by destination path
+        self.checksums: Dict[Path, str] = {}
+        # ETag/Last-Modified plus size/mtime/SHA-256 per file: unchanged files skip network and hashing
+        self.cache = MetadataCache(self.output_dir / ".download-cache.json")
+        # Only shards holding tensors this selection needs are fetched
+        self.selection = selection or TensorSelection()
+        self.plans: Dict[str, ShardPlan] = {}
+        # Files shared between variants (tokenizer, configs) are stored once and hardlinked
+        self.store = ModelStore()
         
     def download_file(self, url: str, dest_path: Path, expected_size: Optional[int] = None, token: Optional[str] = None) -> bool:
-        """Download a file with progress tracking"""
+        """Download a file with progress tracking (segmented across connections when large)"""
         try:
             print(f"Downloading: {dest_path.name}")
             
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36"
-            }
             if token:
-                headers["Authorization"] = f"Bearer {token}"
+                self.transfer.session.headers["Authorization"] = f"Bearer {token}"
 
             # Check if file already exists
             if dest_path.exists():
@@ -79,23 +100,22 @@ class Gemma3NDownloader:
                     print(f"  ⚠ File exists but size mismatch, re-downloading...")
                     
             # Download with progress
-            response = requests.get(url, stream=True, timeout=30, headers=headers)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            block_size = 8192
-            downloaded = 0
+            def show_progress(downloaded: int, total_size: int):
+                if total_size > 0:
+                    progress = (downloaded / total_size) * 100
+                    print(f"\r  Progress: {progress:.1f}%", end='', flush=True)
             
-            with open(dest_path, 'wb') as f:
-                for chunk in response.iter_content(block_size):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            progress = (downloaded / total_size) * 100
-                            print(f"\r  Progress: {progress:.1f}%", end='', flush=True)
+            # Interrupted runs leave a .part file; only its missing ranges are fetched
+            partial = PartialDownload(dest_path)
+            if partial.part_path.exists():
+                print(f"  ↻ Resuming from {partial.part_path.name}")
+            result = self.transfer.download(url, dest_path, show_progress)
+            self.checksums[dest_path] = result.sha256
+            self.cache.record(dest_path, result.remote, result.sha256)
+            self.cache.save()
             
-            print(f"\n  ✓ Downloaded: {dest_path.name}")
+            resumed = f" ({result.resumed_bytes / (1024 * 1024):.1f} MB resumed)" if result.resumed_bytes else ""
+            print(f"\n  ✓ Downloaded: {dest_path.name}{resumed}")
             return True
             
         except Exception as e:
@@ -116,21 +136,74 @@ class Gemma3NDownloader:
         # Base URL for Hugging Face CDN
         base_url = f"https://huggingface.co/{model_config['repo']}/resolve/main"
         
-        success = True
-        for file_name in model_config['files']:
-            url = f"{base_url}/{file_name}"
-            dest_path = model_dir / file_name
-            
-            if not self.download_file(url, dest_path, token=token):
-                # Try alternative download methods
-                print(f"  Retrying with different method...")
-                time.sleep(2)
-                if not self.download_file(url, dest_path, token=token):
-                    success = False
-                    print(f"  ⚠ Skipping {file_name} - manual download may be required")
+        if token:
+            self.transfer.session.headers["Authorization"] = f"Bearer {token}"
+
+        files = model_config['files']
+        if not self.selection.is_full and INDEX_FILE in files:
+            files = self.select_files(model_id, model_config, base_url, token)
+            if files is None:
+                return False
+
+        # All files at once over the shared session; small files are not queued behind shards
+        jobs = [FetchJob(f"{base_url}/{file_name}", model_dir / file_name) for file_name in files]
+        start = time.time()
+        report = ModelFetchScheduler(self.transfer, cache=self.cache).fetch(jobs)
+        for dest_path in report.skipped:
+            print(f"  ✓ Already downloaded: {dest_path.name}")
+        for dest_path in report.completed:
+            result = report.results[dest_path]
+            self.checksums[dest_path] = result.sha256
+            resumed = f" ({result.resumed_bytes / (1024 * 1024):.1f} MB resumed)" if result.resumed_bytes else ""
+            print(f"  ✓ Downloaded: {dest_path.name}{resumed}")
+        if report.completed:
+            total_mb = sum(result.downloaded_bytes for result in report.results.values()) / (1024 * 1024)
+            print(f"  {total_mb:.1f} MB in {time.time() - start:.1f}s "
+                  f"(up to {report.peak_connections} connections)")
+
+        for dest_path, error in report.failed.items():
+            reason = "retries exhausted" if is_retryable(error) else "not retryable"
+            print(f"  ✗ {dest_path.name}: {error} ({reason})")
+            print(f"  ⚠ Skipping {dest_path.name} - manual download may be required")
         
-        return success
+        return not report.failed
     
+    @staticmethod
+    def report_retry(error: BaseException, failures: int, delay: float):
+        print(f"\n  ↻ {type(error).__name__}: {error} - retry {failures} in {delay:.1f}s (resuming)")
+
+    def select_files(self, model_id: str, model_config: Dict, base_url: str,
+                     token: Optional[str] = None) -> Optional[List[str]]:
+        """Fetch the weight map first and drop shards the selection does not need"""
+        model_dir = self.output_dir / model_id
+        index_path = model_dir / INDEX_FILE
+        selection_path = model_dir / SELECTION_FILE
+        report = ModelFetchScheduler(self.transfer, cache=self.cache).fetch(
+            [FetchJob(f"{base_url}/{INDEX_FILE}", index_path)])
+        if report.failed and not self.download_file(f"{base_url}/{INDEX_FILE}", index_path, token=token):
+            return None
+        plan = plan_shards(load_weight_map(index_path), self.selection)
+
+        # Shard sizes from the last run hold while the index is unchanged
+        if report.skipped and selection_path.exists():
+            with open(selection_path) as f:
+                plan.shard_sizes = json.load(f).get("shard_sizes", {})
+        unsized = [shard for shard in plan.needed + plan.skipped if shard not in plan.shard_sizes]
+        if unsized:
+            remotes = ModelFetchScheduler(self.transfer).probe_urls([f"{base_url}/{shard}" for shard in unsized])
+            for shard, remote in zip(unsized, remotes):
+                if remote is None:
+                    print(f"  ⚠ Could not size {shard}")
+                else:
+                    plan.shard_sizes[shard] = remote.size or 0
+        self.plans[model_id] = plan
+        write_selection(plan, self.selection, model_dir / SELECTION_FILE)
+
+        print(f"  Selection: {self.selection.describe()} -> {plan.summary()}")
+        for shard in plan.skipped:
+            print(f"  – Skipping {shard} ({plan.shard_sizes.get(shard, 0) / 1e9:.2f} GB, not needed)")
+        return [file_name for file_name in model_config['files'] if file_name not in plan.skipped]
+
     def create_model_manifest(self, model_id: str, model_config: Dict):
         """Create a manifest file for the downloaded model"""
         model_dir = self.output_dir / model_id
@@ -146,15 +219,30 @@ class Gemma3NDownloader:
             "roadtrip_copilot_version": "1.0.0"
         }
         
-        # Add file information
-        for file_name in model_config['files']:
-            file_path = model_dir / file_name
-            if file_path.exists():
-                manifest['files'].append({
-                    "name": file_name,
-                    "size": file_path.stat().st_size,
-                    "checksum": self.calculate_checksum(file_path)
-                })
+        # Add file information; checksums come from the download stream when available,
+        # other files are hashed in parallel
+        present = [model_dir / file_name for file_name in model_config['files'] if (model_dir / file_name).exists()]
+        for path in present:
+            if not self.checksums.get(path) and self.cache.sha256(path):
+                self.checksums[path] = self.cache.sha256(path)
+        checksums = {path: self.checksums[path] for path in present if self.checksums.get(path)}
+        hashed = sha256_files([path for path in present if path not in checksums])
+        for path, digest in hashed.items():
+            self.cache.record(path, sha256=digest)
+            self.checksums[path] = digest
+        self.cache.save()
+        checksums.update(hashed)
+        for file_path in present:
+            manifest['files'].append({
+                "name": file_path.name,
+                "size": file_path.stat().st_size,
+                "checksum": checksums[file_path]
+            })
+        
+        plan = self.plans.get(model_id)
+        if plan:
+            manifest["selection"] = {"description": self.selection.describe(), "skipped_shards": plan.skipped,
+                                     "bytes_saved": plan.bytes_saved}
         
         with open(manifest_path, 'w') as f:
             json.dump(manifest, f, indent=2)
@@ -163,11 +251,7 @@ class Gemma3NDownloader:
     
     def calculate_checksum(self, file_path: Path) -> str:
         """Calculate SHA256 checksum of a file"""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+        return sha256_file(file_path)
     
     def download_all(self):
         """Download all Gemma-3N models"""
@@ -202,6 +286,9 @@ class Gemma3NDownloader:
             
             if success:
                 self.create_model_manifest(model_id, model_config)
+                # Sidecars are rewritten in place on the next run, so they stay out of the store
+                self.store.ingest(model_id, self.output_dir / model_id, self.checksums,
+                                  exclude=("manifest.json", SELECTION_FILE))
                 print(f"\n✓ Successfully downloaded {model_id}")
             else:
                 print(f"\n⚠ Partially downloaded {model_id} - some files may be missing")
@@ -252,7 +339,11 @@ The architecture and optimization pipelines are designed for seamless migration.
 
 def main():
     """Main entry point"""
-    downloader = Gemma3NDownloader()
+    parser = argparse.ArgumentParser(description="Download Gemma-3N models")
+    parser.add_argument("--output-dir", default="llm")
+    add_selection_arguments(parser)
+    args = parser.parse_args()
+    downloader = Gemma3NDownloader(args.output_dir, selection=selection_from_args(args))
     
     try:
         downloader.download_all()
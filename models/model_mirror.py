@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+LAN caching mirror for model artifacts
+
+Every developer machine and CI runner otherwise pulls the same multi-GB
+shards from the internet. One machine on the LAN runs this mirror, and the
+others set
+
+    export ROADTRIP_MODEL_MIRROR=http://build-cache.local:8765
+
+so download_gemma3n.py, download_kokoro_tts.py and download-tinyllama.py ask
+it first (see SegmentedDownloader.probe).
+
+Endpoints:
+    HEAD/GET /fetch?url=<upstream>   302 to the cached blob, or 404 on a miss
+                                     (the mirror then fetches it in the background)
+    HEAD/GET /blobs/<sha256>         blob by content hash, with Range/If-Range support
+    GET      /stats                  JSON counters
+
+Blobs live in a ModelStore, so a machine that already ingested models can
+serve them by hash right away. An index maps upstream URLs to blobs. Entries
+are re-validated upstream with a conditional request at most every
+`revalidate_after_s`. If upstream can't be reached, the cached copy is
+served. Blobs the mirror fetched itself are capped at `max_bytes`, and the
+least recently used go first. Blobs a store manifest references are never
+evicted.
+
+/fetch only proxies URLs on UPSTREAM_HOSTS (Hugging Face and its CDNs, plus
+any --allow-host), so the mirror can't be used to reach arbitrary or
+internal addresses. A client's Authorization header is used for the mirror's
+own upstream fetch, which allows gated repositories. Cached blobs are then
+served to anyone who can reach the mirror. It binds to 127.0.0.1 unless
+given a LAN address, which should be on a trusted network only.
+
+Usage:
+    python3 models/model_mirror.py serve --host 192.168.1.20 --port 8765
+    python3 models/model_mirror.py --self-test
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import socket
+import hashlib
+import argparse
+import tempfile
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from model_store import DEFAULT_STORE, ModelStore
+from transfer_engine import (MB, RangeRequestHandler, RetryPolicy, SegmentedDownloader, create_session,
+                             sha256_file, start_range_server)
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BYTES = 100 * 1024 * MB
+INDEX_FILE = "mirror-index.json"
+# Upstreams /fetch may proxy; subdomains (cdn-lfs.huggingface.co, cas-bridge.xethub.hf.co) included
+UPSTREAM_HOSTS = ("huggingface.co", "hf.co")
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+class ModelMirror:
+    """URL -> blob index over a ModelStore, filled by background upstream fetches"""
+
+    def __init__(self, store: ModelStore, revalidate_after_s: float = 600.0, connections: int = 8,
+                 retry: Optional[RetryPolicy] = None, allowed_hosts: Iterable[str] = UPSTREAM_HOSTS,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.store = store
+        self.revalidate_after_s = revalidate_after_s
+        self.connections = connections
+        self.retry = retry or RetryPolicy()
+        self.allowed_hosts = tuple(host.lower() for host in allowed_hosts)
+        self.max_bytes = max_bytes
+        self.index_path = store.root / INDEX_FILE
+        self.staging_dir = store.root / "staging"
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+        self._index: Dict[str, Dict] = {}
+        if self.index_path.exists():
+            with open(self.index_path) as f:
+                self._index = json.load(f)
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Thread] = {}
+        self.stats = {"hits": 0, "misses": 0, "fetches": 0, "fetch_errors": 0, "revalidations": 0,
+                      "rejected": 0, "evictions": 0}
+
+    def allows(self, url: str) -> bool:
+        """`url` is http(s) on an allowed upstream host or one of its subdomains"""
+        parts = urllib.parse.urlsplit(url)
+        host = (parts.hostname or "").lower()
+        return parts.scheme in ("http", "https") and \
+            any(host == allowed or host.endswith("." + allowed) for allowed in self.allowed_hosts)
+
+    def _check_redirect(self, response: requests.Response, *args, **kwargs):
+        # An allowed upstream must not bounce the mirror somewhere else (e.g. a LAN address)
+        if response.is_redirect and not self.allows(urllib.parse.urljoin(response.url,
+                                                                         response.headers["location"])):
+            raise requests.exceptions.InvalidURL(f"{response.url} redirects to {response.headers['location']}, "
+                                                 f"which is not an allowed upstream")
+
+    def _downloader(self, authorization: Optional[str]) -> SegmentedDownloader:
+        headers = {"Authorization": authorization} if authorization else None
+        session = create_session(self.connections, headers)
+        session.hooks["response"].append(self._check_redirect)
+        # mirror="" so a mirror host with ROADTRIP_MODEL_MIRROR set never asks itself
+        return SegmentedDownloader(session, connections=self.connections, retry=self.retry, mirror="")
+
+    def lookup(self, url: str, authorization: Optional[str] = None) -> Optional[str]:
+        """SHA-256 of the cached blob for `url`, or None (and a background fetch) on a miss"""
+        with self._lock:
+            entry = dict(self._index.get(url) or {})
+        if entry and not self.store.has(entry["sha256"]):
+            entry = {}
+        if entry and time.time() - entry.get("checked_at", 0) > self.revalidate_after_s:
+            entry = self._revalidate(url, entry, authorization)
+        with self._lock:
+            self.stats["hits" if entry else "misses"] += 1
+            if entry and url in self._index:
+                self._index[url]["used_at"] = time.time()  # Persisted with the next save
+        if not entry:
+            self.warm(url, authorization)
+            return None
+        return entry["sha256"]
+
+    def _revalidate(self, url: str, entry: Dict, authorization: Optional[str]) -> Dict:
+        try:
+            remote = self._downloader(authorization).probe(url, entry)
+        except requests.RequestException:
+            return entry  # Upstream unreachable: serve what we have
+        with self._lock:
+            self.stats["revalidations"] += 1
+        unchanged = remote.not_modified or (remote.etag and remote.etag == entry.get("etag")
+                                            and remote.size == entry["size"])
+        if not unchanged:
+            return {}
+        entry["checked_at"] = time.time()
+        with self._lock:
+            self._index[url] = entry
+        self._save_index()
+        return entry
+
+    def warm(self, url: str, authorization: Optional[str] = None):
+        """Start fetching `url` in the background unless that is already happening"""
+        if not self.allows(url):
+            raise ValueError(f"{url} is not on an allowed upstream host")
+        with self._lock:
+            if url in self._inflight:
+                return
+            thread = threading.Thread(target=self.fetch, args=(url, authorization), daemon=True,
+                                      name="mirror-fetch")
+            self._inflight[url] = thread
+        thread.start()
+
+    def fetch(self, url: str, authorization: Optional[str] = None) -> Optional[str]:
+        """Download `url` upstream into the store; returns its SHA-256 (None on failure)"""
+        staging = self.staging_dir / hashlib.blake2b(url.encode("utf-8"), digest_size=12).hexdigest()
+        try:
+            if not self.allows(url):
+                raise ValueError(f"{url} is not on an allowed upstream host")
+            downloader = self._downloader(authorization)
+            remote = downloader.probe(url)
+            if remote.size is None or remote.size > self.max_bytes:
+                raise ValueError(f"{url} ({remote.size} bytes) does not fit the {self.max_bytes} byte cache")
+            result = downloader.download(url, staging, remote=remote)
+            sha256 = self.store.put(staging, result.sha256)
+            staging.unlink()
+            now = time.time()
+            with self._lock:
+                self._index[url] = {"sha256": sha256, "size": result.remote.size, "etag": result.remote.etag,
+                                    "last_modified": result.remote.last_modified, "checked_at": now,
+                                    "used_at": now}
+                self.stats["fetches"] += 1
+            self._evict()
+            self._save_index()
+            return sha256
+        except (requests.RequestException, OSError, ValueError):
+            with self._lock:
+                self.stats["fetch_errors"] += 1
+            return None
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    def _evict(self):
+        """Drop least recently used blobs until the mirror's own blobs fit in max_bytes"""
+        pinned = self.store.referenced()
+        with self._lock:
+            # digest -> (last use over every URL that maps to it, size)
+            blobs: Dict[str, Tuple[float, int]] = {}
+            for entry in self._index.values():
+                if entry["sha256"] in pinned:
+                    continue
+                used_at = entry.get("used_at", entry.get("checked_at", 0))
+                previous = blobs.get(entry["sha256"], (0.0, entry["size"]))
+                blobs[entry["sha256"]] = (max(previous[0], used_at), entry["size"])
+            total = sum(size for _, size in blobs.values())
+            evicted = []
+            for digest, (_, size) in sorted(blobs.items(), key=lambda item: item[1][0]):
+                if total <= self.max_bytes:
+                    break
+                evicted.append(digest)
+                total -= size
+            if not evicted:
+                return
+            self._index = {url: entry for url, entry in self._index.items() if entry["sha256"] not in evicted}
+            self.stats["evictions"] += len(evicted)
+        for digest in evicted:
+            self.store.remove(digest)
+
+    def wait_idle(self, timeout: float = 600.0):
+        """Block until no background fetch is running"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                threads = list(self._inflight.values())
+            if not threads:
+                return
+            threads[0].join(max(0.0, deadline - time.monotonic()))
+
+    def _save_index(self):
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        with self._lock:  # Also keeps concurrent fetches from sharing the temp file
+            with open(tmp_path, "w") as f:
+                json.dump(self._index, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.index_path)
+
+class MirrorRequestHandler(RangeRequestHandler):
+    """/fetch redirects into /blobs; blobs are served by RangeRequestHandler with hash ETags"""
+    mirror: ModelMirror = None
+
+    def _resolve(self) -> Optional[Path]:
+        route = self.path.split("?", 1)[0]
+        if not route.startswith("/blobs/"):
+            return None
+        digest = route[len("/blobs/"):]
+        if not _SHA256.match(digest) or not self.mirror.store.has(digest):
+            return None
+        return self.mirror.store.blob_path(digest)
+
+    def _headers_for(self, path: Path) -> Dict[str, str]:
+        headers = super()._headers_for(path)
+        # Content-addressed: the hash is the strongest possible validator
+        headers["ETag"] = f'"{path.name}"'
+        headers["X-Content-SHA256"] = path.name
+        return headers
+
+    def _route(self) -> bool:
+        """Handle /fetch and /stats; False means the request is for a blob"""
+        route, _, query = self.path.partition("?")
+        if route == "/stats":
+            body = json.dumps(self.mirror.stats).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command == "GET":
+                self.wfile.write(body)
+            return True
+        if route != "/fetch":
+            return False
+        url = urllib.parse.parse_qs(query).get("url", [None])[0]
+        if not url or not url.startswith(("http://", "https://")):
+            self.send_error(400, "Expected /fetch?url=<http(s) URL>")
+            return True
+        if not self.mirror.allows(url):
+            with self.mirror._lock:
+                self.mirror.stats["rejected"] += 1
+            self.send_error(403, "Upstream host is not on the mirror's allowlist")
+            return True
+        sha256 = self.mirror.lookup(url, self.headers.get("Authorization"))
+        if sha256 is None:
+            self.send_response(404)
+            self.send_header("X-Mirror-Status", "fetching")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return True
+        self.send_response(302)
+        self.send_header("Location", f"/blobs/{sha256}")
+        self.send_header("X-Content-SHA256", sha256)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+        return True
+
+    def do_HEAD(self):
+        if not self._route():
+            super().do_HEAD()
+
+    def do_GET(self):
+        if not self._route():
+            super().do_GET()
+
+def start_mirror(store: ModelStore, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                 revalidate_after_s: float = 600.0, retry: Optional[RetryPolicy] = None,
+                 allowed_hosts: Iterable[str] = UPSTREAM_HOSTS,
+                 max_bytes: int = DEFAULT_MAX_BYTES) -> Tuple[ThreadingHTTPServer, ModelMirror]:
+    """Serve the mirror on a background thread (localhost only unless `host` is a LAN address)"""
+    mirror = ModelMirror(store, revalidate_after_s, retry=retry, allowed_hosts=allowed_hosts, max_bytes=max_bytes)
+    handler = type("MirrorHandler", (MirrorRequestHandler,),
+                   {"mirror": mirror, "root": store.blob_dir, "stats": {}})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, mirror
+
+def self_test(size_mb: int = 48, upstream_mb_s: float = 24.0) -> bool:
+    """Upstream stand-in server plus a mirror, all on localhost"""
+    checks: List[Tuple[str, bool]] = []
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        upstream_root = Path(tmp) / "upstream"
+        upstream_root.mkdir()
+        source = upstream_root / "model.safetensors"
+        source.write_bytes(os.urandom(size_mb * MB))
+        expected = sha256_file(source)
+        upstream, upstream_stats = start_range_server(upstream_root, bytes_per_second=upstream_mb_s * MB)
+        url = f"http://127.0.0.1:{upstream.server_address[1]}/model.safetensors"
+        store = ModelStore(Path(tmp) / "store")
+        server, mirror = start_mirror(store, "127.0.0.1", 0, retry=RetryPolicy(max_attempts=2, base_delay=0.01),
+                                      allowed_hosts=("127.0.0.1",))
+        mirror_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        def client(name: str, mirror_address: Optional[str] = mirror_url):
+            downloader = SegmentedDownloader(connections=4, segment_size=8 * MB, mirror=mirror_address)
+            dest = Path(tmp) / name / source.name
+            start = time.perf_counter()
+            result = downloader.download(url, dest)
+            timings[name] = time.perf_counter() - start
+            return result, dest
+
+        try:
+            result, dest = client("first")
+            checks.append(("first client falls back upstream on a miss",
+                           result.remote.url == url and sha256_file(dest) == expected))
+            mirror.wait_idle()
+            checks.append(("mirror cached the file in the background",
+                           mirror.stats["fetches"] == 1 and mirror.lookup(url) == expected))
+
+            sent_before = upstream_stats.get("bytes_sent", 0)
+            result, dest = client("second")
+            checks.append((f"second client served by the mirror ({timings['second']:.2f}s vs "
+                           f"{timings['first']:.2f}s upstream)",
+                           "/blobs/" in result.remote.url and result.sha256 == expected
+                           and upstream_stats.get("bytes_sent", 0) == sent_before))
+
+            response = requests.get(f"{mirror_url}/blobs/{expected}", headers={"Range": "bytes=100-199"})
+            with open(source, "rb") as f:
+                f.seek(100)
+                checks.append(("blobs support Range by content hash",
+                               response.status_code == 206 and response.content == f.read(100)))
+
+            with socket.socket() as unused:
+                unused.bind(("127.0.0.1", 0))
+                dead = f"http://127.0.0.1:{unused.getsockname()[1]}"
+            result, dest = client("mirror-down", dead)
+            checks.append(("unreachable mirror falls back upstream", sha256_file(dest) == expected))
+
+            # Upstream changes: a forced revalidation notices and the mirror re-fetches
+            source.write_bytes(os.urandom(size_mb * MB))
+            mirror.revalidate_after_s = 0
+            checks.append(("changed upstream file is a miss", mirror.lookup(url) is None))
+            mirror.wait_idle()
+            result, dest = client("after-change")
+            checks.append(("mirror serves the new version",
+                           "/blobs/" in result.remote.url and sha256_file(dest) == sha256_file(source)))
+        finally:
+            server.shutdown()
+            upstream.shutdown()
+
+    print(f"🪞 MODEL MIRROR SELF-TEST ({size_mb} MB, upstream {upstream_mb_s:g} MB/s per connection)")
+    for label, ok in checks:
+        print(f"   {'✅' if ok else '❌'} {label}")
+    return all(ok for _, ok in checks)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="LAN caching mirror for model artifacts")
+    parser.add_argument("--self-test", action="store_true", help="Run upstream, mirror and clients locally")
+    commands = parser.add_subparsers(dest="command")
+    serve = commands.add_parser("serve", help="Serve the mirror")
+    serve.add_argument("--store", type=Path, default=DEFAULT_STORE)
+    serve.add_argument("--host", default="127.0.0.1",
+                       help="Address to bind; use this machine's LAN address to serve other machines")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--revalidate-after", type=float, default=600.0, metavar="SECONDS")
+    serve.add_argument("--allow-host", action="append", default=[], metavar="HOST",
+                       help=f"Extra upstream host /fetch may proxy (besides {', '.join(UPSTREAM_HOSTS)})")
+    serve.add_argument("--max-gb", type=float, default=DEFAULT_MAX_BYTES / (1024 * MB),
+                       help="Cap on blobs the mirror fetched itself; least recently used are evicted")
+    args = parser.parse_args(argv)
+
+    if args.self_test:
+        return 0 if self_test() else 1
+    if args.command != "serve":
+        parser.print_help()
+        return 1
+    server, mirror = start_mirror(ModelStore(args.store), args.host, args.port, args.revalidate_after,
+                                  allowed_hosts=UPSTREAM_HOSTS + tuple(args.allow_host),
+                                  max_bytes=int(args.max_gb * 1024 * MB))
+    print(f"🪞 Mirroring into {args.store} on http://{args.host}:{server.server_address[1]}")
+    print(f"   Clients: export ROADTRIP_MODEL_MIRROR=http://<this-host>:{server.server_address[1]}")
+    if args.host in ("127.0.0.1", "localhost", "::1"):
+        print("   Bound to localhost only; pass --host <LAN address> to serve other machines")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Content-addressed local model store
+
+Model variants, platform bundles and versions share many identical files.
+The e2b and e4b tokenizer configs are the same bytes, and the iOS and Android
+bundles carry the same safetensors shards. The store keeps each distinct file
+once, as a blob named by its SHA-256:
+
+    <root>/blobs/ab/ab12...ef      read-only file contents
+    <root>/manifests/<name>.json   {"files": {relative path: {"sha256", "size"}}}
+
+Working directories (llm/<model>, iOS bundles, Android assets) are
+materialized from blobs instead of copied. Each file is linked in the first
+way that works: a reflink (copy-on-write clone on APFS/Btrfs/XFS), then a
+hardlink, then a plain copy when the blob is on another filesystem.
+
+Blobs are always built from a clone or copy, never by linking the file being
+ingested, so ingest leaves the caller's inode alone. A hardlinked working
+file *is* the blob, though: replace it (write a temp file and rename) rather
+than writing into it. Blobs are read-only, which stops ordinary users from
+editing them in place, but root ignores the mode bits.
+
+Usage:
+    python3 models/model_store.py ingest gemma-3n-e2b llm/gemma-3n-e2b
+    python3 models/model_store.py materialize gemma-3n-e2b /tmp/bundle
+    python3 models/model_store.py stats
+"""
+
+import os
+import sys
+import json
+import stat
+import shutil
+import argparse
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from transfer_engine import sha256_file, sha256_files
+
+DEFAULT_STORE = Path(__file__).parent / ".model-store"
+FICLONE = 0x40049409  # Linux ioctl: share extents with another file (Btrfs, XFS, bcachefs)
+READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+def _reflink(source: Path, dest: Path) -> bool:
+    """Copy-on-write clone; False where the platform or filesystem can't do it"""
+    if sys.platform == "darwin":
+        import ctypes
+        try:
+            clonefile = ctypes.CDLL(None, use_errno=True).clonefile
+        except AttributeError:
+            return False
+        return clonefile(os.fsencode(source), os.fsencode(dest), 0) == 0
+    if sys.platform.startswith("linux"):
+        import fcntl
+        with open(source, "rb") as src:
+            dst_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            try:
+                fcntl.ioctl(dst_fd, FICLONE, src.fileno())
+                return True
+            except OSError:
+                os.close(dst_fd)
+                dst_fd = None
+                os.unlink(dest)
+                return False
+            finally:
+                if dst_fd is not None:
+                    os.close(dst_fd)
+    return False
+
+def link_file(source: Path, dest: Path, mode: str = "auto") -> str:
+    """Place `source` at `dest` without duplicating data where possible
+
+    mode is "auto" (reflink, then hardlink, then copy) or one of those three.
+    Returns the method used.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.exists() or dest.is_symlink():
+        dest.unlink()
+    if mode in ("auto", "reflink") and _reflink(source, dest):
+        _copy_times(source, dest)
+        return "reflink"
+    if mode in ("auto", "hardlink"):
+        try:
+            os.link(source, dest)
+            return "hardlink"
+        except OSError:
+            if mode == "hardlink":
+                raise
+    if mode == "reflink":
+        raise OSError(f"Cannot reflink {source} to {dest}")
+    shutil.copyfile(source, dest)
+    _copy_times(source, dest)
+    return "copy"
+
+def _copy_times(source: Path, dest: Path):
+    # Clones and copies keep the source mtime, so size/mtime stamps (MetadataCache) stay valid
+    st = os.stat(source)
+    os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+@dataclass
+class StoreStats:
+    blobs: int
+    stored_bytes: int   # Distinct content on disk
+    logical_bytes: int  # Sum over all manifests (what plain copies would take)
+    manifests: int
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.logical_bytes - self.stored_bytes
+
+class ModelStore:
+    """Blobs keyed by SHA-256 plus named manifests that reference them"""
+
+    def __init__(self, root: Path = DEFAULT_STORE, link_mode: str = "auto"):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.manifest_dir = self.root / "manifests"
+        self.link_mode = link_mode
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_dir.mkdir(parents=True, exist_ok=True)
+
+    def blob_path(self, digest: str) -> Path:
+        return self.blob_dir / digest[:2] / digest
+
+    def has(self, digest: str) -> bool:
+        return self.blob_path(digest).exists()
+
+    def put(self, path: Path, digest: Optional[str] = None) -> str:
+        """Add a file's contents (no-op if already stored); returns its SHA-256"""
+        digest = digest or sha256_file(path)
+        blob = self.blob_path(digest)
+        if blob.exists():
+            return digest
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        # Stage under a temp name so a crash never leaves a truncated blob behind
+        fd, tmp_name = tempfile.mkstemp(dir=blob.parent, prefix=f".{digest[:8]}-")
+        os.close(fd)
+        tmp = Path(tmp_name)
+        try:
+            tmp.unlink()
+            # Never hardlink: the blob must not share an inode with the caller's file
+            if not (self.link_mode in ("auto", "reflink") and _reflink(Path(path), tmp)):
+                shutil.copyfile(path, tmp)
+            _copy_times(Path(path), tmp)
+            os.chmod(tmp, READ_ONLY)
+            os.replace(tmp, blob)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return digest
+
+    # -- manifests --------------------------------------------------------
+
+    def manifest_path(self, name: str) -> Path:
+        return self.manifest_dir / f"{name}.json"
+
+    def load_manifest(self, name: str) -> Dict[str, Dict]:
+        with open(self.manifest_path(name)) as f:
+            return json.load(f)["files"]
+
+    def manifests(self) -> List[str]:
+        return sorted(path.stem for path in self.manifest_dir.glob("*.json"))
+
+    def save_manifest(self, name: str, files: Dict[str, Dict]):
+        tmp_path = self.manifest_path(name).with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"name": name, "files": files}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path(name))
+
+    def ingest(self, name: str, directory: Path, checksums: Optional[Dict[Path, str]] = None,
+               relink: bool = True, exclude: Iterable[str] = ("manifest.json",)) -> Dict[str, Dict]:
+        """Store every file under `directory` and record them as manifest `name`
+
+        `checksums` (e.g. from the download stream) skips re-hashing those
+        files. With `relink`, the working copies are replaced by links to
+        their blobs, so identical files across models stop taking extra space.
+        """
+        directory = Path(directory)
+        exclude = set(exclude)
+        paths = sorted(path for path in directory.rglob("*")
+                       if path.is_file() and not path.is_symlink() and path.name not in exclude
+                       and not path.name.endswith((".part", ".part.json")))
+        checksums = {Path(path): digest for path, digest in (checksums or {}).items() if digest}
+        # Files still materialized from their blob by an earlier ingest need no re-hash
+        previous = self.load_manifest(name) if self.manifest_path(name).exists() else {}
+        for path in paths:
+            entry = previous.get(path.relative_to(directory).as_posix())
+            if path not in checksums and entry and entry["size"] == path.stat().st_size and \
+                    self._is_materialized(path, self.blob_path(entry["sha256"])):
+                checksums[path] = entry["sha256"]
+        digests = {path: checksums[path] for path in paths if path in checksums}
+        digests.update(sha256_files([path for path in paths if path not in digests]))
+
+        files = {}
+        for path in paths:
+            blob = self.blob_path(digests[path])
+            # A blob just copied from `path` matches it by size/mtime, so check before put()
+            materialized = blob.exists() and self._is_materialized(path, blob)
+            digest = self.put(path, digests[path])
+            files[path.relative_to(directory).as_posix()] = {"sha256": digest, "size": path.stat().st_size}
+            if relink and not materialized and self.link_mode != "copy":
+                link_file(blob, path, self.link_mode)
+        self.save_manifest(name, files)
+        return files
+
+    def materialize(self, name: str, dest_dir: Path, files: Optional[Iterable[str]] = None) -> Dict[str, str]:
+        """Link a manifest's files (or the listed subset) into `dest_dir`; returns path -> method"""
+        manifest = self.load_manifest(name)
+        wanted = list(manifest) if files is None else [path for path in files if path in manifest]
+        methods = {}
+        for relative in wanted:
+            entry = manifest[relative]
+            dest = Path(dest_dir) / relative
+            blob = self.blob_path(entry["sha256"])
+            if self._is_materialized(dest, blob):
+                methods[relative] = "present"
+                continue
+            methods[relative] = link_file(blob, dest, self.link_mode)
+        return methods
+
+    @staticmethod
+    def _is_materialized(path: Path, blob: Path) -> bool:
+        """`path` is a hardlink to `blob`, or a clone/copy stamped with its size and mtime"""
+        try:
+            a, b = os.stat(path), os.stat(blob)
+        except OSError:
+            return False
+        return (a.st_ino, a.st_dev) == (b.st_ino, b.st_dev) or \
+            (a.st_size, a.st_mtime_ns) == (b.st_size, b.st_mtime_ns)
+
+    # -- housekeeping -----------------------------------------------------
+
+    def referenced(self) -> Set[str]:
+        """Digests some manifest still needs"""
+        return {entry["sha256"] for name in self.manifests() for entry in self.load_manifest(name).values()}
+
+    def remove(self, digest: str) -> int:
+        """Delete one blob; returns bytes freed (0 if it wasn't stored)"""
+        blob = self.blob_path(digest)
+        try:
+            size = blob.stat().st_size
+            os.chmod(blob, READ_ONLY | stat.S_IWUSR)
+            blob.unlink()
+        except FileNotFoundError:
+            return 0
+        return size
+
+    def gc(self) -> int:
+        """Delete blobs no manifest references; returns bytes freed"""
+        referenced = self.referenced()
+        return sum(self.remove(blob.name) for blob in self.blob_dir.glob("*/*")
+                   if blob.name not in referenced and not blob.name.startswith("."))
+
+    def stats(self) -> StoreStats:
+        blobs = [blob for blob in self.blob_dir.glob("*/*") if not blob.name.startswith(".")]
+        manifests = self.manifests()
+        logical = sum(entry["size"] for name in manifests for entry in self.load_manifest(name).values())
+        return StoreStats(len(blobs), sum(blob.stat().st_size for blob in blobs), logical, len(manifests))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Content-addressed model store")
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE)
+    parser.add_argument("--link-mode", choices=["auto", "reflink", "hardlink", "copy"], default="auto")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Add a model directory and relink it to the store")
+    ingest.add_argument("name")
+    ingest.add_argument("directory", type=Path)
+    materialize = commands.add_parser("materialize", help="Link a stored model into a directory")
+    materialize.add_argument("name")
+    materialize.add_argument("dest", type=Path)
+    commands.add_parser("stats", help="Show deduplication savings")
+    commands.add_parser("gc", help="Remove unreferenced blobs")
+    args = parser.parse_args(argv)
+
+    store = ModelStore(args.store, args.link_mode)
+    if args.command == "ingest":
+        files = store.ingest(args.name, args.directory)
+        print(f"📦 {args.name}: {len(files)} files stored")
+    elif args.command == "materialize":
+        methods = store.materialize(args.name, args.dest)
+        for relative, method in sorted(methods.items()):
+            print(f"   {method:<8} {relative}")
+    elif args.command == "gc":
+        print(f"🧹 Freed {store.gc() / (1024 * 1024):.1f} MB")
+    stats = store.stats()
+    print(f"   {stats.manifests} manifests, {stats.blobs} blobs: {stats.stored_bytes / (1024 * 1024):.1f} MB stored "
+          f"for {stats.logical_bytes / (1024 * 1024):.1f} MB of model files "
+          f"({stats.saved_bytes / (1024 * 1024):.1f} MB deduplicated)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Per-tensor delta patches for safetensors model updates
+
+A model update usually changes a handful of tensors, or just the tokenizer,
+yet a plain download re-fetches every multi-GB shard. A delta describes the
+new version in terms of the old one:
+
+- safetensors files: the new file's header is kept verbatim. Each tensor is
+  either copied from the old file (same bytes, found by content hash even if
+  renamed or moved) or carried as a literal in the patch.
+- other files: carried whole when their checksum changed, otherwise reused.
+
+Patch layout for one safetensors file (`<name>.sfdelta`):
+
+    b"SFDELTA1" | u64 LE json length | json | literal payload
+
+The JSON holds the base and target (size, sha256), the target header bytes
+and an op list covering the target data buffer in order:
+["copy", base_offset, length] or ["data", payload_offset, length].
+
+A model patch directory holds delta.json (one action per file, plus the
+target manifest), the .sfdelta files and the changed non-tensor files.
+apply_model_delta() rebuilds the new version next to the old one and checks
+every file against the target manifest's SHA-256 before reporting success.
+
+Usage:
+    python3 models/safetensors_delta.py diff llm/gemma-3n-e2b llm/gemma-3n-e2b-new /tmp/patch
+    python3 models/safetensors_delta.py apply llm/gemma-3n-e2b /tmp/patch llm/gemma-3n-e2b-new
+    python3 models/safetensors_delta.py --self-test
+"""
+
+import os
+import sys
+import json
+import time
+import struct
+import base64
+import shutil
+import hashlib
+import argparse
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from model_store import link_file
+from transfer_engine import HASH_BLOCK_SIZE, MB, sha256_file, sha256_files
+
+MAGIC = b"SFDELTA1"
+DELTA_SUFFIX = ".sfdelta"
+DELTA_INDEX = "delta.json"
+MANIFEST_FILE = "manifest.json"
+_U64 = struct.Struct("<Q")
+
+class DeltaError(ValueError):
+    """A patch does not match its base or does not reproduce its target"""
+
+@dataclass
+class SafetensorsLayout:
+    header: Dict            # Parsed JSON header
+    header_bytes: bytes     # Verbatim, so rebuilt files hash identically
+    data_start: int         # File offset of the data buffer
+    size: int
+
+    def tensors(self) -> List[Tuple[str, int, int]]:
+        """(name, start, end) within the data buffer, in buffer order"""
+        spans = [(name, info["data_offsets"][0], info["data_offsets"][1])
+                 for name, info in self.header.items() if name != "__metadata__"]
+        return sorted(spans, key=lambda span: span[1])
+
+def read_layout(path: Path) -> SafetensorsLayout:
+    with open(path, "rb") as f:
+        prefix = f.read(_U64.size)
+        if len(prefix) != _U64.size:
+            raise DeltaError(f"{path} is too short to be a safetensors file")
+        (header_length,) = _U64.unpack(prefix)
+        header_bytes = f.read(header_length)
+    if len(header_bytes) != header_length:
+        raise DeltaError(f"{path} has a truncated safetensors header")
+    return SafetensorsLayout(json.loads(header_bytes), header_bytes, _U64.size + header_length,
+                             os.path.getsize(path))
+
+def _read_range(f, offset: int, length: int) -> Iterator[bytes]:
+    f.seek(offset)
+    while length > 0:
+        block = f.read(min(HASH_BLOCK_SIZE, length))
+        if not block:
+            raise DeltaError(f"Unexpected end of file at offset {offset}")
+        length -= len(block)
+        yield block
+
+def _range_digest(f, offset: int, length: int) -> bytes:
+    digest = hashlib.blake2b(digest_size=20)
+    for block in _read_range(f, offset, length):
+        digest.update(block)
+    return digest.digest()
+
+# ----------------------------------------------------------------------------
+# One safetensors file
+
+@dataclass
+class DeltaStats:
+    target_bytes: int
+    patch_bytes: int
+    copied_tensors: int
+    replaced_tensors: int
+
+    @property
+    def saved_fraction(self) -> float:
+        return 1 - self.patch_bytes / self.target_bytes if self.target_bytes else 0.0
+
+def make_tensor_delta(base_path: Path, target_path: Path, out_path: Path) -> DeltaStats:
+    """Write a delta that rebuilds `target_path` from `base_path`"""
+    base = read_layout(base_path)
+    target = read_layout(target_path)
+
+    with open(base_path, "rb") as base_file:
+        # Content hash -> absolute offset of a base tensor with those bytes
+        base_index = {}
+        for _, start, end in base.tensors():
+            digest = _range_digest(base_file, base.data_start + start, end - start)
+            base_index.setdefault((end - start, digest), base.data_start + start)
+
+    ops: List[List] = []
+    literals: List[Tuple[int, int]] = []  # (target absolute offset, length) in payload order
+    payload_size = 0
+    copied = replaced = 0
+
+    def add_literal(offset: int, length: int):
+        nonlocal payload_size
+        if length <= 0:
+            return
+        if ops and ops[-1][0] == "data" and ops[-1][1] + ops[-1][2] == payload_size:
+            ops[-1][2] += length  # Extend the previous literal
+        else:
+            ops.append(["data", payload_size, length])
+        literals.append((offset, length))
+        payload_size += length
+
+    with open(target_path, "rb") as target_file:
+        position = 0  # Within the target data buffer
+        for _, start, end in target.tensors():
+            add_literal(target.data_start + position, start - position)  # Padding, if any
+            length = end - start
+            match = base_index.get((length, _range_digest(target_file, target.data_start + start, length)))
+            if match is not None:
+                ops.append(["copy", match, length])
+                copied += 1
+            else:
+                add_literal(target.data_start + start, length)
+                replaced += 1
+            position = end
+        add_literal(target.data_start + position, target.size - target.data_start - position)
+
+        index = {
+            "format": 1,
+            "base": {"size": base.size, "sha256": sha256_file(base_path)},
+            "target": {"size": target.size, "sha256": sha256_file(target_path)},
+            "header": base64.b64encode(target.header_bytes).decode("ascii"),
+            "ops": ops,
+        }
+        index_bytes = json.dumps(index, separators=(",", ":")).encode("utf-8")
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(out_path, "wb") as out:
+            out.write(MAGIC)
+            out.write(_U64.pack(len(index_bytes)))
+            out.write(index_bytes)
+            for offset, length in literals:
+                for block in _read_range(target_file, offset, length):
+                    out.write(block)
+
+    return DeltaStats(target.size, os.path.getsize(out_path), copied, replaced)
+
+def apply_tensor_delta(base_path: Path, delta_path: Path, out_path: Path, verify_base: bool = True) -> str:
+    """Rebuild the target from `base_path`; returns its SHA-256 after checking it"""
+    with open(delta_path, "rb") as delta:
+        if delta.read(len(MAGIC)) != MAGIC:
+            raise DeltaError(f"{delta_path} is not a safetensors delta")
+        (index_length,) = _U64.unpack(delta.read(_U64.size))
+        index = json.loads(delta.read(index_length))
+        payload_start = len(MAGIC) + _U64.size + index_length
+
+        if os.path.getsize(base_path) != index["base"]["size"] or \
+                (verify_base and sha256_file(base_path) != index["base"]["sha256"]):
+            raise DeltaError(f"{base_path} is not the version {delta_path.name} was made against")
+
+        header_bytes = base64.b64decode(index["header"])
+        digest = hashlib.sha256()
+        tmp_path = out_path.with_name(out_path.name + ".tmp")
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(base_path, "rb") as base, open(tmp_path, "wb") as out:
+            for block in (_U64.pack(len(header_bytes)), header_bytes):
+                out.write(block)
+                digest.update(block)
+            for kind, offset, length in index["ops"]:
+                source, start = (base, offset) if kind == "copy" else (delta, payload_start + offset)
+                for block in _read_range(source, start, length):
+                    out.write(block)
+                    digest.update(block)
+
+    sha256 = digest.hexdigest()
+    if sha256 != index["target"]["sha256"]:
+        tmp_path.unlink()
+        raise DeltaError(f"Rebuilt {out_path.name} does not match the target checksum")
+    os.replace(tmp_path, out_path)
+    return sha256
+
+# ----------------------------------------------------------------------------
+# Whole model directories
+
+def load_manifest(model_dir: Path) -> Dict[str, Dict]:
+    """name -> {"size", "checksum"} from manifest.json (download_gemma3n format), else by hashing"""
+    manifest_path = model_dir / MANIFEST_FILE
+    if manifest_path.exists():
+        with open(manifest_path) as f:
+            return {entry["name"]: entry for entry in json.load(f)["files"]}
+    paths = sorted(path for path in model_dir.iterdir() if path.is_file() and path.name != MANIFEST_FILE)
+    checksums = sha256_files(paths)
+    return {path.name: {"name": path.name, "size": path.stat().st_size, "checksum": checksums[path]}
+            for path in paths}
+
+def make_model_delta(old_dir: Path, new_dir: Path, patch_dir: Path) -> Dict[str, DeltaStats]:
+    """Write a patch directory that turns `old_dir` into `new_dir`"""
+    old, new = load_manifest(old_dir), load_manifest(new_dir)
+    patch_dir.mkdir(parents=True, exist_ok=True)
+    actions, stats = {}, {}
+    for name, entry in new.items():
+        before = old.get(name)
+        if before and before["checksum"] == entry["checksum"]:
+            actions[name] = {"action": "keep"}
+            continue
+        if before and name.endswith(".safetensors"):
+            file_stats = make_tensor_delta(old_dir / name, new_dir / name, patch_dir / (name + DELTA_SUFFIX))
+            if file_stats.patch_bytes < entry["size"]:
+                actions[name] = {"action": "delta", "patch": name + DELTA_SUFFIX}
+                stats[name] = file_stats
+                continue
+            (patch_dir / (name + DELTA_SUFFIX)).unlink()
+        shutil.copyfile(new_dir / name, patch_dir / name)
+        actions[name] = {"action": "replace"}
+        stats[name] = DeltaStats(entry["size"], entry["size"], 0, 0)
+    with open(patch_dir / DELTA_INDEX, "w") as f:
+        json.dump({"files": actions, "manifest": list(new.values())}, f, indent=2)
+    if (new_dir / MANIFEST_FILE).exists():
+        shutil.copyfile(new_dir / MANIFEST_FILE, patch_dir / MANIFEST_FILE)
+    return stats
+
+def apply_model_delta(old_dir: Path, patch_dir: Path, out_dir: Path) -> Dict[str, str]:
+    """Rebuild the new version in `out_dir`; every file is verified against the target manifest"""
+    with open(patch_dir / DELTA_INDEX) as f:
+        delta = json.load(f)
+    expected = {entry["name"]: entry["checksum"] for entry in delta["manifest"]}
+    out_dir.mkdir(parents=True, exist_ok=True)
+    checksums = {}
+    for name, action in delta["files"].items():
+        dest = out_dir / name
+        if action["action"] == "delta":
+            checksums[name] = apply_tensor_delta(old_dir / name, patch_dir / action["patch"], dest)
+        elif action["action"] == "keep" and (old_dir / name).resolve() == dest.resolve():
+            checksums[name] = sha256_file(dest)  # Updating in place; the file is already there
+        else:
+            # Unchanged files are linked from the old version, changed ones copied out of the patch
+            source = old_dir / name if action["action"] == "keep" else patch_dir / name
+            checksums[name] = _replace_file(source, dest, expected[name], link=action["action"] == "keep")
+        if checksums[name] != expected[name]:
+            raise DeltaError(f"{name}: checksum {checksums[name][:12]}… does not match the manifest")
+    if (patch_dir / MANIFEST_FILE).exists():
+        _replace_file(patch_dir / MANIFEST_FILE, out_dir / MANIFEST_FILE)
+    return checksums
+
+def _replace_file(source: Path, dest: Path, sha256: Optional[str] = None, link: bool = False) -> str:
+    """Stage `source` under a temp name, check it, then rename it over `dest`
+
+    Never writes through `dest`, which may be a hardlink shared with another
+    model version or a store blob. Returns the staged file's SHA-256.
+    """
+    tmp_path = dest.with_name(dest.name + ".tmp")
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if link:
+        link_file(source, tmp_path)
+    else:
+        if tmp_path.exists() or tmp_path.is_symlink():
+            tmp_path.unlink()
+        shutil.copyfile(source, tmp_path)
+    digest = sha256_file(tmp_path)
+    if sha256 is not None and digest != sha256:
+        tmp_path.unlink()
+        return digest
+    os.replace(tmp_path, dest)
+    return digest
+
+# ----------------------------------------------------------------------------
+# Self-test
+
+def write_safetensors(path: Path, tensors: Dict[str, bytes], metadata: Optional[Dict[str, str]] = None):
+    """Minimal writer for F32 1-D tensors (test fixtures)"""
+    header, offset = {}, 0
+    if metadata:
+        header["__metadata__"] = metadata
+    for name, data in tensors.items():
+        header[name] = {"dtype": "F32", "shape": [len(data) // 4], "data_offsets": [offset, offset + len(data)]}
+        offset += len(data)
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    header_bytes += b" " * (-len(header_bytes) % 8)  # Keep the data buffer 8-byte aligned
+    with open(path, "wb") as f:
+        f.write(_U64.pack(len(header_bytes)))
+        f.write(header_bytes)
+        for data in tensors.values():
+            f.write(data)
+
+def self_test(layers: int = 24, tensor_mb: int = 2) -> bool:
+    checks: List[Tuple[str, bool]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        old_dir, new_dir = Path(tmp) / "v1", Path(tmp) / "v2"
+        old_dir.mkdir()
+        new_dir.mkdir()
+        tensors = {f"model.layers.{i}.mlp.weight": os.urandom(tensor_mb * MB) for i in range(layers)}
+        tensors["model.norm.weight"] = os.urandom(8192)
+        write_safetensors(old_dir / "model.safetensors", tensors, {"format": "pt"})
+        (old_dir / "tokenizer.json").write_text('{"vocab": ["a", "b"]}')
+        (old_dir / "config.json").write_text('{"layers": 24}')
+
+        # v2: two fine-tuned layers, a renamed tensor, a new tokenizer, same config
+        updated = dict(tensors)
+        updated["model.layers.3.mlp.weight"] = os.urandom(tensor_mb * MB)
+        updated["model.layers.17.mlp.weight"] = os.urandom(tensor_mb * MB)
+        updated["model.final_norm.weight"] = updated.pop("model.norm.weight")
+        write_safetensors(new_dir / "model.safetensors", updated, {"format": "pt"})
+        (new_dir / "tokenizer.json").write_text('{"vocab": ["a", "b", "c"]}')
+        shutil.copyfile(old_dir / "config.json", new_dir / "config.json")
+
+        patch_dir = Path(tmp) / "patch"
+        start = time.perf_counter()
+        stats = make_model_delta(old_dir, new_dir, patch_dir)
+        diff_s = time.perf_counter() - start
+        weights = stats["model.safetensors"]
+        patch_bytes = sum(path.stat().st_size for path in patch_dir.iterdir())
+        checks.append((f"2 of {layers + 1} tensors shipped ({weights.replaced_tensors} replaced, "
+                       f"{weights.copied_tensors} copied)",
+                       weights.replaced_tensors == 2 and weights.copied_tensors == layers - 1))
+        checks.append((f"patch is {patch_bytes / MB:.1f} MB for a {weights.target_bytes / MB:.1f} MB model "
+                       f"({weights.saved_fraction * 100:.0f}% saved)", weights.saved_fraction > 0.85))
+
+        out_dir = Path(tmp) / "rebuilt"
+        start = time.perf_counter()
+        checksums = apply_model_delta(old_dir, patch_dir, out_dir)
+        apply_s = time.perf_counter() - start
+        checks.append(("rebuilt files match v2 byte for byte",
+                       all(sha256_file(out_dir / name) == sha256_file(new_dir / name) for name in checksums)))
+
+        # Output files hardlinked to v1 (e.g. materialized from the store) are replaced, not written through
+        linked = Path(tmp) / "linked"
+        shutil.copytree(old_dir, linked, copy_function=os.link)
+        before = {path.name: sha256_file(path) for path in old_dir.iterdir()}
+        apply_model_delta(old_dir, patch_dir, linked)
+        checks.append(("v1 is untouched when the output shares its inodes",
+                       before == {path.name: sha256_file(path) for path in old_dir.iterdir()}))
+
+        corrupt = Path(tmp) / "corrupt"
+        shutil.copytree(old_dir, corrupt)
+        with open(corrupt / "model.safetensors", "r+b") as f:
+            f.seek(-100, os.SEEK_END)
+            f.write(b"\0" * 8)
+        try:
+            apply_model_delta(corrupt, patch_dir, Path(tmp) / "rebuilt-corrupt")
+            checks.append(("a modified base is rejected", False))
+        except DeltaError:
+            checks.append(("a modified base is rejected", True))
+
+    print(f"🩹 SAFETENSORS DELTA SELF-TEST (diff {diff_s:.2f}s, apply {apply_s:.2f}s)")
+    for label, ok in checks:
+        print(f"   {'✅' if ok else '❌'} {label}")
+    return all(ok for _, ok in checks)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-tensor delta patches between model versions")
+    parser.add_argument("--self-test", action="store_true", help="Diff and rebuild a synthetic model")
+    commands = parser.add_subparsers(dest="command")
+    diff = commands.add_parser("diff", help="Write a patch that turns OLD into NEW")
+    diff.add_argument("old", type=Path)
+    diff.add_argument("new", type=Path)
+    diff.add_argument("patch", type=Path)
+    apply = commands.add_parser("apply", help="Rebuild NEW from OLD and a patch")
+    apply.add_argument("old", type=Path)
+    apply.add_argument("patch", type=Path)
+    apply.add_argument("out", type=Path)
+    args = parser.parse_args(argv)
+
+    if args.self_test:
+        return 0 if self_test() else 1
+    if args.command == "diff":
+        stats = make_model_delta(args.old, args.new, args.patch)
+        for name, file_stats in sorted(stats.items()):
+            print(f"   {name}: {file_stats.patch_bytes / MB:.1f} MB of {file_stats.target_bytes / MB:.1f} MB "
+                  f"({file_stats.replaced_tensors} tensors replaced)")
+        print(f"🩹 Patch written to {args.patch} ({len(stats)} changed files)")
+    elif args.command == "apply":
+        checksums = apply_model_delta(args.old, args.patch, args.out)
+        print(f"✅ Rebuilt {len(checksums)} files in {args.out}, all matching the manifest")
+    else:
+        parser.print_help()
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Shard selection from model.safetensors.index.json
+
+Sharded checkpoints ship a weight map (tensor name -> shard file). A mobile
+export rarely needs every tensor. A text-only build drops the vision and
+audio towers, and a truncated build keeps only the first N decoder layers.
+Given a TensorSelection, plan_shards() works out which shards hold at least
+one wanted tensor, so the downloader can skip the rest.
+
+Selection works at shard granularity. A shard is skipped only when none of
+its tensors are wanted. The plan is written next to the model as
+model.safetensors.selection.json, listing the kept weight map and the bytes
+saved. The upstream index stays untouched so later full downloads still
+validate. Converters stage the model with write_filtered_index(), which
+writes an index whose weight map only points at the shards that were kept.
+
+Usage:
+    python3 models/shard_selection.py llm/gemma-3n-e2b/model.safetensors.index.json --layers 8
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+INDEX_FILE = "model.safetensors.index.json"
+SELECTION_FILE = "model.safetensors.selection.json"
+
+# Name components of multimodal towers across Gemma 3n / PaliGemma / LLaVA-style checkpoints
+MULTIMODAL_PARTS = frozenset({"vision_tower", "audio_tower", "embed_vision", "embed_audio",
+                              "multi_modal_projector", "vision_model", "audio_model"})
+_LAYER = re.compile(r"(?:^|\.)layers\.(\d+)\.")
+
+@dataclass
+class TensorSelection:
+    """Which tensors an export needs"""
+    text_only: bool = False
+    max_layers: Optional[int] = None  # Keep decoder layers 0..max_layers-1
+    exclude: Tuple[str, ...] = ()     # Extra regexes; matching tensors are dropped
+
+    def wants(self, name: str) -> bool:
+        if self.text_only and any(part in MULTIMODAL_PARTS for part in name.split(".")):
+            return False
+        if self.max_layers is not None:
+            match = _LAYER.search(name)
+            if match and int(match.group(1)) >= self.max_layers:
+                return False
+        return not any(re.search(pattern, name) for pattern in self.exclude)
+
+    @property
+    def is_full(self) -> bool:
+        return not self.text_only and self.max_layers is None and not self.exclude
+
+    def describe(self) -> str:
+        parts = []
+        if self.text_only:
+            parts.append("text-only")
+        if self.max_layers is not None:
+            parts.append(f"layers 0-{self.max_layers - 1}")
+        parts.extend(f"excluding /{pattern}/" for pattern in self.exclude)
+        return ", ".join(parts) or "all tensors"
+
+@dataclass
+class ShardPlan:
+    needed: List[str]
+    skipped: List[str]
+    weight_map: Dict[str, str]  # Kept tensors only
+    dropped_tensors: int
+    shard_sizes: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def kept_tensors(self) -> int:
+        return len(self.weight_map)
+
+    @property
+    def bytes_needed(self) -> int:
+        return sum(self.shard_sizes.get(shard, 0) for shard in self.needed)
+
+    @property
+    def bytes_saved(self) -> int:
+        return sum(self.shard_sizes.get(shard, 0) for shard in self.skipped)
+
+    def summary(self) -> str:
+        total = self.bytes_needed + self.bytes_saved
+        saved = f", {self.bytes_saved / 1e9:.2f} GB saved" if self.shard_sizes else ""
+        percent = f" ({self.bytes_saved / total * 100:.0f}%)" if self.shard_sizes and total else ""
+        return (f"{len(self.needed)}/{len(self.needed) + len(self.skipped)} shards, "
+                f"{self.kept_tensors} tensors kept, {self.dropped_tensors} dropped{saved}{percent}")
+
+def load_weight_map(index_path: Path) -> Dict[str, str]:
+    with open(index_path) as f:
+        return json.load(f)["weight_map"]
+
+def plan_shards(weight_map: Dict[str, str], selection: TensorSelection) -> ShardPlan:
+    """Shards that hold at least one wanted tensor, in shard-name order"""
+    kept = {name: shard for name, shard in weight_map.items() if selection.wants(name)}
+    needed = sorted(set(kept.values()))
+    skipped = sorted(set(weight_map.values()) - set(needed))
+    return ShardPlan(needed, skipped, kept, len(weight_map) - len(kept))
+
+def write_selection(plan: ShardPlan, selection: TensorSelection, path: Path):
+    """Record what was fetched so converters know which tensors are present"""
+    data = {
+        "selection": {"text_only": selection.text_only, "max_layers": selection.max_layers,
+                      "exclude": list(selection.exclude)},
+        "shards": plan.needed,
+        "skipped_shards": plan.skipped,
+        "bytes_saved": plan.bytes_saved,
+        "shard_sizes": plan.shard_sizes,
+        "weight_map": plan.weight_map,
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+def read_selection(model_dir: Path) -> Optional[Dict]:
+    """The sidecar written by write_selection, or None for a full download"""
+    path = Path(model_dir) / SELECTION_FILE
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def weight_files(model_dir: Path) -> List[str]:
+    """Shard files a converter should stage: the selected shards, or every shard on disk"""
+    model_dir = Path(model_dir)
+    selection = read_selection(model_dir)
+    if selection is None:
+        return sorted(path.name for path in model_dir.glob("*.safetensors"))
+    return [shard for shard in selection["shards"] if (model_dir / shard).exists()]
+
+def write_filtered_index(model_dir: Path, dest: Path) -> bool:
+    """Write an index for the selected tensors only to `dest`
+
+    Returns False (and writes nothing) when the model has no selection
+    sidecar or no index. Written through a temp file so a linked copy of the
+    upstream index at `dest` is replaced, never truncated in place.
+    """
+    model_dir, dest = Path(model_dir), Path(dest)
+    selection = read_selection(model_dir)
+    if selection is None or not (model_dir / INDEX_FILE).exists():
+        return False
+    with open(model_dir / INDEX_FILE) as f:
+        index = json.load(f)
+    index["weight_map"] = selection["weight_map"]
+    index.get("metadata", {}).pop("total_size", None)  # Counts the dropped tensors too
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(dest.name + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, dest)
+    return True
+
+def _layer_count(value: str) -> int:
+    count = int(value)
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {count}")
+    return count
+
+def add_selection_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--text-only", action="store_true", help="Skip vision/audio tower tensors")
+    parser.add_argument("--layers", type=_layer_count, help="Keep only the first N decoder layers")
+    parser.add_argument("--exclude", action="append", default=[], metavar="REGEX",
+                        help="Drop tensors whose name matches (repeatable)")
+
+def selection_from_args(args: argparse.Namespace) -> TensorSelection:
+    if args.layers is not None and args.layers < 1:
+        raise ValueError(f"--layers must be at least 1, got {args.layers}")
+    return TensorSelection(args.text_only, args.layers, tuple(args.exclude))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Show which shards a tensor selection needs")
+    parser.add_argument("index", type=Path, help=f"Path to {INDEX_FILE}")
+    add_selection_arguments(parser)
+    args = parser.parse_args(argv)
+
+    selection = selection_from_args(args)
+    plan = plan_shards(load_weight_map(args.index), selection)
+    # Sizes of shards already on disk next to the index, if any
+    plan.shard_sizes = {shard: (args.index.parent / shard).stat().st_size
+                        for shard in plan.needed + plan.skipped if (args.index.parent / shard).exists()}
+    print(f"🧩 {args.index.parent.name}: {selection.describe()}")
+    for shard in plan.needed:
+        print(f"   ✓ {shard}")
+    for shard in plan.skipped:
+        print(f"   – {shard} (not needed)")
+    print(f"   {plan.summary()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for model_mirror's /fetch proxy path, all on localhost
+
+Run with:
+    python3 -m pytest models/test_model_mirror.py -q
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+import requests
+
+from model_mirror import ModelMirror, start_mirror
+from model_store import ModelStore
+from transfer_engine import MB, RetryPolicy, SegmentedDownloader, mirror_fetch_url, sha256_file, start_range_server
+
+SIZE = 4 * MB
+SHARD = "model.safetensors"
+
+@pytest.fixture
+def upstream(tmp_path: Path):
+    """(served directory, base URL, request stats) of a stand-in upstream"""
+    root = tmp_path / "upstream"
+    root.mkdir()
+    (root / SHARD).write_bytes(os.urandom(SIZE))
+    httpd, stats = start_range_server(root)
+    yield root, f"http://127.0.0.1:{httpd.server_address[1]}", stats
+    httpd.shutdown()
+
+@pytest.fixture
+def mirror(tmp_path: Path):
+    """(mirror base URL, ModelMirror) proxying only 127.0.0.1"""
+    server, mirror = start_mirror(ModelStore(tmp_path / "store"), port=0, allowed_hosts=("127.0.0.1",),
+                                  retry=RetryPolicy(max_attempts=2, base_delay=0.01))
+    yield f"http://127.0.0.1:{server.server_address[1]}", mirror
+    server.shutdown()
+
+def client(mirror_url: str) -> SegmentedDownloader:
+    return SegmentedDownloader(connections=4, segment_size=1 * MB, min_segmented_size=2 * MB, mirror=mirror_url)
+
+def test_default_bind_is_loopback(tmp_path: Path):
+    server, _ = start_mirror(ModelStore(tmp_path / "store"), port=0)
+    try:
+        assert server.server_address[0] == "127.0.0.1"
+    finally:
+        server.shutdown()
+
+def test_miss_is_fetched_then_served_by_hash(upstream, mirror, tmp_path: Path):
+    root, base_url, upstream_stats = upstream
+    mirror_url, model_mirror = mirror
+    url = f"{base_url}/{SHARD}"
+    expected = sha256_file(root / SHARD)
+
+    response = requests.head(mirror_fetch_url(mirror_url, url))
+    assert response.status_code == 404 and response.headers["X-Mirror-Status"] == "fetching"
+    model_mirror.wait_idle()
+
+    response = requests.head(mirror_fetch_url(mirror_url, url), allow_redirects=False)
+    assert response.status_code == 302
+    assert response.headers["Location"] == f"/blobs/{expected}"
+    assert response.headers["X-Content-SHA256"] == expected
+
+    sent_before = upstream_stats["bytes_sent"]
+    result = client(mirror_url).download(url, tmp_path / "out" / SHARD)
+    assert "/blobs/" in result.remote.url and result.remote.sha256 == expected
+    assert result.sha256 == expected == sha256_file(tmp_path / "out" / SHARD)
+    assert upstream_stats["bytes_sent"] == sent_before  # Every byte came from the mirror
+
+@pytest.mark.parametrize("url", ["http://localhost/model.safetensors", "http://169.254.169.254/latest/meta-data",
+                                 "http://10.0.0.1/", "file:///etc/passwd"])
+def test_fetch_refuses_hosts_off_the_allowlist(mirror, url: str):
+    mirror_url, model_mirror = mirror
+    response = requests.get(mirror_fetch_url(mirror_url, url))
+    assert response.status_code in (400, 403)
+    assert model_mirror.stats["misses"] == 0 and not model_mirror._inflight
+
+def test_allowlist_matches_hosts_and_subdomains(tmp_path: Path):
+    model_mirror = ModelMirror(ModelStore(tmp_path / "store"))
+    assert model_mirror.allows("https://huggingface.co/google/gemma/resolve/main/config.json")
+    assert model_mirror.allows("https://cdn-lfs.huggingface.co/repos/ab/cd/model.safetensors")
+    assert model_mirror.allows("https://cas-bridge.xethub.hf.co/xet-bridge/abc")
+    assert not model_mirror.allows("https://evilhuggingface.co/model.safetensors")
+    assert not model_mirror.allows("https://huggingface.co.example.com/model.safetensors")
+    assert not model_mirror.allows("ftp://huggingface.co/model.safetensors")
+
+def test_byte_cap_evicts_least_recently_used(upstream, tmp_path: Path):
+    root, base_url, _ = upstream
+    for name in ("a.bin", "b.bin", "c.bin"):
+        (root / name).write_bytes(os.urandom(MB))
+    store = ModelStore(tmp_path / "store")
+    model_mirror = ModelMirror(store, allowed_hosts=("127.0.0.1",), max_bytes=int(2.5 * MB))
+
+    a = model_mirror.fetch(f"{base_url}/a.bin")
+    b = model_mirror.fetch(f"{base_url}/b.bin")
+    assert model_mirror.lookup(f"{base_url}/a.bin") == a  # a is now more recent than b
+    c = model_mirror.fetch(f"{base_url}/c.bin")
+    assert store.has(a) and store.has(c) and not store.has(b)
+    assert model_mirror.stats["evictions"] == 1
+
+    # Larger than the whole cache: refused without touching the store
+    assert model_mirror.fetch(f"{base_url}/{SHARD}") is None
+    assert model_mirror.stats["fetch_errors"] == 1 and not any(model_mirror.staging_dir.iterdir())
+
+def test_corrupt_mirror_blob_is_refetched_upstream(upstream, mirror, tmp_path: Path):
+    root, base_url, _ = upstream
+    mirror_url, model_mirror = mirror
+    url = f"{base_url}/{SHARD}"
+    expected = model_mirror.fetch(url)
+
+    blob = model_mirror.store.blob_path(expected)
+    os.chmod(blob, 0o644)
+    blob.write_bytes(os.urandom(SIZE))  # Same size, wrong bytes
+
+    downloader = client(mirror_url)
+    result = downloader.download(url, tmp_path / "out" / SHARD)
+    assert result.remote.url == url  # Second pass went upstream
+    assert result.sha256 == expected == sha256_file(tmp_path / "out" / SHARD)
+    assert expected in downloader.mirror_mismatches
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for transfer_engine against the local stand-in Range server
+
+Run with:
+    python3 -m pytest models/test_transfer_engine.py -q
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+import requests
+
+from transfer_engine import (MB, PartialDownload, RetryPolicy, SegmentedDownloader, sha256_file,
+                             start_range_server)
+
+SIZE = 12 * MB
+SHARD = "model-00001-of-00001.safetensors"
+
+@pytest.fixture
+def served(tmp_path: Path) -> Path:
+    root = tmp_path / "served"
+    root.mkdir()
+    (root / SHARD).write_bytes(os.urandom(SIZE))
+    (root / "config.json").write_text('{"model_type": "gemma"}')
+    return root
+
+@pytest.fixture
+def server(served: Path):
+    """(base URL, request stats) of a healthy stand-in server"""
+    httpd, stats = start_range_server(served)
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", stats
+    httpd.shutdown()
+
+def segmented(**options) -> SegmentedDownloader:
+    return SegmentedDownloader(connections=4, segment_size=1 * MB, min_segmented_size=2 * MB, mirror="", **options)
+
+def test_stand_in_serves_byte_ranges(served: Path, server):
+    base_url, _ = server
+    response = requests.get(f"{base_url}/{SHARD}", headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 100-199/{SIZE}"
+    assert response.content == (served / SHARD).read_bytes()[100:200]
+
+def test_segmented_download_matches_source(served: Path, tmp_path: Path):
+    # Throttled so segments overlap in time and the peak reflects real concurrency
+    httpd, stats = start_range_server(served, bytes_per_second=8 * MB)
+    dest = tmp_path / "out" / SHARD
+    try:
+        result = segmented().download(f"http://127.0.0.1:{httpd.server_address[1]}/{SHARD}", dest)
+    finally:
+        httpd.shutdown()
+    expected = sha256_file(served / SHARD)
+    assert sha256_file(dest) == expected
+    assert result.sha256 == expected  # Inline hash over out-of-order segments
+    assert stats["requests"] == SIZE // MB  # One ranged GET per segment
+    assert 1 < stats["peak"] <= 4
+    assert not PartialDownload(dest).part_path.exists()
+
+def test_small_file_uses_one_request(server, tmp_path: Path):
+    base_url, stats = server
+    dest = tmp_path / "out" / "config.json"
+    segmented().download(f"{base_url}/config.json", dest)
+    assert dest.read_text() == '{"model_type": "gemma"}'
+    assert stats["requests"] == 1
+
+def test_resume_fetches_only_missing_bytes(served: Path, tmp_path: Path):
+    dest = tmp_path / "out" / SHARD
+    httpd, _ = start_range_server(served, abort_after_bytes=int(SIZE * 0.6))
+    try:
+        with pytest.raises((requests.RequestException, IOError)):
+            segmented().download(f"http://127.0.0.1:{httpd.server_address[1]}/{SHARD}", dest)
+    finally:
+        httpd.shutdown()
+    partial = PartialDownload(dest)
+    assert partial.part_path.exists() and partial.state_path.exists() and not dest.exists()
+
+    httpd, stats = start_range_server(served)
+    try:
+        result = segmented().download(f"http://127.0.0.1:{httpd.server_address[1]}/{SHARD}", dest)
+    finally:
+        httpd.shutdown()
+    assert result.resumed_bytes > 0
+    assert result.downloaded_bytes + result.resumed_bytes == SIZE
+    assert stats["bytes_sent"] <= SIZE * 0.5
+    assert result.sha256 == sha256_file(served / SHARD) == sha256_file(dest)
+
+def test_upstream_change_restarts_from_zero(served: Path, tmp_path: Path):
+    dest = tmp_path / "out" / SHARD
+    httpd, _ = start_range_server(served, abort_after_bytes=SIZE // 2)
+    try:
+        with pytest.raises((requests.RequestException, IOError)):
+            segmented().download(f"http://127.0.0.1:{httpd.server_address[1]}/{SHARD}", dest)
+    finally:
+        httpd.shutdown()
+    (served / SHARD).write_bytes(os.urandom(SIZE))
+
+    httpd, _ = start_range_server(served)
+    try:
+        result = segmented().download(f"http://127.0.0.1:{httpd.server_address[1]}/{SHARD}", dest)
+    finally:
+        httpd.shutdown()
+    assert result.resumed_bytes == 0
+    assert sha256_file(dest) == sha256_file(served / SHARD)
+
+def test_flaky_server_is_retried_with_resume(served: Path, tmp_path: Path):
+    retries = []
+    # Chunks smaller than the cut-off, so each cut connection still leaves progress behind
+    downloader = segmented(chunk_size=MB // 4, retry=RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.05),
+                           on_retry=lambda error, failures, delay: retries.append(error))
+    httpd, _ = start_range_server(served, fail_first_requests=2, drop_response_after=MB // 2)
+    try:
+        dest = tmp_path / "out" / SHARD
+        result = downloader.download(f"http://127.0.0.1:{httpd.server_address[1]}/{SHARD}", dest)
+        assert result.sha256 == sha256_file(served / SHARD) == sha256_file(dest)
+        assert retries
+
+        retries.clear()
+        with pytest.raises(requests.HTTPError) as error:
+            downloader.download(f"http://127.0.0.1:{httpd.server_address[1]}/missing", tmp_path / "missing")
+        assert error.value.response.status_code == 404
+        assert not retries  # Fatal errors are not retried
+    finally:
+        httpd.shutdown()
@@ -0,0 +1,1329 @@
+#!/usr/bin/env python3
+"""
+Shared transfer engine for model downloads
+
+Multi-GB safetensors shards are fetched as byte ranges over several HTTP
+connections at once. Each range is written straight into a preallocated
+destination file with positioned writes (os.pwrite), so segments never
+contend for a file position and no reassembly pass is needed. Servers that
+do not advertise Range support fall back to a single streamed request, and
+files smaller than `min_segmented_size` are fetched as one range.
+
+Transfers are resumable. Bytes land in `<name>.part`, and a `<name>.part.json`
+sidecar records the validators (size, ETag, Last-Modified) and how far each
+segment got. An interrupted run picks up the missing ranges only. Ranged
+requests carry If-Range, so a file that changed upstream restarts from zero
+instead of splicing two versions together.
+
+ModelFetchScheduler fetches a whole model (shards, configs, tokenizer) at
+once through one session. Segments of all files share a single connection
+limit that grows while aggregate throughput keeps improving, the largest
+shards start first, and small files get their own lane so they are never
+stuck behind shard ranges.
+
+Failures are classified by is_retryable(). 5xx, 408/429, timeouts and
+dropped or short responses are transient. 401/403/404 and local I/O errors
+are fatal. Transient failures are retried per RetryPolicy: exponential
+backoff with full jitter, honouring Retry-After. Every retry resumes from the
+.part file, and an attempt that saved new bytes resets the failure count, so
+a flaky link slows a large shard down but does not fail it.
+
+Setting ROADTRIP_MODEL_MIRROR points every downloader at a LAN mirror
+(model_mirror.py). Probes ask the mirror first. A hit serves the blob over
+the LAN with Range support, and a miss falls back to upstream while the
+mirror caches the file for the next client. A mirror download whose bytes
+don't hash to the digest the mirror announced is discarded and fetched again
+from upstream.
+
+MetadataCache persists each file's ETag, Last-Modified, size, mtime and
+SHA-256. Probes for cached files are conditional (If-None-Match /
+If-Modified-Since), so re-running over an unchanged model costs one 304 per
+file, with no body transferred and nothing re-hashed.
+
+SHA-256 is computed while the bytes stream in (see _HashFrontier) and
+returned with the TransferResult, so manifests need no re-read of the file.
+sha256_file / sha256_files verify existing files with large reads, several
+files in parallel.
+
+A local stand-in server (RangeRequestHandler / start_range_server) serves a
+directory with Range, HEAD, ETag and Last-Modified support, and can be
+throttled per connection, so the engine can be tested entirely offline:
+
+    python3 models/transfer_engine.py --self-test
+"""
+
+import os
+import sys
+import json
+import time
+import bisect
+import random
+import hashlib
+import argparse
+import tempfile
+import threading
+import email.utils
+import urllib.parse
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MB = 1024 * 1024
+CHUNK_SIZE = 1 * MB
+DEFAULT_CONNECTIONS = 8
+DEFAULT_SEGMENT_SIZE = 64 * MB
+MIN_SEGMENTED_SIZE = 32 * MB
+HASH_BLOCK_SIZE = 4 * MB  # Verification reads; 1-8 MB keeps syscall overhead negligible
+USER_AGENT = "Roadtrip-Copilot-ModelDownloader/1.0"
+MIRROR_ENV = "ROADTRIP_MODEL_MIRROR"  # e.g. http://build-cache.local:8765 (see model_mirror.py)
+MIRROR_PROBE_TIMEOUT = 3.0
+
+# progress(bytes_done, total_bytes)
+ProgressCallback = Callable[[int, int], None]
+T = TypeVar("T")
+
+@dataclass
+class RemoteFile:
+    """What a HEAD (or 1-byte probe) told us about a download URL"""
+    url: str
+    size: Optional[int]
+    accepts_ranges: bool
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False  # A conditional probe answered 304 for the cached validators
+    sha256: Optional[str] = None  # Digest the server vouches for (a mirror's X-Content-SHA256)
+
+def create_session(pool_size: int = DEFAULT_CONNECTIONS, headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """requests.Session whose connection pool can hold `pool_size` keep-alive connections per host"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    if headers:
+        session.headers.update(headers)
+    return session
+
+def mirror_fetch_url(mirror: str, url: str) -> str:
+    """The LAN mirror's address for an upstream URL"""
+    return f"{mirror.rstrip('/')}/fetch?url={urllib.parse.quote(url, safe='')}"
+
+def split_ranges(size: int, segment_size: int) -> List[Tuple[int, int]]:
+    """Inclusive (start, end) byte ranges covering `size` bytes"""
+    return [(start, min(start + segment_size, size) - 1) for start in range(0, size, segment_size)]
+
+def _positioned_writer(fd: int) -> Callable[[bytes, int], None]:
+    if hasattr(os, "pwrite"):
+        def write(data: bytes, offset: int):
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(fd, view, offset)
+                view = view[written:]
+                offset += written
+        return write
+
+    lock = threading.Lock()  # No pwrite (Windows): serialize seek + write
+
+    def write(data: bytes, offset: int):
+        with lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            os.write(fd, data)
+    return write
+
+class _Progress:
+    def __init__(self, total: int, callback: Optional[ProgressCallback],
+                 meter: Optional[Callable[[int], None]] = None):
+        self.total = total
+        self.done = 0
+        self.callback = callback
+        self.meter = meter  # Sees every received byte count (throughput measurement)
+        self._lock = threading.Lock()
+
+    def add(self, count: int):
+        if self.meter is not None:
+            self.meter(count)
+        if self.callback is None:
+            return
+        with self._lock:
+            self.done += count
+            self.callback(self.done, self.total)
+
+class SegmentedDownloader:
+    """Downloads one URL over up to `connections` concurrent ranged requests"""
+
+    def __init__(self, session: Optional[requests.Session] = None, connections: int = DEFAULT_CONNECTIONS,
+                 segment_size: int = DEFAULT_SEGMENT_SIZE, min_segmented_size: int = MIN_SEGMENTED_SIZE,
+                 chunk_size: int = CHUNK_SIZE, timeout: float = 30.0, retry: Optional["RetryPolicy"] = None,
+                 on_retry: Optional[Callable[[BaseException, int, float], None]] = None,
+                 mirror: Optional[str] = None):
+        self.session = session or create_session(connections)
+        # LAN mirror tried before upstream; None reads $ROADTRIP_MODEL_MIRROR, "" disables it
+        self.mirror = (os.environ.get(MIRROR_ENV) if mirror is None else mirror) or None
+        # Failed transfers are retried per `retry` (default: no retries); each attempt resumes the .part
+        self.retry = retry or NO_RETRY
+        self.on_retry = on_retry
+        self.connections = connections
+        self.segment_size = segment_size
+        self.min_segmented_size = min_segmented_size
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        # Digests the mirror announced but did not deliver; probes skip the mirror for these
+        self.mirror_mismatches: Set[str] = set()
+
+    def probe(self, url: str, cached: Optional[Dict] = None) -> RemoteFile:
+        """Size, Range support and validators for a URL (follows redirects)
+
+        With a `cached` MetadataCache entry the request is conditional; a 304
+        comes back as a RemoteFile built from the entry with not_modified set.
+        """
+        if self.mirror and not url.startswith(self.mirror):
+            remote = self._probe_mirror(url, cached)
+            if remote is not None:
+                return remote
+        conditional = _conditional_headers(cached)
+        response = self.session.head(url, headers=conditional, allow_redirects=True, timeout=self.timeout)
+        if response.status_code == 304:
+            return _not_modified(response.url, cached)
+        if response.ok and "content-length" in response.headers:
+            return RemoteFile(
+                url=response.url,
+                size=int(response.headers["content-length"]),
+                accepts_ranges=response.headers.get("accept-ranges", "").lower() == "bytes",
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified")
+            )
+        # Some servers reject HEAD; a one-byte ranged GET reports the total size
+        with self.session.get(url, headers={"Range": "bytes=0-0", **conditional}, stream=True,
+                              allow_redirects=True, timeout=self.timeout) as response:
+            if response.status_code == 304:
+                return _not_modified(response.url, cached)
+            response.raise_for_status()
+            content_range = response.headers.get("content-range", "")
+            if response.status_code == 206 and "/" in content_range and not content_range.endswith("*"):
+                size = int(content_range.rsplit("/", 1)[1])
+                accepts_ranges = True
+            else:
+                length = response.headers.get("content-length")
+                size = int(length) if length else None
+                accepts_ranges = False
+            return RemoteFile(response.url, size, accepts_ranges,
+                              response.headers.get("etag"), response.headers.get("last-modified"))
+
+    def _probe_mirror(self, url: str, cached: Optional[Dict] = None) -> Optional[RemoteFile]:
+        """The mirror's blob for `url`, or None if it is unreachable or doesn't have it yet
+
+        A miss asks the mirror to fetch the file in the background; this
+        client goes upstream meanwhile, and later clients get it at LAN speed.
+        """
+        try:
+            response = self.session.head(mirror_fetch_url(self.mirror, url), allow_redirects=True,
+                                         timeout=min(self.timeout, MIRROR_PROBE_TIMEOUT))
+        except requests.RequestException:
+            return None
+        if response.status_code != 200 or "content-length" not in response.headers:
+            return None
+        sha256 = response.headers.get("x-content-sha256")
+        if sha256 in self.mirror_mismatches:
+            return None
+        return RemoteFile(response.url, int(response.headers["content-length"]),
+                          response.headers.get("accept-ranges", "").lower() == "bytes",
+                          response.headers.get("etag"), response.headers.get("last-modified"),
+                          not_modified=bool(cached and sha256 and cached.get("sha256") == sha256),
+                          sha256=sha256)
+
+    def download(self, url: str, dest_path: Path, progress: Optional[ProgressCallback] = None,
+                 remote: Optional[RemoteFile] = None) -> "TransferResult":
+        """Download `url` to `dest_path` via a resumable `.part` file, retrying per self.retry"""
+        probed = [remote]
+
+        def attempt() -> TransferResult:
+            # Re-probe on retries: validators may have changed while we were failing
+            current = probed.pop() if probed and probed[0] is not None else self.probe(url)
+            transfer = self.prepare(current, dest_path, progress)
+            tasks = transfer.tasks()
+            errors = []
+            if tasks:
+                with ThreadPoolExecutor(max_workers=min(self.connections, len(tasks)),
+                                        thread_name_prefix="segment") as pool:
+                    futures = [pool.submit(task) for task in tasks]
+                    errors = [future.exception() for future in futures]
+            return transfer.finish(next((error for error in errors if error is not None), None))
+
+        try:
+            return run_with_retry(attempt, self.retry, PartialDownload(dest_path).saved_bytes, self.on_retry)
+        except MirrorMismatch:
+            # Even without retries: the digest is now in mirror_mismatches, so this goes upstream
+            return self.download(url, dest_path, progress)
+
+    def prepare(self, remote: RemoteFile, dest_path: Path,
+                progress: Optional[ProgressCallback] = None) -> "FileTransfer":
+        """Set up a transfer whose tasks can be run on any thread pool (see ModelFetchScheduler)"""
+        return FileTransfer(self, remote, Path(dest_path), progress)
+
+class FileTransfer:
+    """One file's download split into independent tasks (one per range)
+
+    tasks() returns callables that each fetch one segment; they may run on a
+    shared pool interleaved with other files' tasks. finish() must be called
+    once all of them have run.
+    """
+
+    def __init__(self, downloader: SegmentedDownloader, remote: RemoteFile, dest_path: Path,
+                 progress: Optional[ProgressCallback] = None, meter: Optional[Callable[[int], None]] = None):
+        self.downloader = downloader
+        self.remote = remote
+        self.dest_path = dest_path
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        self.partial = PartialDownload(dest_path)
+        self.tracker = _Progress(remote.size or 0, progress)
+        self.ranged = remote.accepts_ranges and remote.size is not None
+        self.resumed = 0
+        self._fd: Optional[int] = None
+        self._digest = None
+        self._downloaded = 0
+
+        if not self.ranged:
+            # Without Range support there is nothing to resume from
+            self.partial.discard()
+            self._digest = hashlib.sha256()
+            self.tracker.meter = meter
+            self.pending: List[List[int]] = []
+            return
+
+        state = self.partial.load(remote)
+        if state is None:
+            segment_size = downloader.segment_size if remote.size >= downloader.min_segmented_size \
+                else max(1, remote.size)
+            state = self.partial.start(remote, split_ranges(remote.size, segment_size))
+        self.resumed = sum(segment[2] for segment in state["segments"])
+        self.tracker.add(self.resumed)
+        self.tracker.meter = meter  # Resumed bytes are not throughput
+        self.pending = [segment for segment in state["segments"] if segment[0] + segment[2] <= segment[1]]
+        self._fd = os.open(self.partial.part_path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+        self._write_at = _positioned_writer(self._fd)
+        self.frontier = _HashFrontier(self.partial.part_path, state["segments"], remote.size)
+
+    def tasks(self) -> List[Callable[[], None]]:
+        if not self.ranged:
+            return [self._download_single]
+        return [lambda segment=segment: self._download_range(segment) for segment in self.pending]
+
+    def _download_range(self, segment: List[int]):
+        """Fetch the unwritten tail of one [start, end, written] segment"""
+        downloader = self.downloader
+        start, end, written = segment
+        offset = start + written
+        headers = {"Range": f"bytes={offset}-{end}"}
+        validator = _if_range_validator(self.remote)
+        if validator:
+            # If the file changed upstream the server answers 200 with the full body
+            headers["If-Range"] = validator
+        with downloader.session.get(self.remote.url, headers=headers, stream=True,
+                                    timeout=downloader.timeout) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise UpstreamChanged(f"{self.remote.url} changed upstream "
+                                      f"(got {response.status_code} for a ranged request)")
+            for chunk in response.iter_content(downloader.chunk_size):
+                self._write_at(chunk, offset)
+                segment[2] = offset + len(chunk) - start
+                self.frontier.feed(offset, chunk)
+                offset += len(chunk)
+                self.tracker.add(len(chunk))
+                self.partial.checkpoint()
+        if offset != end + 1:
+            raise IncompleteTransfer(f"Short segment: got bytes {start}-{offset - 1}, expected {start}-{end}")
+
+    def _download_single(self):
+        downloader = self.downloader
+        with downloader.session.get(self.remote.url, stream=True, timeout=downloader.timeout) as response:
+            response.raise_for_status()
+            with open(self.partial.part_path, "wb") as f:
+                for chunk in response.iter_content(downloader.chunk_size):
+                    f.write(chunk)
+                    self._digest.update(chunk)
+                    self._downloaded += len(chunk)
+                    self.tracker.add(len(chunk))
+
+    def finish(self, error: Optional[BaseException] = None) -> "TransferResult":
+        """Close the part file; rename it into place, or re-raise the first task error"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            self.partial.checkpoint(force=True)
+        if isinstance(error, UpstreamChanged):
+            self.partial.discard()
+        if error is not None:
+            raise error
+
+        sha256 = self._digest.hexdigest() if not self.ranged else self.frontier.finish()
+        if self.remote.sha256 and sha256 != self.remote.sha256:
+            self.partial.discard()
+            self.downloader.mirror_mismatches.add(self.remote.sha256)
+            raise MirrorMismatch(f"{self.remote.url} hashed to {sha256[:12]}…, "
+                                 f"not the announced {self.remote.sha256[:12]}…")
+        if not self.ranged:
+            os.replace(self.partial.part_path, self.dest_path)
+            return TransferResult(self.remote, self._downloaded, 0, sha256)
+        os.replace(self.partial.part_path, self.dest_path)
+        self.partial.discard()
+        return TransferResult(self.remote, self.remote.size - self.resumed, self.resumed, sha256)
+
+@dataclass
+class TransferResult:
+    remote: RemoteFile
+    downloaded_bytes: int  # Fetched by this call
+    resumed_bytes: int     # Already present in the .part file from an earlier attempt
+    sha256: Optional[str] = None
+
+class AdaptiveConcurrency:
+    """Global cap on in-flight requests that follows measured throughput
+
+    Starts with `initial` slots. Every `window_s` the aggregate byte rate is
+    compared with the previous window: a gain of at least `min_gain` opens one
+    more slot (up to `maximum`), a drop of the same margin gives one back.
+    Once extra connections stop helping, the limit holds where it is.
+    """
+
+    def __init__(self, maximum: int, initial: int = 2, window_s: float = 1.0, min_gain: float = 0.10,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maximum = max(1, maximum)
+        self.limit = max(1, min(initial, self.maximum))
+        self.window_s = window_s
+        self.min_gain = min_gain
+        self.clock = clock
+        self.active = 0
+        self.peak = 0
+        self._condition = threading.Condition()
+        self._window_start = clock()
+        self._window_bytes = 0
+        self._previous_rate: Optional[float] = None
+
+    def acquire(self):
+        with self._condition:
+            while self.active >= self.limit:
+                self._condition.wait()
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+    def record(self, count: int):
+        """Account `count` received bytes; may adjust the limit at a window boundary"""
+        with self._condition:
+            self._window_bytes += count
+            now = self.clock()
+            elapsed = now - self._window_start
+            if elapsed < self.window_s:
+                return
+            rate = self._window_bytes / elapsed
+            previous = self._previous_rate
+            if previous is None or rate >= previous * (1 + self.min_gain):
+                if self.limit < self.maximum:
+                    self.limit += 1
+                    self._condition.notify()
+            elif rate <= previous * (1 - self.min_gain) and self.limit > 1:
+                self.limit -= 1
+            self._previous_rate = rate
+            self._window_start = now
+            self._window_bytes = 0
+
+@dataclass
+class FetchJob:
+    url: str
+    dest_path: Path
+    progress: Optional[ProgressCallback] = None
+
+@dataclass
+class FetchReport:
+    results: Dict[Path, TransferResult]
+    skipped: List[Path]                     # Already present with the remote size
+    failed: Dict[Path, BaseException]
+    completed: List[Path]                   # In the order the files finished
+    peak_connections: int = 0
+
+class ModelFetchScheduler:
+    """Fetches many files at once through one downloader (and its pooled session)
+
+    All files are probed concurrently, then every segment of every file goes
+    into one schedule under a single AdaptiveConcurrency limit. The largest
+    shards are started first so they do not form a long tail. Small files
+    (configs, tokenizer, index) get a lane of their own: whenever none of them
+    is in flight and one is waiting, the next free slot takes it, so they
+    finish early instead of queueing behind gigabytes of shard ranges.
+    """
+
+    def __init__(self, downloader: SegmentedDownloader, max_connections: Optional[int] = None,
+                 initial_connections: int = 2, window_s: float = 1.0, cache: Optional["MetadataCache"] = None):
+        self.downloader = downloader
+        self.cache = cache
+        self.max_connections = max_connections or downloader.connections
+        self.initial_connections = initial_connections
+        self.window_s = window_s
+
+    def fetch(self, jobs: List[FetchJob]) -> FetchReport:
+        """Fetch every job; retryable failures are retried per downloader.retry, resuming .part files"""
+        policy = self.downloader.retry
+        report = self._fetch_round(jobs)
+        failures: Dict[Path, int] = {}
+        saved = {Path(job.dest_path): 0 for job in jobs}
+        while True:
+            retry = []
+            for job in jobs:
+                dest_path = Path(job.dest_path)
+                error = report.failed.get(dest_path)
+                if error is None or not is_retryable(error):
+                    continue
+                now_saved = PartialDownload(dest_path).saved_bytes()
+                progressed = now_saved > saved[dest_path] and not isinstance(error, UpstreamChanged)
+                saved[dest_path] = now_saved
+                failures[dest_path] = 1 if progressed else failures.get(dest_path, 0) + 1
+                if failures[dest_path] < policy.max_attempts:
+                    retry.append(job)
+            if not retry:
+                return report
+            delay = max(policy.delay(failures[Path(job.dest_path)], report.failed[Path(job.dest_path)])
+                        for job in retry)
+            if self.downloader.on_retry:
+                for job in retry:
+                    dest_path = Path(job.dest_path)
+                    self.downloader.on_retry(report.failed[dest_path], failures[dest_path], delay)
+            time.sleep(delay)
+            for job in retry:
+                del report.failed[Path(job.dest_path)]
+            round_report = self._fetch_round(retry)
+            report.results.update(round_report.results)
+            report.skipped.extend(round_report.skipped)
+            report.completed.extend(round_report.completed)
+            report.failed.update(round_report.failed)
+            report.peak_connections = max(report.peak_connections, round_report.peak_connections)
+
+    def _fetch_round(self, jobs: List[FetchJob]) -> FetchReport:
+        report = FetchReport({}, [], {}, [])
+        if not jobs:
+            return report
+        limiter = AdaptiveConcurrency(self.max_connections, self.initial_connections, self.window_s)
+        small_size = self.downloader.min_segmented_size
+
+        transfers = []
+        for job, remote in zip(jobs, self._probe_jobs(jobs, report)):
+            if remote is None:
+                continue
+            dest_path = Path(job.dest_path)
+            cached = self.cache.get(dest_path) if self.cache else None
+            if remote.not_modified or (cached and remote.etag and cached.get("etag") == remote.etag
+                                       and cached["size"] == remote.size):
+                report.skipped.append(dest_path)
+                continue
+            if cached is None and dest_path.exists() and remote.size is not None and \
+                    dest_path.stat().st_size == remote.size:
+                # No validators on record yet: trust the size once and remember them
+                report.skipped.append(dest_path)
+                if self.cache:
+                    self.cache.record(dest_path, remote)
+                continue
+            try:
+                transfers.append(FileTransfer(self.downloader, remote, dest_path, job.progress, limiter.record))
+            except (OSError, ValueError) as error:
+                report.failed[dest_path] = error
+
+        # Largest files first; small files go to their own queue, smallest first
+        transfers.sort(key=lambda transfer: transfer.remote.size or 0, reverse=True)
+        large = [(transfer, task) for transfer in transfers
+                 if (transfer.remote.size or 0) >= small_size for task in transfer.tasks()]
+        small = [(transfer, task) for transfer in reversed(transfers)
+                 if (transfer.remote.size or 0) < small_size for task in transfer.tasks()]
+        remaining = {id(transfer): len(transfer.tasks()) for transfer in transfers}
+        errors: Dict[int, BaseException] = {}
+        lock = threading.Lock()
+        small_active = [0]
+
+        for transfer in transfers:
+            if remaining[id(transfer)] == 0:
+                self._finish(transfer, None, report, lock)
+
+        def next_task():
+            with lock:
+                if small and (small_active[0] == 0 or not large):
+                    small_active[0] += 1
+                    return small.pop(0), True
+                if large:
+                    return large.pop(0), False
+                return None, False
+
+        def worker():
+            while True:
+                limiter.acquire()
+                item, is_small = next_task()
+                if item is None:
+                    limiter.release()
+                    return
+                transfer, task = item
+                error = None
+                try:
+                    task()
+                except BaseException as exc:
+                    error = exc
+                finally:
+                    limiter.release()
+                with lock:
+                    if is_small:
+                        small_active[0] -= 1
+                    if error is not None:
+                        errors.setdefault(id(transfer), error)
+                    remaining[id(transfer)] -= 1
+                    done = remaining[id(transfer)] == 0
+                if done:
+                    self._finish(transfer, errors.get(id(transfer)), report, lock)
+
+        task_count = len(large) + len(small)
+        if task_count:
+            with ThreadPoolExecutor(max_workers=min(self.max_connections, task_count),
+                                    thread_name_prefix="fetch") as pool:
+                for future in [pool.submit(worker) for _ in range(min(self.max_connections, task_count))]:
+                    future.result()
+        report.peak_connections = limiter.peak
+        if self.cache:
+            self.cache.save()
+        return report
+
+    def probe_urls(self, urls: List[str]) -> List[Optional[RemoteFile]]:
+        """Concurrent probes; None where a URL could not be reached"""
+        report = FetchReport({}, [], {}, [])
+        return self._probe_jobs([FetchJob(url, Path(f"probe-{i}")) for i, url in enumerate(urls)], report)
+
+    def _probe_jobs(self, jobs: List[FetchJob], report: FetchReport) -> List[Optional[RemoteFile]]:
+        def probe(job: FetchJob) -> Optional[RemoteFile]:
+            try:
+                return self.downloader.probe(job.url, self.cache.get(job.dest_path) if self.cache else None)
+            except (requests.RequestException, IOError) as error:
+                report.failed[Path(job.dest_path)] = error
+                return None
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_connections, len(jobs))),
+                                thread_name_prefix="probe") as pool:
+            return list(pool.map(probe, jobs))
+
+    def _finish(self, transfer: FileTransfer, error: Optional[BaseException], report: FetchReport,
+                lock: threading.Lock):
+        try:
+            result = transfer.finish(error)
+        except BaseException as exc:
+            with lock:
+                report.failed[transfer.dest_path] = exc
+            return
+        with lock:
+            report.results[transfer.dest_path] = result
+            report.completed.append(transfer.dest_path)
+        if self.cache:
+            self.cache.record(transfer.dest_path, transfer.remote, result.sha256)
+
+class _HashFrontier:
+    """SHA-256 over a file whose byte ranges arrive out of order
+
+    Bytes at the frontier (the end of the hashed prefix) are hashed straight
+    from the network buffer. When the frontier reaches data that another
+    segment has already written, it catches up by reading that data back
+    while it is still in the page cache. No second pass over cold disk is
+    needed once the download finishes.
+    """
+
+    def __init__(self, path: Path, segments: List[List[int]], size: int):
+        self.digest = hashlib.sha256()
+        self.position = 0
+        self.size = size
+        self.segments = sorted(segments, key=lambda segment: segment[0])
+        self._starts = [segment[0] for segment in self.segments]
+        self._path = path
+        self._reader = None
+        self._buffer = bytearray(HASH_BLOCK_SIZE)
+        self._lock = threading.Lock()
+
+    def _written_end(self) -> int:
+        index = bisect.bisect_right(self._starts, self.position) - 1
+        start, _, written = self.segments[index]
+        return start + written
+
+    def _catch_up(self):
+        while self.position < self.size:
+            available = self._written_end() - self.position
+            if available <= 0:
+                return
+            if self._reader is None:
+                self._reader = open(self._path, "rb")
+            self._reader.seek(self.position)
+            view = memoryview(self._buffer)[:min(available, HASH_BLOCK_SIZE)]
+            count = self._reader.readinto(view)
+            if not count:
+                return
+            self.digest.update(view[:count])
+            self.position += count
+
+    def feed(self, offset: int, data: bytes):
+        """Called after `data` was written at `offset` and its segment progress updated"""
+        with self._lock:
+            if offset == self.position:
+                self.digest.update(data)
+                self.position += len(data)
+            self._catch_up()
+
+    def finish(self) -> str:
+        with self._lock:
+            self._catch_up()
+            if self._reader is not None:
+                self._reader.close()
+            if self.position != self.size:
+                raise IOError(f"Hashed {self.position} of {self.size} bytes")
+            return self.digest.hexdigest()
+
+def sha256_file(path: Path, block_size: int = HASH_BLOCK_SIZE) -> str:
+    """SHA-256 of a file using large reads into one reused buffer"""
+    digest = hashlib.sha256()
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.hexdigest()
+
+def sha256_files(paths: List[Path], max_workers: Optional[int] = None) -> Dict[Path, str]:
+    """Hash several files in parallel threads (hashlib releases the GIL on large updates)"""
+    paths = list(paths)
+    if not paths:
+        return {}
+    workers = max_workers or min(len(paths), os.cpu_count() or 4)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sha256") as pool:
+        return dict(zip(paths, pool.map(sha256_file, paths)))
+
+def _conditional_headers(cached: Optional[Dict]) -> Dict[str, str]:
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
+def _not_modified(url: str, cached: Dict) -> RemoteFile:
+    return RemoteFile(url, cached["size"], cached.get("accepts_ranges", True), cached.get("etag"),
+                      cached.get("last_modified"), not_modified=True)
+
+class MetadataCache:
+    """Persistent per-file stamps so unchanged files cost neither a download nor a re-hash
+
+    Each entry records the server's validators (ETag, Last-Modified) next to
+    the local size, mtime and SHA-256, keyed by absolute path. An entry is only
+    trusted while the file's size and mtime still match. Any local change
+    invalidates it, and a changed upstream file fails the conditional request.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if self.path.exists():
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except ValueError:
+                self._entries = {}  # Corrupt cache: start over, files get re-validated
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return os.path.abspath(path)
+
+    def get(self, path: Path) -> Optional[Dict]:
+        """The entry for `path` if the file on disk still matches its size and mtime"""
+        with self._lock:
+            entry = self._entries.get(self._key(path))
+        if entry is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if st.st_size != entry["size"] or st.st_mtime_ns != entry["mtime_ns"]:
+            return None
+        return entry
+
+    def sha256(self, path: Path) -> Optional[str]:
+        entry = self.get(path)
+        return entry.get("sha256") if entry else None
+
+    def record(self, path: Path, remote: Optional[RemoteFile] = None, sha256: Optional[str] = None):
+        """Stamp `path` as it is now; keeps earlier validators/hash if the file is unchanged"""
+        st = os.stat(path)
+        entry = dict(self.get(path) or {})
+        entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+        if remote is not None:
+            entry.update(url=remote.url, etag=remote.etag, last_modified=remote.last_modified,
+                         accepts_ranges=remote.accepts_ranges)
+        if sha256:
+            entry["sha256"] = sha256
+        with self._lock:
+            self._entries[self._key(path)] = entry
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._entries, indent=1, sort_keys=True)
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(data)
+        os.replace(tmp_path, self.path)
+
+class IncompleteTransfer(IOError):
+    """The server closed a response before sending every byte it promised"""
+
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient network/server failures are retryable; auth, missing files and local I/O are not"""
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else None
+        return status is None or status in RETRYABLE_STATUS or status >= 500
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                          IncompleteTransfer, UpstreamChanged)):
+        return True
+    # Other OSErrors (disk full, permissions) and programming errors won't fix themselves
+    return False
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        when = email.utils.parsedate_to_datetime(value)
+        return max(0.0, when.timestamp() - time.time()) if when else None
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter
+
+    Attempt n waits uniform(0, min(max_delay, base_delay * multiplier**n)),
+    or the server's Retry-After when it sends one. `max_attempts` counts
+    consecutive failures that made no progress. An attempt that added bytes to
+    the .part file resets the count, because the next one resumes from there.
+    """
+    max_attempts: int = 6
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    multiplier: float = 2.0
+    rng: random.Random = field(default_factory=random.Random, repr=False)
+
+    def delay(self, failures: int, error: Optional[BaseException] = None) -> float:
+        retry_after = _retry_after(error) if error is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * self.multiplier ** (failures - 1)))
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+def run_with_retry(attempt: Callable[[], T], policy: RetryPolicy, progress_marker: Callable[[], int] = lambda: 0,
+                   on_retry: Optional[Callable[[BaseException, int, float], None]] = None,
+                   sleep: Callable[[float], None] = time.sleep) -> T:
+    """Call `attempt` until it succeeds, a fatal error occurs or retries run out
+
+    `progress_marker` returns a number that grows when work survives a failed
+    attempt (e.g. bytes in the .part file). on_retry(error, failures, delay)
+    is called before each wait.
+    """
+    failures = 0
+    while True:
+        before = progress_marker()
+        try:
+            return attempt()
+        except Exception as error:
+            if not is_retryable(error):
+                raise
+            made_progress = progress_marker() > before and not isinstance(error, UpstreamChanged)
+            failures = 1 if made_progress else failures + 1
+            if failures >= policy.max_attempts:
+                raise
+            delay = policy.delay(failures, error)
+            if on_retry:
+                on_retry(error, failures, delay)
+            sleep(delay)
+
+class UpstreamChanged(IOError):
+    """The remote file no longer matches the partial download's validators"""
+
+class MirrorMismatch(UpstreamChanged):
+    """A mirror's bytes don't hash to the digest it announced for them"""
+
+def _if_range_validator(remote: RemoteFile) -> Optional[str]:
+    # If-Range needs a strong ETag; fall back to Last-Modified for weak ones
+    if remote.etag and not remote.etag.startswith("W/"):
+        return remote.etag
+    return remote.last_modified
+
+class PartialDownload:
+    """`<dest>.part` plus a `<dest>.part.json` sidecar recording progress per segment
+
+    The sidecar holds the URL, size and validators (ETag/Last-Modified) the
+    part was started with and a [start, end, bytes_written] entry per
+    segment. It is rewritten at most every CHECKPOINT_BYTES of progress, so
+    after a crash at most that much per segment is fetched again.
+    """
+
+    CHECKPOINT_BYTES = 8 * MB
+
+    def __init__(self, dest_path: Path):
+        self.dest_path = Path(dest_path)
+        self.part_path = self.dest_path.with_name(self.dest_path.name + ".part")
+        self.state_path = self.dest_path.with_name(self.dest_path.name + ".part.json")
+        self.state: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._last_saved = 0
+
+    def load(self, remote: RemoteFile) -> Optional[Dict]:
+        """Previous state if it is still valid for `remote`, else None (stale parts are removed)"""
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            self.discard()
+            return None
+        unchanged = (state.get("size") == remote.size and
+                     (not remote.etag or state.get("etag") == remote.etag) and
+                     (not remote.last_modified or state.get("last_modified") == remote.last_modified))
+        if not unchanged or not self.part_path.exists() or self.part_path.stat().st_size != remote.size:
+            self.discard()
+            return None
+        self.state = state
+        self._last_saved = self._written()
+        return state
+
+    def start(self, remote: RemoteFile, ranges: List[Tuple[int, int]]) -> Dict:
+        """Create a preallocated part file and fresh state"""
+        fd = os.open(self.part_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            # Reserve real blocks where supported so segments can land anywhere
+            if hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(fd, 0, remote.size)
+                except OSError:
+                    os.ftruncate(fd, remote.size)
+            else:
+                os.ftruncate(fd, remote.size)
+        finally:
+            os.close(fd)
+        self.state = {"url": remote.url, "size": remote.size, "etag": remote.etag,
+                      "last_modified": remote.last_modified,
+                      "segments": [[start, end, 0] for start, end in ranges]}
+        self._last_saved = 0
+        self.checkpoint(force=True)
+        return self.state
+
+    def _written(self) -> int:
+        return sum(segment[2] for segment in self.state["segments"])
+
+    def saved_bytes(self) -> int:
+        """Bytes a resumed download would not need to fetch again (per the sidecar)"""
+        try:
+            with open(self.state_path) as f:
+                return sum(segment[2] for segment in json.load(f)["segments"])
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def checkpoint(self, force: bool = False):
+        if self.state is None:
+            return
+        with self._lock:
+            written = self._written()
+            if not force and written - self._last_saved < self.CHECKPOINT_BYTES:
+                return
+            tmp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self.state, f)
+            os.replace(tmp_path, self.state_path)
+            self._last_saved = written
+
+    def discard(self):
+        self.state = None
+        for path in (self.part_path, self.state_path):
+            path.unlink(missing_ok=True)
+
+# ----------------------------------------------------------------------------
+# Local stand-in server
+
+class RangeRequestHandler(BaseHTTPRequestHandler):
+    """Serves files under `root` with HEAD, single-range GET, ETag and Last-Modified
+
+    `bytes_per_second` throttles each connection, mimicking a CDN that caps
+    per-connection throughput. `abort_after_bytes` drops every connection once
+    the server has sent that many bytes in total, simulating a network outage.
+    For retry tests, `fail_first_requests` answers the first GETs with 503 and
+    `drop_response_after` cuts every response short after that many bytes.
+    """
+    protocol_version = "HTTP/1.1"
+    root: Path = Path(".")
+    bytes_per_second: Optional[float] = None
+    abort_after_bytes: Optional[int] = None
+    fail_first_requests: int = 0
+    drop_response_after: Optional[int] = None
+    stats: Dict[str, int] = {}
+    stats_lock = threading.Lock()
+
+    def _resolve(self) -> Optional[Path]:
+        relative = self.path.split("?", 1)[0].lstrip("/")
+        path = (self.root / relative).resolve()
+        if self.root.resolve() not in path.parents or not path.is_file():
+            return None
+        return path
+
+    def _headers_for(self, path: Path) -> Dict[str, str]:
+        stat = path.stat()
+        return {
+            "Accept-Ranges": "bytes",
+            "ETag": f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"',
+            "Last-Modified": email.utils.formatdate(stat.st_mtime, usegmt=True),
+            "Content-Type": "application/octet-stream"
+        }
+
+    def _not_modified(self, path: Path) -> bool:
+        """Answer 304 if the client's If-None-Match / If-Modified-Since still match"""
+        headers = self._headers_for(path)
+        etag = self.headers.get("If-None-Match")
+        since = self.headers.get("If-Modified-Since")
+        if etag is None and since is None:
+            return False
+        if (etag is not None and etag != headers["ETag"]) or \
+                (etag is None and since != headers["Last-Modified"]):
+            return False
+        with self.stats_lock:
+            self.stats["not_modified"] = self.stats.get("not_modified", 0) + 1
+        self.send_response(304)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        return True
+
+    def do_HEAD(self):
+        path = self._resolve()
+        if path is None:
+            self.send_error(404)
+            return
+        if self._not_modified(path):
+            return
+        self.send_response(200)
+        for name, value in self._headers_for(path).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(path.stat().st_size))
+        self.end_headers()
+
+    def do_GET(self):
+        path = self._resolve()
+        if path is None:
+            self.send_error(404)
+            return
+        if self._not_modified(path):
+            return
+        with self.stats_lock:
+            self.stats["gets"] = self.stats.get("gets", 0) + 1
+            unavailable = self.stats["gets"] <= self.fail_first_requests
+        if unavailable:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        size = path.stat().st_size
+        start, end = 0, size - 1
+        status = 200
+        range_header = self.headers.get("Range")
+        if range_header and range_header.startswith("bytes=") and "," not in range_header:
+            first, _, last = range_header[6:].partition("-")
+            if first:
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+            else:
+                start = max(0, size - int(last))
+            if start >= size or start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            status = 206
+            # If-Range: only honour the range while the client's validator still matches
+            validator = self.headers.get("If-Range")
+            if validator and validator not in (self._headers_for(path)["ETag"],
+                                               self._headers_for(path)["Last-Modified"]):
+                start, end, status = 0, size - 1, 200
+
+        with self.stats_lock:
+            self.stats["requests"] = self.stats.get("requests", 0) + 1
+            self.stats["active"] = self.stats.get("active", 0) + 1
+            self.stats["peak"] = max(self.stats.get("peak", 0), self.stats["active"])
+        try:
+            self.send_response(status)
+            for name, value in self._headers_for(path).items():
+                self.send_header(name, value)
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            self._send_body(path, start, end)
+        except ConnectionError:
+            self.close_connection = True
+        finally:
+            with self.stats_lock:
+                self.stats["active"] -= 1
+
+    def _send_body(self, path: Path, start: int, end: int):
+        remaining = end - start + 1
+        block = 256 * 1024
+        began = time.perf_counter()
+        sent = 0
+        with open(path, "rb") as f:
+            f.seek(start)
+            while remaining > 0:
+                data = f.read(min(block, remaining))
+                if not data:
+                    break
+                with self.stats_lock:
+                    total = self.stats.get("bytes_sent", 0)
+                    if self.abort_after_bytes is not None and total >= self.abort_after_bytes:
+                        self.close_connection = True
+                        raise ConnectionAbortedError("Simulated network outage")
+                    self.stats["bytes_sent"] = total + len(data)
+                if self.drop_response_after is not None and sent >= self.drop_response_after:
+                    self.close_connection = True
+                    raise ConnectionAbortedError("Simulated dropped connection")
+                self.wfile.write(data)
+                remaining -= len(data)
+                sent += len(data)
+                if self.bytes_per_second:
+                    ahead = sent / self.bytes_per_second - (time.perf_counter() - began)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_range_server(root: Path, bytes_per_second: Optional[float] = None,
+                       abort_after_bytes: Optional[int] = None, host: str = "127.0.0.1",
+                       port: int = 0, fail_first_requests: int = 0,
+                       drop_response_after: Optional[int] = None) -> Tuple[ThreadingHTTPServer, Dict[str, int]]:
+    """Serve `root` on a background thread; returns (server, request stats)"""
+    stats: Dict[str, int] = {}
+    handler = type("StandInHandler", (RangeRequestHandler,),
+                   {"root": Path(root), "bytes_per_second": bytes_per_second,
+                    "abort_after_bytes": abort_after_bytes, "fail_first_requests": fail_first_requests,
+                    "drop_response_after": drop_response_after, "stats": stats})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+def self_test(size_mb: int = 48, throttle_mb_s: float = 16.0, connections: int = 6) -> bool:
+    """Exercise the engine against throttled and failing stand-in servers"""
+    checks: List[Tuple[str, bool]] = []
+    timings = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "served"
+        root.mkdir()
+        source = root / "model-00001-of-00001.safetensors"
+        source.write_bytes(os.urandom(size_mb * MB))
+        (root / "config.json").write_text('{"model_type": "gemma"}')
+        expected = sha256_file(source)
+
+        server, stats = start_range_server(root, bytes_per_second=throttle_mb_s * MB)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            for label, count in (("single", 1), ("segmented", connections)):
+                downloader = SegmentedDownloader(connections=count, segment_size=4 * MB,
+                                                 min_segmented_size=8 * MB if count > 1 else 1 << 62)
+                dest = Path(tmp) / label / source.name
+                stats["peak"] = 0
+                start = time.perf_counter()
+                result = downloader.download(f"{base_url}/{source.name}", dest)
+                timings[label] = time.perf_counter() - start
+                checks.append((f"{label} download matches source", sha256_file(dest) == expected))
+                checks.append((f"{label} inline SHA-256 matches", result.sha256 == expected))
+            checks.append((f"peak connections {stats['peak']} <= {connections}", stats["peak"] <= connections))
+            speedup = timings["single"] / timings["segmented"]
+            checks.append((f"segmented is {speedup:.1f}x faster than one connection", speedup > 2))
+
+            small = Path(tmp) / "small" / "config.json"
+            SegmentedDownloader().download(f"{base_url}/config.json", small)
+            checks.append(("small file downloads intact", small.read_text() == '{"model_type": "gemma"}'))
+
+            # Several shards plus small files through one scheduler and session
+            names = [f"multi/model-0000{i}-of-00003.safetensors" for i in range(1, 4)]
+            small_names = ["multi/config.json", "multi/tokenizer_config.json", "multi/generation_config.json"]
+            (root / "multi").mkdir()
+            for i, name in enumerate(names):
+                (root / name).write_bytes(os.urandom((size_mb // 3 - 1 + i) * MB))
+            for name in small_names:
+                (root / name).write_text(json.dumps({"name": name}))
+            scheduler = ModelFetchScheduler(SegmentedDownloader(connections=connections, segment_size=4 * MB,
+                                                                min_segmented_size=8 * MB), window_s=0.2)
+            jobs = [FetchJob(f"{base_url}/{name}", Path(tmp) / "fetched" / name) for name in names + small_names]
+            stats["peak"] = 0
+            start = time.perf_counter()
+            report = scheduler.fetch(jobs)
+            timings["multi-file"] = time.perf_counter() - start
+            checks.append(("all files fetched intact", not report.failed and all(
+                report.results[job.dest_path].sha256 == sha256_file(root / name)
+                for job, name in zip(jobs, names + small_names))))
+            checks.append((f"global limit held ({stats['peak']} server connections <= {connections})",
+                           stats["peak"] <= connections))
+            checks.append((f"concurrency grew with throughput (peak {report.peak_connections})",
+                           report.peak_connections > scheduler.initial_connections))
+            first_large = min(report.completed.index(job.dest_path) for job in jobs[:len(names)])
+            checks.append(("small files finish before any shard",
+                           all(report.completed.index(job.dest_path) < first_large for job in jobs[len(names):])))
+            checks.append(("second run skips complete files",
+                           len(scheduler.fetch(jobs).skipped) == len(jobs)))
+
+            # Cached validators: a no-op run is conditional HEADs only, no bodies, no hashing
+            cache = MetadataCache(Path(tmp) / "cache" / "metadata.json")
+            scheduler.cache = cache
+            jobs = [FetchJob(job.url, Path(tmp) / "cached" / job.dest_path.name) for job in jobs]
+            scheduler.fetch(jobs)
+            cache = MetadataCache(cache.path)  # As a fresh process would load it
+            scheduler.cache = cache
+            stats["not_modified"] = 0
+            sent_before = stats.get("bytes_sent", 0)
+            start = time.perf_counter()
+            report = scheduler.fetch(jobs)
+            checksums = [cache.sha256(job.dest_path) for job in jobs]
+            noop_s = time.perf_counter() - start
+            checks.append((f"no-op run took {noop_s * 1000:.0f}ms with {stats['not_modified']} 304s",
+                           noop_s < 1.0 and stats["not_modified"] == len(jobs) and len(report.skipped) == len(jobs)
+                           and stats.get("bytes_sent", 0) == sent_before))
+            checks.append(("cached SHA-256s match the files",
+                           checksums == [sha256_file(root / name) for name in names + small_names]))
+            (root / small_names[0]).write_text(json.dumps({"name": "changed upstream"}))
+            report = scheduler.fetch(jobs)
+            checks.append(("only the file changed upstream is re-fetched",
+                           report.completed == [jobs[len(names)].dest_path] and
+                           cache.sha256(jobs[len(names)].dest_path) == sha256_file(root / small_names[0])))
+        finally:
+            server.shutdown()
+
+        # Interrupt at ~60%, then resume against a healthy server
+        dest = Path(tmp) / "resumed" / source.name
+        downloader = SegmentedDownloader(connections=connections, segment_size=4 * MB, min_segmented_size=8 * MB)
+        server, stats = start_range_server(root, abort_after_bytes=int(size_mb * MB * 0.6))
+        try:
+            downloader.download(f"http://127.0.0.1:{server.server_address[1]}/{source.name}", dest)
+            checks.append(("outage interrupts the download", False))
+        except (requests.RequestException, IOError):
+            partial = PartialDownload(dest)
+            checks.append(("outage leaves .part and sidecar", partial.part_path.exists() and
+                           partial.state_path.exists() and not dest.exists()))
+        finally:
+            server.shutdown()
+        server, stats = start_range_server(root)
+        try:
+            result = downloader.download(f"http://127.0.0.1:{server.server_address[1]}/{source.name}", dest)
+        finally:
+            server.shutdown()
+        checks.append((f"resume fetched only {result.downloaded_bytes / MB:.1f} MB of {size_mb} MB",
+                       result.resumed_bytes > 0 and result.downloaded_bytes + result.resumed_bytes == size_mb * MB
+                       and stats.get("bytes_sent", 0) <= size_mb * MB * 0.5))
+        checks.append(("resumed file matches source", sha256_file(dest) == expected))
+        checks.append(("resumed inline SHA-256 covers the earlier bytes", result.sha256 == expected))
+
+        # Interrupt, change the file upstream, and make sure nothing stale is reused
+        dest = Path(tmp) / "changed" / source.name
+        server, _ = start_range_server(root, abort_after_bytes=int(size_mb * MB * 0.5))
+        try:
+            downloader.download(f"http://127.0.0.1:{server.server_address[1]}/{source.name}", dest)
+        except (requests.RequestException, IOError):
+            pass
+        finally:
+            server.shutdown()
+        source.write_bytes(os.urandom(size_mb * MB))
+        server, _ = start_range_server(root)
+        try:
+            result = downloader.download(f"http://127.0.0.1:{server.server_address[1]}/{source.name}", dest)
+        finally:
+            server.shutdown()
+        checks.append(("upstream change restarts from zero",
+                       result.resumed_bytes == 0 and sha256_file(dest) == sha256_file(source)))
+
+        # Retries: 503s, connections cut every few MB, and a fatal 404
+        retry = RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.05)
+        attempts = []
+        downloader = SegmentedDownloader(connections=connections, segment_size=4 * MB, min_segmented_size=8 * MB,
+                                         retry=retry, on_retry=lambda error, failures, delay: attempts.append(error))
+        source.write_bytes(os.urandom(size_mb * MB))
+        server, stats = start_range_server(root, fail_first_requests=2, drop_response_after=1 * MB)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            dest = Path(tmp) / "retried" / source.name
+            result = downloader.download(f"{base_url}/{source.name}", dest)
+            checks.append((f"flaky server: complete after {len(attempts)} resumed retries",
+                           sha256_file(dest) == sha256_file(source) and result.sha256 == sha256_file(source)
+                           and len(attempts) > retry.max_attempts))
+            attempts.clear()
+            try:
+                downloader.download(f"{base_url}/missing.safetensors", Path(tmp) / "retried" / "missing")
+                checks.append(("404 is fatal", False))
+            except requests.HTTPError as error:
+                checks.append(("404 fails at once without retries",
+                               error.response.status_code == 404 and not attempts))
+            report = ModelFetchScheduler(downloader).fetch(
+                [FetchJob(f"{base_url}/{name}", Path(tmp) / "retried-multi" / name) for name in names])
+            checks.append(("scheduler retries and resumes interrupted shards",
+                           not report.failed and len(report.completed) == len(names)))
+        finally:
+            server.shutdown()
+        checks.append(("backoff grows and stays capped",
+                       all(0 <= retry.delay(n) <= min(retry.max_delay, retry.base_delay * 2 ** (n - 1))
+                           for n in range(1, 10))))
+
+    print(f"🔁 TRANSFER ENGINE SELF-TEST ({size_mb} MB at {throttle_mb_s:g} MB/s per connection)")
+    for label, seconds in timings.items():
+        print(f"   {label:<10} {seconds:6.2f}s  ({size_mb / seconds:6.1f} MB/s)")
+    for label, ok in checks:
+        print(f"   {'✅' if ok else '❌'} {label}")
+    return all(ok for _, ok in checks)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Model download transfer engine")
+    parser.add_argument("url", nargs="?", help="URL to download")
+    parser.add_argument("dest", nargs="?", type=Path, help="Destination file")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS)
+    parser.add_argument("--segment-mb", type=int, default=DEFAULT_SEGMENT_SIZE // MB)
+    parser.add_argument("--self-test", action="store_true", help="Run against a local stand-in Range server")
+    args = parser.parse_args(argv)
+
+    if args.self_test:
+        return 0 if self_test() else 1
+    if not args.url or not args.dest:
+        parser.print_help()
+        return 1
+
+    downloader = SegmentedDownloader(connections=args.connections, segment_size=args.segment_mb * MB)
+    start = time.perf_counter()
+    result = downloader.download(args.url, args.dest,
+                                 lambda done, total: print(f"\r  Progress: {done / total * 100:.1f}%",
+                                                           end="", flush=True) if total else None)
+    elapsed = time.perf_counter() - start
+    resumed = f", {result.resumed_bytes / MB:.1f} MB resumed" if result.resumed_bytes else ""
+    print(f"\n  ✓ {args.dest} ({result.downloaded_bytes / MB:.1f} MB in {elapsed:.1f}s{resumed})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,10 +6,27 @@ Downloads Kokoro TTS model for premium voice synthesis features
 
 import os
 import sys
-import requests
 from pathlib import Path
 from typing import Optional
 
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from transfer_engine import RetryPolicy, SegmentedDownloader
+
+# Backs off on 5xx/timeouts/dropped connections and resumes from the .part file;
+# 401/404 fail straight away
+_downloader: Optional[SegmentedDownloader] = None
+
+def _get_downloader() -> SegmentedDownloader:
+    global _downloader
+    if _downloader is None:
+        _downloader = SegmentedDownloader(
+            retry=RetryPolicy(),
+            on_retry=lambda error, failures, delay: print(
+                f"\n   ↻ {error} - retry {failures} in {delay:.1f}s", flush=True))
+    return _downloader
+
 def download_kokoro_tts_models(output_dir: str = "models/kokoro"):
     """
     Download Kokoro TTS models for premium voice synthesis
@@ -86,23 +103,13 @@ def download_kokoro_tts_models(output_dir: str = "models/kokoro"):
 
 def download_file(url: str, output_path: str) -> bool:
     """Download a file with progress indication"""
+    def show_progress(downloaded: int, total_size: int):
+        if total_size > 0:
+            progress = (downloaded / total_size) * 100
+            print(f"\r   Progress: {progress:.1f}%", end='', flush=True)
+
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        total_size = int(response.headers.get('content-length', 0))
-        
-        with open(output_path, 'wb') as f:
-            downloaded = 0
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded += len(chunk)
-                    
-                    if total_size > 0:
-                        progress = (downloaded / total_size) * 100
-                        print(f"\r   Progress: {progress:.1f}%", end='', flush=True)
-        
+        _get_downloader().download(url, Path(output_path), show_progress)
         print()  # New line after progress
         return True
         
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+
+"""
+Synthetic Nationwide POI Dataset Generator
+
+Produces seeded, realistic-looking POI datasets at production scale so that
+indexes, merges and caches can be exercised with millions of records instead
+of the handful of fixtures in the demo scripts.
+
+Features:
+- Urban/rural density clustering around real US metro areas plus small towns
+- Category mixes based on the backend poi_categories taxonomy
+- Near-duplicate pairs across sources (LLM vs Google Places) with name variants
+- Compact columnar on-disk format that loads with a handful of bulk reads
+
+Usage:
+    python3 scripts/generate_poi_dataset.py --count 2000000 --output pois.bin
+"""
+
+import sys
+import json
+import time
+import array
+import random
+import struct
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from poi_geo import CONUS_BOUNDS, haversine_miles, offset_coordinates
+from poi_categories import POI_CATEGORIES
+
+DATASET_MAGIC = b"POID"
+DATASET_VERSION = 1
+HEADER_FORMAT = "<4sHHII"
+
+SOURCES = ["llm", "api"]
+NO_DUPLICATE = -1
+
+# Weights are indexed like POI_CATEGORIES
+URBAN_CATEGORY_WEIGHTS = [30, 3, 6, 22, 12, 4, 10, 7, 3, 3]
+RURAL_CATEGORY_WEIGHTS = [12, 20, 8, 3, 2, 25, 10, 12, 2, 6]
+
+# (name, latitude, longitude, population in millions)
+METRO_AREAS = [
+    ("New York", 40.7128, -74.0060, 19.8), ("Los Angeles", 34.0522, -118.2437, 13.2),
+    ("Chicago", 41.8781, -87.6298, 9.5), ("Dallas", 32.7767, -96.7970, 7.6),
+    ("Houston", 29.7604, -95.3698, 7.1), ("Washington", 38.9072, -77.0369, 6.3),
+    ("Philadelphia", 39.9526, -75.1652, 6.2), ("Miami", 25.7617, -80.1918, 6.1),
+    ("Atlanta", 33.7490, -84.3880, 6.1), ("Boston", 42.3601, -71.0589, 4.9),
+    ("Phoenix", 33.4484, -112.0740, 4.8), ("San Francisco", 37.7749, -122.4194, 4.7),
+    ("Riverside", 33.9533, -117.3962, 4.6), ("Detroit", 42.3314, -83.0458, 4.3),
+    ("Seattle", 47.6062, -122.3321, 4.0), ("Minneapolis", 44.9778, -93.2650, 3.7),
+    ("San Diego", 32.7157, -117.1611, 3.3), ("Tampa", 27.9506, -82.4572, 3.2),
+    ("Denver", 39.7392, -104.9903, 3.0), ("St. Louis", 38.6270, -90.1994, 2.8),
+    ("Baltimore", 39.2904, -76.6122, 2.8), ("Charlotte", 35.2271, -80.8431, 2.7),
+    ("Orlando", 28.5383, -81.3792, 2.7), ("San Antonio", 29.4241, -98.4936, 2.6),
+    ("Portland", 45.5152, -122.6784, 2.5), ("Sacramento", 38.5816, -121.4944, 2.4),
+    ("Pittsburgh", 40.4406, -79.9959, 2.4), ("Las Vegas", 36.1699, -115.1398, 2.3),
+    ("Austin", 30.2672, -97.7431, 2.3), ("Salt Lake City", 40.7608, -111.8910, 1.3),
+    ("Boise", 43.6150, -116.2023, 0.8), ("Albuquerque", 35.0844, -106.6504, 0.9)
+]
+
+NAME_PARTS = {
+    "restaurant": (["Golden", "Rustic", "Blue Door", "Riverside", "Corner", "Smokehouse", "Harvest", "Main Street"],
+                   ["Grill", "Diner", "Bistro", "Cafe", "Taqueria", "Kitchen", "Tavern", "Pizza Co."]),
+    "scenic_spot": (["Eagle", "Sunset", "Cascade", "Granite", "Pine", "Crystal", "Thunder", "Saint Helen"],
+                    ["Overlook", "Viewpoint", "Point", "Vista", "Falls", "Canyon Rim", "Bluff", "Lookout"]),
+    "historic_site": (["Old", "Pioneer", "Fort", "Union", "Mission", "Courthouse", "Founders", "Mount Vernon"],
+                      ["Mill", "Depot", "House", "Museum", "Battlefield", "Schoolhouse", "Lighthouse", "Square"]),
+    "shopping": (["Market", "Maple", "Westgate", "Harbor", "Village", "Trading Post", "Outlet", "Union"],
+                 ["Mall", "Marketplace", "Emporium", "Shops", "Antiques", "Books & Gifts", "General Store", "Center"]),
+    "entertainment": (["Grand", "Starlight", "Majestic", "Riverfront", "Odyssey", "Palace", "Liberty", "Royal"],
+                      ["Theater", "Arcade", "Playhouse", "Music Hall", "Cinema", "Bowl", "Arena", "Gallery"]),
+    "outdoor_recreation": (["Bear Creek", "Lost Lake", "Elk Ridge", "Mount Adams", "Willow", "Redwood", "Blue Lake", "Coyote"],
+                           ["Trail", "State Park", "Campground", "Trailhead", "Recreation Area", "Boat Launch", "Loop", "Preserve"]),
+    "accommodation": (["Pine Lodge", "Lakeside", "Mountain View", "Travelers", "Highway", "Cedar", "Aspen", "Harbor"],
+                      ["Inn", "Motel", "Resort & Cabins", "Lodge", "Suites", "B&B", "Hotel", "RV Park"]),
+    "gas_station": (["Mountain", "Quick", "Valley", "Junction", "Summit", "Frontier", "Crossroads", "Express"],
+                    ["Fuel", "Gas & Go", "Fuel Stop", "Travel Center", "Station", "Mart", "Truck Stop", "Pumps"]),
+    "emergency_services": (["County", "Valley", "Regional", "Saint Mary", "Memorial", "Community", "Mercy", "General"],
+                           ["Hospital", "Fire Station", "Urgent Care", "Sheriff Office", "Medical Center", "Ranger Station", "Clinic", "EMS"]),
+    "hidden_gem": (["Secret", "Hidden", "Whispering", "Painted", "Forgotten", "Little", "Moonlight", "Wild"],
+                   ["Hot Springs", "Grotto", "Orchard", "Art Barn", "Ghost Town", "Cave", "Meadow", "Roadside Oddity"])
+}
+
+NAME_VARIANTS = [
+    (" & ", " and "), (" and ", " & "), ("Saint ", "St. "), ("Mount ", "Mt. "),
+    (" Co.", " Company"), (" Center", " Ctr"), ("State Park", "SP"), ("B&B", "Bed and Breakfast")
+]
+
+@dataclass
+class DatasetConfig:
+    """Knobs for the synthetic dataset"""
+    count: int = 1_000_000
+    seed: int = 42
+    urban_fraction: float = 0.62
+    town_fraction: float = 0.23
+    duplicate_rate: float = 0.08
+    town_count: int = 2500
+
+class POIDataset:
+    """Columnar POI dataset loaded from (or about to be written to) disk
+
+    Coordinates are stored as integer microdegrees and ratings as tenths so
+    every column is a flat machine array.
+    """
+
+    def __init__(self, categories: List[str]):
+        self.categories = list(categories)
+        self.latitudes = array.array("i")
+        self.longitudes = array.array("i")
+        self.category_ids = array.array("B")
+        self.source_ids = array.array("B")
+        self.ratings = array.array("B")
+        self.price_levels = array.array("B")
+        self.duplicate_of = array.array("i")
+        self.name_offsets = array.array("I", [0])
+        self.names_blob = b""
+        self._pending_names: List[bytes] = []
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    def append(self, name: str, latitude: float, longitude: float, category_id: int,
+               source_id: int, rating: float, price_level: int, duplicate_of: int = NO_DUPLICATE):
+        """Append a record (used by the generator)"""
+        encoded = name.encode("utf-8")
+        self._pending_names.append(encoded)
+        self.name_offsets.append(self.name_offsets[-1] + len(encoded))
+        self.latitudes.append(int(round(latitude * 1e6)))
+        self.longitudes.append(int(round(longitude * 1e6)))
+        self.category_ids.append(category_id)
+        self.source_ids.append(source_id)
+        self.ratings.append(int(round(rating * 10)))
+        self.price_levels.append(price_level)
+        self.duplicate_of.append(duplicate_of)
+
+    def _flush_names(self):
+        if self._pending_names:
+            self.names_blob += b"".join(self._pending_names)
+            self._pending_names = []
+
+    def name(self, index: int) -> str:
+        self._flush_names()
+        return self.names_blob[self.name_offsets[index]:self.name_offsets[index + 1]].decode("utf-8")
+
+    def latitude(self, index: int) -> float:
+        return self.latitudes[index] / 1e6
+
+    def longitude(self, index: int) -> float:
+        return self.longitudes[index] / 1e6
+
+    def category(self, index: int) -> str:
+        return self.categories[self.category_ids[index]]
+
+    def source(self, index: int) -> str:
+        return SOURCES[self.source_ids[index]]
+
+    def rating(self, index: int) -> float:
+        return self.ratings[index] / 10
+
+    def to_poi_data(self, index: int, user_latitude: float, user_longitude: float):
+        """Materialize a record as the demo's POIData relative to a user position"""
+        from demo_dual_poi_search import POIData
+
+        latitude = self.latitude(index)
+        longitude = self.longitude(index)
+        rating = self.rating(index)
+        return POIData(
+            id=f"{self.source(index)}_{index}",
+            name=self.name(index),
+            description=f"{self.category(index).replace('_', ' ').title()} near {latitude:.3f}, {longitude:.3f}",
+            category=self.category(index),
+            latitude=latitude,
+            longitude=longitude,
+            distance_from_user=haversine_miles(user_latitude, user_longitude, latitude, longitude),
+            rating=rating,
+            could_earn_revenue=rating >= 4.0,
+            price_level=self.price_levels[index]
+        )
+
+    def _columns(self) -> List[array.array]:
+        return [self.latitudes, self.longitudes, self.category_ids, self.source_ids,
+                self.ratings, self.price_levels, self.duplicate_of, self.name_offsets]
+
+    def save(self, path: Path):
+        """Write the dataset in the compact columnar format"""
+        self._flush_names()
+        categories_json = json.dumps(self.categories).encode("utf-8")
+
+        with open(path, "wb") as f:
+            f.write(struct.pack(HEADER_FORMAT, DATASET_MAGIC, DATASET_VERSION, 0,
+                                len(self), len(categories_json)))
+            f.write(categories_json)
+            for column in self._columns():
+                if sys.byteorder != "little" and column.itemsize > 1:
+                    column = array.array(column.typecode, column)
+                    column.byteswap()
+                column.tofile(f)
+            f.write(self.names_blob)
+
+    @classmethod
+    def load(cls, path: Path) -> "POIDataset":
+        """Load a dataset written by save() using one bulk read per column"""
+        with open(path, "rb") as f:
+            data = f.read()
+
+        header_size = struct.calcsize(HEADER_FORMAT)
+        magic, version, _flags, count, categories_len = struct.unpack_from(HEADER_FORMAT, data, 0)
+        if magic != DATASET_MAGIC or version != DATASET_VERSION:
+            raise ValueError(f"{path} is not a POI dataset (version {DATASET_VERSION})")
+
+        offset = header_size + categories_len
+        dataset = cls(json.loads(data[header_size:offset]))
+        view = memoryview(data)
+
+        for column in dataset._columns():
+            length = count + 1 if column is dataset.name_offsets else count
+            del column[:]
+            nbytes = length * column.itemsize
+            column.frombytes(view[offset:offset + nbytes])
+            if sys.byteorder != "little" and column.itemsize > 1:
+                column.byteswap()
+            offset += nbytes
+
+        dataset.names_blob = bytes(view[offset:])
+        return dataset
+
+class POIDatasetGenerator:
+    """Seeded generator for nationwide synthetic POIs"""
+
+    def __init__(self, config: DatasetConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.towns = self._generate_towns()
+
+    def _generate_towns(self) -> List[Tuple[float, float]]:
+        south, west, north, east = CONUS_BOUNDS
+        return [(self.rng.uniform(south, north), self.rng.uniform(west, east))
+                for _ in range(self.config.town_count)]
+
+    def _pick_location(self) -> Tuple[float, float, bool]:
+        """Return (latitude, longitude, is_urban) following the density model"""
+        roll = self.rng.random()
+        if roll < self.config.urban_fraction:
+            metro = self.rng.choices(METRO_AREAS, weights=[m[3] for m in METRO_AREAS])[0]
+            # Metro spread grows with population; most POIs sit near the core
+            spread = 4.0 + 3.0 * metro[3] ** 0.5
+            lat, lon = offset_coordinates(metro[1], metro[2],
+                                          self.rng.gauss(0, spread), self.rng.gauss(0, spread))
+            return lat, lon, True
+        if roll < self.config.urban_fraction + self.config.town_fraction:
+            town_lat, town_lon = self.rng.choice(self.towns)
+            lat, lon = offset_coordinates(town_lat, town_lon,
+                                          self.rng.gauss(0, 1.5), self.rng.gauss(0, 1.5))
+            return lat, lon, False
+        south, west, north, east = CONUS_BOUNDS
+        return self.rng.uniform(south, north), self.rng.uniform(west, east), False
+
+    def _make_name(self, category: str) -> str:
+        prefixes, suffixes = NAME_PARTS[category]
+        return f"{self.rng.choice(prefixes)} {self.rng.choice(suffixes)}"
+
+    def _variant_name(self, name: str) -> str:
+        """Produce the kind of name drift seen between LLM and Places results"""
+        for old, new in self.rng.sample(NAME_VARIANTS, len(NAME_VARIANTS)):
+            if old in name:
+                return name.replace(old, new, 1)
+        roll = self.rng.random()
+        if roll < 0.4:
+            return name.upper() if self.rng.random() < 0.2 else name.lower()
+        if roll < 0.7:
+            return f"The {name}"
+        return f"{name} ({self.rng.choice(['Main', 'Downtown', 'North', 'Highway 26'])})"
+
+    def generate(self) -> POIDataset:
+        """Generate config.count records, including near-duplicate pairs"""
+        dataset = POIDataset(POI_CATEGORIES)
+        rng = self.rng
+        target = self.config.count
+
+        while len(dataset) < target:
+            latitude, longitude, is_urban = self._pick_location()
+            weights = URBAN_CATEGORY_WEIGHTS if is_urban else RURAL_CATEGORY_WEIGHTS
+            category_id = rng.choices(range(len(POI_CATEGORIES)), weights=weights)[0]
+            name = self._make_name(POI_CATEGORIES[category_id])
+            source_id = rng.randrange(len(SOURCES))
+            rating = min(5.0, max(1.0, rng.gauss(4.1, 0.45)))
+            price_level = rng.choices([1, 2, 3, 4], weights=[30, 45, 20, 5])[0]
+
+            base_index = len(dataset)
+            dataset.append(name, latitude, longitude, category_id, source_id, rating, price_level)
+
+            if len(dataset) < target and rng.random() < self.config.duplicate_rate:
+                # Same place reported by the other source: jittered ~10-60m, rating drift
+                dup_lat, dup_lon = offset_coordinates(latitude, longitude,
+                                                      rng.uniform(-0.03, 0.03), rng.uniform(-0.03, 0.03))
+                dataset.append(self._variant_name(name), dup_lat, dup_lon, category_id,
+                               1 - source_id, min(5.0, max(1.0, rating + rng.uniform(-0.3, 0.3))),
+                               price_level, duplicate_of=base_index)
+
+        return dataset
+
+def generate_dataset(count: int, seed: int = 42, output: Optional[Path] = None, **overrides) -> POIDataset:
+    """Convenience wrapper used by benchmark suites"""
+    config = DatasetConfig(count=count, seed=seed, **overrides)
+    dataset = POIDatasetGenerator(config).generate()
+    if output is not None:
+        dataset.save(Path(output))
+    return dataset
+
+def _poi_count(value: str) -> int:
+    count = int(value)
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {count}")
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic nationwide POI dataset")
+    parser.add_argument("--count", type=_poi_count, default=1_000_000, help="Number of POI records")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--duplicate-rate", type=float, default=0.08,
+                        help="Fraction of POIs that get a near-duplicate from the other source")
+    parser.add_argument("--urban-fraction", type=float, default=0.62,
+                        help="Fraction of POIs clustered around metro areas")
+    parser.add_argument("--output", type=Path, default=Path("poi_dataset.bin"), help="Output file")
+    args = parser.parse_args()
+
+    print(f"🗺️  Generating {args.count:,} POIs (seed={args.seed})...")
+    start = time.perf_counter()
+    dataset = generate_dataset(args.count, seed=args.seed, output=args.output,
+                               duplicate_rate=args.duplicate_rate, urban_fraction=args.urban_fraction)
+    elapsed = time.perf_counter() - start
+
+    duplicates = sum(1 for d in dataset.duplicate_of if d != NO_DUPLICATE)
+    size_mb = args.output.stat().st_size / (1024 * 1024)
+    print(f"   ✅ Generated in {elapsed:.1f}s ({duplicates:,} near-duplicate pairs)")
+    print(f"   💾 Saved to {args.output} ({size_mb:.1f} MB, {size_mb * 1024 * 1024 / len(dataset):.1f} bytes/POI)")
+
+    start = time.perf_counter()
+    POIDataset.load(args.output)
+    print(f"   ⚡ Reload time: {(time.perf_counter() - start) * 1000:.0f}ms")
+
+if __name__ == "__main__":
+    main()
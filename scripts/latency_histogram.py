@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+"""
+HDR-style latency histogram
+
+Log-linear buckets with a fixed number of significant digits, in the spirit
+of HdrHistogram: recording is O(1), memory is bounded regardless of sample
+count, and percentiles are accurate to the configured precision. Values are
+recorded in nanoseconds.
+"""
+
+import math
+from typing import Dict, Any, Iterator, List, Tuple
+
+class LatencyHistogram:
+    """Fixed-precision histogram for latency samples (nanoseconds)"""
+
+    def __init__(self, lowest_ns: int = 1_000, highest_ns: int = 3_600_000_000_000,
+                 significant_digits: int = 3):
+        if not 1 <= significant_digits <= 5:
+            raise ValueError("significant_digits must be between 1 and 5")
+        self.lowest_ns = lowest_ns
+        self.highest_ns = highest_ns
+        self.significant_digits = significant_digits
+
+        # Sub-buckets must resolve 1 part in 10^digits within each power of two
+        largest_single_unit = 2 * 10 ** significant_digits
+        self._sub_bucket_bits = max(1, math.ceil(math.log2(largest_single_unit)))
+        self._sub_bucket_count = 1 << self._sub_bucket_bits
+        self._sub_bucket_half = self._sub_bucket_count >> 1
+        self._unit_shift = max(0, int(math.floor(math.log2(lowest_ns))))
+
+        bucket_count = 1
+        smallest_untrackable = self._sub_bucket_count << self._unit_shift
+        while smallest_untrackable <= highest_ns:
+            smallest_untrackable <<= 1
+            bucket_count += 1
+        self._counts = [0] * ((bucket_count + 1) * self._sub_bucket_half)
+
+        self.total_count = 0
+        self.min_ns = 0
+        self.max_ns = 0
+        self._sum_ns = 0
+
+    def _index_for(self, value: int) -> int:
+        scaled = value >> self._unit_shift
+        bucket = max(0, scaled.bit_length() - self._sub_bucket_bits)
+        sub_bucket = scaled >> bucket
+        return (bucket + 1) * self._sub_bucket_half + (sub_bucket - self._sub_bucket_half)
+
+    def _value_for(self, index: int) -> int:
+        bucket = index // self._sub_bucket_half - 1
+        sub_bucket = index % self._sub_bucket_half + self._sub_bucket_half
+        if bucket < 0:
+            bucket = 0
+            sub_bucket -= self._sub_bucket_half
+        return sub_bucket << (bucket + self._unit_shift)
+
+    def _highest_equivalent(self, index: int) -> int:
+        """Upper edge of the bucket so reported percentiles never under-state"""
+        bucket = max(0, index // self._sub_bucket_half - 1)
+        return self._value_for(index) + (1 << (bucket + self._unit_shift)) - 1
+
+    def record(self, value_ns: int, count: int = 1):
+        """Record a latency sample; values are clamped to the trackable range"""
+        value = int(value_ns)
+        if value < 0:
+            value = 0
+        elif value > self.highest_ns:
+            value = self.highest_ns
+        # _index_for() inlined: this runs once per traced span
+        scaled = value >> self._unit_shift
+        bucket = scaled.bit_length() - self._sub_bucket_bits
+        if bucket < 0:
+            bucket = 0
+        half = self._sub_bucket_half
+        self._counts[(bucket + 1) * half + (scaled >> bucket) - half] += count
+        if value < self.min_ns or not self.total_count:
+            self.min_ns = value
+        if value > self.max_ns:
+            self.max_ns = value
+        self.total_count += count
+        self._sum_ns += value * count
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram with the same configuration into this one"""
+        if (other._sub_bucket_bits, other._unit_shift) != (self._sub_bucket_bits, self._unit_shift):
+            raise ValueError("Cannot merge histograms with different precision")
+        if len(other._counts) > len(self._counts):
+            self._counts.extend([0] * (len(other._counts) - len(self._counts)))
+        for i, c in enumerate(other._counts):
+            if c:
+                self._counts[i] += c
+        if other.total_count:
+            self.min_ns = other.min_ns if self.total_count == 0 else min(self.min_ns, other.min_ns)
+            self.max_ns = max(self.max_ns, other.max_ns)
+        self.total_count += other.total_count
+        self._sum_ns += other._sum_ns
+
+    def value_at_percentile(self, percentile: float) -> int:
+        """Latency (ns) at or below which `percentile` percent of samples fall"""
+        if self.total_count == 0:
+            return 0
+        target = max(1, math.ceil(self.total_count * min(percentile, 100.0) / 100.0))
+        running = 0
+        for index, count in enumerate(self._counts):
+            running += count
+            if running >= target:
+                return min(self._highest_equivalent(index), self.max_ns)
+        return self.max_ns
+
+    @property
+    def mean_ns(self) -> float:
+        return self._sum_ns / self.total_count if self.total_count else 0.0
+
+    def buckets(self) -> Iterator[Tuple[int, int]]:
+        """Yield (bucket upper bound ns, count) for non-empty buckets"""
+        for index, count in enumerate(self._counts):
+            if count:
+                yield self._highest_equivalent(index), count
+
+    def summary_ms(self, percentiles: List[float] = (50, 95, 99)) -> Dict[str, Any]:
+        """Percentile summary in milliseconds for reports and baselines"""
+        summary = {"count": self.total_count, "mean_ms": round(self.mean_ns / 1e6, 4)}
+        for p in percentiles:
+            summary[f"p{p:g}_ms"] = round(self.value_at_percentile(p) / 1e6, 4)
+        summary["max_ms"] = round(self.max_ns / 1e6, 4)
+        return summary
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+
+"""
+Voice Announcement Scheduler
+
+Decides when to speak POIs to a moving driver. POIs are ordered by time to
+reach them along the route, not by rating, and each announcement is timed so
+that its text-to-speech playback finishes `lead_time_s` before the car
+arrives.
+
+Every POI is projected onto the route polyline once, when it is added. At a
+given moment all POIs share the same speed and vehicle position, so
+ETA = (poi_route_miles - vehicle_route_miles) / speed keeps the same
+ordering as the route position alone. The heap is therefore keyed by route
+position and never needs re-keying when speed changes. Each GPS fix only
+pops POIs that have fallen behind or are due, which is O(log n) per fix.
+
+With a TripSessionStore attached, announcements are recorded for the whole
+trip, so a POI is not spoken again on a later route or a repeat lap.
+
+Usage:
+    python3 scripts/poi_announcements.py --pois 200 --speed 70
+"""
+
+import math
+import heapq
+import random
+import argparse
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from poi_geo import haversine_miles, offset_coordinates
+from poi_session import TripSessionStore
+
+MILES_PER_DEGREE_LAT = 69.0
+
+def estimate_tts_seconds(text: str, words_per_minute: float = 165.0, padding_s: float = 0.6) -> float:
+    """Rough spoken duration of `text` for a typical TTS voice"""
+    return len(text.split()) * 60.0 / words_per_minute + padding_s
+
+class Route:
+    """Polyline with cumulative along-route distances in miles"""
+
+    def __init__(self, points: List[Tuple[float, float]]):
+        if len(points) < 2:
+            raise ValueError("A route needs at least two points")
+        self.points = points
+        self.cumulative = [0.0]
+        for (lat1, lon1), (lat2, lon2) in zip(points, points[1:]):
+            self.cumulative.append(self.cumulative[-1] + haversine_miles(lat1, lon1, lat2, lon2))
+
+    @property
+    def length_miles(self) -> float:
+        return self.cumulative[-1]
+
+    def _project_segment(self, index: int, latitude: float, longitude: float) -> Tuple[float, float]:
+        """(along-route miles, offset miles) of the closest point on segment `index`"""
+        lat1, lon1 = self.points[index]
+        lat2, lon2 = self.points[index + 1]
+        miles_per_lon = MILES_PER_DEGREE_LAT * math.cos(math.radians(lat1))
+        sx, sy = (lon2 - lon1) * miles_per_lon, (lat2 - lat1) * MILES_PER_DEGREE_LAT
+        px, py = (longitude - lon1) * miles_per_lon, (latitude - lat1) * MILES_PER_DEGREE_LAT
+        length_sq = sx * sx + sy * sy
+        t = 0.0 if length_sq == 0 else min(1.0, max(0.0, (px * sx + py * sy) / length_sq))
+        segment_miles = self.cumulative[index + 1] - self.cumulative[index]
+        offset = math.hypot(px - t * sx, py - t * sy)
+        return self.cumulative[index] + t * segment_miles, offset
+
+    def project(self, latitude: float, longitude: float,
+                first: int = 0, last: Optional[int] = None) -> Tuple[float, float, int]:
+        """Best (along miles, offset miles, segment index) over segments first..last"""
+        last = len(self.points) - 2 if last is None else min(last, len(self.points) - 2)
+        best = (0.0, math.inf, first)
+        for index in range(max(0, first), last + 1):
+            along, offset = self._project_segment(index, latitude, longitude)
+            if offset < best[1]:
+                best = (along, offset, index)
+        return best
+
+@dataclass
+class Announcement:
+    """One POI to speak now"""
+    poi_id: str
+    name: str
+    text: str
+    duration_s: float
+    eta_s: float
+    distance_miles: float
+    late: bool = False
+
+@dataclass
+class _Pending:
+    poi: Any
+    route_miles: float
+    text: str
+    duration_s: float
+
+class AnnouncementScheduler:
+    """ETA-ordered POI announcements for one route
+
+    update() is called once per GPS fix and returns the announcements that
+    should start now (normally zero or one, since one voice speaks at a time).
+    POIs the car has passed, or that can no longer be announced before the
+    car reaches them, are dropped.
+    """
+
+    def __init__(self, route: Route, lead_time_s: float = 20.0, max_route_offset_miles: float = 1.0,
+                 passed_margin_miles: float = 0.05, words_per_minute: float = 165.0,
+                 min_speed_mph: float = 3.0, search_window: int = 8,
+                 session: Optional[TripSessionStore] = None):
+        self.route = route
+        self.session = session  # Trip-wide record of what was already spoken
+        self.lead_time_s = lead_time_s
+        self.max_route_offset_miles = max_route_offset_miles
+        self.passed_margin_miles = passed_margin_miles
+        self.words_per_minute = words_per_minute
+        self.min_speed_mph = min_speed_mph
+        self.search_window = search_window
+
+        self._heap: List[Tuple[float, int, str]] = []
+        self._pending: Dict[str, _Pending] = {}
+        self._seen: set = set()
+        self._sequence = 0
+        self._segment = 0
+        self._last_fix_time: Optional[float] = None
+        self.vehicle_route_miles = 0.0
+        self.speaker_free_at = 0.0
+        self.announced = 0
+        self.dropped_passed = 0
+        self.dropped_missed = 0
+        self.skipped_announced = 0
+
+    def announcement_text(self, poi: Any) -> str:
+        summary = getattr(poi, "review_summary", None) or getattr(poi, "description", "") or ""
+        first_sentence = summary.split(". ")[0].rstrip(".")
+        return f"{poi.name} ahead. {first_sentence}." if first_sentence else f"{poi.name} ahead."
+
+    def add(self, poi: Any) -> bool:
+        """Queue a POI (POIData-like); False if off-route, passed, queued or already announced"""
+        if poi.id in self._seen:
+            return False
+        if self.session is not None and self.session.was_announced(poi.id):
+            self.skipped_announced += 1
+            return False
+        route_miles, offset, _ = self.route.project(poi.latitude, poi.longitude)
+        if offset > self.max_route_offset_miles or \
+                route_miles < self.vehicle_route_miles - self.passed_margin_miles:
+            return False
+        text = self.announcement_text(poi)
+        self._seen.add(poi.id)
+        self._pending[poi.id] = _Pending(poi, route_miles, text,
+                                         estimate_tts_seconds(text, self.words_per_minute))
+        heapq.heappush(self._heap, (route_miles, self._sequence, poi.id))
+        self._sequence += 1
+        return True
+
+    def add_many(self, pois: Iterable[Any]) -> int:
+        return sum(self.add(poi) for poi in pois)
+
+    def cancel(self, poi_id: str):
+        """Forget a queued POI (lazily removed from the heap)"""
+        self._pending.pop(poi_id, None)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _locate_vehicle(self, latitude: float, longitude: float) -> float:
+        # Search a small window around the last matched segment instead of the whole route
+        along, _, segment = self.route.project(latitude, longitude, self._segment - 1,
+                                               self._segment + self.search_window)
+        self._segment = segment
+        # Never move backwards along the route because of GPS jitter
+        self.vehicle_route_miles = max(self.vehicle_route_miles, along)
+        return self.vehicle_route_miles
+
+    def update(self, latitude: float, longitude: float, speed_mph: float, now: float) -> List[Announcement]:
+        """Process one GPS fix taken at `now` (seconds) and return what to speak"""
+        position = self._locate_vehicle(latitude, longitude)
+        fix_interval = 0.0 if self._last_fix_time is None else max(0.0, now - self._last_fix_time)
+        self._last_fix_time = now
+        heap = self._heap
+        pending = self._pending
+        announcements = []
+
+        while heap:
+            route_miles, _, poi_id = heap[0]
+            entry = pending.get(poi_id)
+            if entry is None:  # cancelled
+                heapq.heappop(heap)
+                continue
+            remaining = route_miles - position
+            if remaining < -self.passed_margin_miles:
+                heapq.heappop(heap)
+                del pending[poi_id]
+                self.dropped_passed += 1
+                continue
+            if speed_mph < self.min_speed_mph:
+                break
+
+            eta_s = max(0.0, remaining) / speed_mph * 3600.0
+            # Latest start that still finishes `lead_time_s` before arrival; start one
+            # fix early so the next fix doesn't arrive too late
+            latest_start = now + eta_s - self.lead_time_s - entry.duration_s
+            if latest_start > now + fix_interval:
+                break
+            start = max(now, self.speaker_free_at)
+            if start > now:
+                # Speaker busy: keep waiting only while the POI can still be reached in time
+                if start + entry.duration_s > now + eta_s:
+                    heapq.heappop(heap)
+                    del pending[poi_id]
+                    self.dropped_missed += 1
+                    continue
+                break
+            if entry.duration_s > eta_s:
+                heapq.heappop(heap)
+                del pending[poi_id]
+                self.dropped_missed += 1
+                continue
+
+            heapq.heappop(heap)
+            del pending[poi_id]
+            self.speaker_free_at = now + entry.duration_s
+            self.announced += 1
+            if self.session is not None:
+                self.session.mark_announced(poi_id)
+            announcements.append(Announcement(
+                poi_id=poi_id, name=entry.poi.name, text=entry.text, duration_s=round(entry.duration_s, 2),
+                eta_s=round(eta_s, 1), distance_miles=round(max(0.0, remaining), 2),
+                late=latest_start < now - fix_interval
+            ))
+        return announcements
+
+def simulate_drive(route: Route, pois: List[Any], speed_mph: float, fix_interval_s: float = 1.0,
+                   **scheduler_options) -> Tuple[AnnouncementScheduler, List[Tuple[float, Announcement]]]:
+    """Drive the route at constant speed, feeding fixes to a scheduler"""
+    scheduler = AnnouncementScheduler(route, **scheduler_options)
+    scheduler.add_many(pois)
+    spoken = []
+    step_miles = speed_mph * fix_interval_s / 3600.0
+    travelled = 0.0
+    now = 0.0
+    segment = 0
+    while travelled <= route.length_miles:
+        while segment < len(route.points) - 2 and route.cumulative[segment + 1] < travelled:
+            segment += 1
+        (lat1, lon1), (lat2, lon2) = route.points[segment], route.points[segment + 1]
+        segment_miles = route.cumulative[segment + 1] - route.cumulative[segment]
+        t = 0.0 if segment_miles == 0 else min(1.0, (travelled - route.cumulative[segment]) / segment_miles)
+        for announcement in scheduler.update(lat1 + t * (lat2 - lat1), lon1 + t * (lon2 - lon1), speed_mph, now):
+            spoken.append((now, announcement))
+        travelled += step_miles
+        now += fix_interval_s
+    return scheduler, spoken
+
+def _demo_route() -> Route:
+    """Portland → Hood River → Lost Lake via I-84 and OR-35 (coarse)"""
+    return Route([(45.5152, -122.6784), (45.5397, -122.3875), (45.5734, -122.1123),
+                  (45.6447, -121.9428), (45.7054, -121.5215), (45.6480, -121.6000),
+                  (45.5600, -121.7200), (45.4979, -121.8209)])
+
+def _demo_pois(route: Route, count: int, seed: int) -> List[Any]:
+    from demo_dual_poi_search import POIData
+    rng = random.Random(seed)
+    pois = []
+    for i in range(count):
+        segment = rng.randrange(len(route.points) - 1)
+        (lat1, lon1), (lat2, lon2) = route.points[segment], route.points[segment + 1]
+        t = rng.random()
+        lat, lon = offset_coordinates(lat1 + t * (lat2 - lat1), lon1 + t * (lon2 - lon1),
+                                      rng.uniform(-0.8, 0.8), rng.uniform(-0.8, 0.8))
+        pois.append(POIData(id=f"demo_{i}", name=f"Roadside Stop {i}",
+                            description="A local favorite with great views. Open daily.",
+                            category="attraction", latitude=lat, longitude=lon,
+                            distance_from_user=0.0, rating=round(rng.uniform(3.5, 5.0), 1)))
+    return pois
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate ETA-ordered voice announcements along a route")
+    parser.add_argument("--pois", type=int, default=40, help="POIs scattered along the demo route")
+    parser.add_argument("--speed", type=float, default=70.0, help="Vehicle speed in mph")
+    parser.add_argument("--lead-time", type=float, default=20.0,
+                        help="Seconds before arrival an announcement should finish")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--laps", type=int, default=1,
+                        help="Drive the route repeatedly; later laps skip POIs already announced")
+    args = parser.parse_args()
+
+    route = _demo_route()
+    pois = _demo_pois(route, args.pois, args.seed)
+    session = TripSessionStore()
+    for lap in range(1, args.laps + 1):
+        print(f"🚗 Lap {lap}: driving {route.length_miles:.1f} miles at {args.speed:g} mph past {len(pois)} POIs")
+        scheduler, spoken = simulate_drive(route, pois, args.speed, lead_time_s=args.lead_time, session=session)
+        for at, announcement in spoken:
+            flag = " (late)" if announcement.late else ""
+            print(f"   t={at:6.0f}s  🔊 {announcement.text} [{announcement.duration_s:.1f}s, "
+                  f"arrive in {announcement.eta_s:.0f}s]{flag}")
+        print(f"\n📊 Announced {scheduler.announced}, dropped {scheduler.dropped_missed} (no time to speak), "
+              f"{scheduler.dropped_passed} passed, {scheduler.skipped_announced} already announced\n")
+
+if __name__ == "__main__":
+    main()
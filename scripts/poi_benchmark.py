@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+
+"""
+POI Search Latency Benchmark Runner
+
+Replaces the average-of-a-few-runs checks in the demo scripts with a proper
+benchmark: configurable workloads, warm-up iterations, HDR histograms per
+stage, JSON baselines and a non-zero exit code when a stage regresses.
+
+Usage:
+    python3 scripts/poi_benchmark.py --iterations 500 --save-baseline baseline.json
+    python3 scripts/poi_benchmark.py --baseline baseline.json --threshold 0.15
+    python3 scripts/poi_benchmark.py --config workloads.json
+
+Workload config files are a JSON list of objects such as:
+    {"name": "hybrid_lost_lake", "type": "hybrid", "location": "Lost Lake, Oregon",
+     "latitude": 45.4979, "longitude": -121.8209, "iterations": 300}
+    {"name": "merge_10k", "type": "merge", "pois_per_source": 5000}
+
+Each workload gets its own orchestrator, and its result caches (empty tiles,
+merge orders) are cleared before every iteration. The timed stages are then
+the upstream calls and merges themselves, not cache hits. Set
+"warm_caches": true in a spec to measure the cached path instead.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import contextlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from latency_histogram import LatencyHistogram
+from demo_dual_poi_search import DualPOISearchOrchestrator
+from poi_summaries import MockSummaryBackend, ReviewSummarizer
+
+DEFAULT_WORKLOADS = [
+    {"name": "hybrid_lost_lake", "type": "hybrid", "location": "Lost Lake, Oregon",
+     "latitude": 45.4979, "longitude": -121.8209},
+    {"name": "hybrid_seattle", "type": "hybrid", "location": "Seattle, Washington",
+     "latitude": 47.6062, "longitude": -122.3321},
+    {"name": "hybrid_unknown", "type": "hybrid", "location": "Unknown Location",
+     "latitude": 43.0, "longitude": -118.0},
+    {"name": "merge_synthetic", "type": "merge", "pois_per_source": 2000}
+]
+
+# Stage timings come back from a workload iteration as {stage: nanoseconds}
+StageTimings = Dict[str, int]
+
+@dataclass
+class Workload:
+    """A named, repeatable unit of benchmark work"""
+    name: str
+    run: Callable[[], StageTimings]
+    iterations: int
+    warmup: int
+    reset: Optional[Callable[[], None]] = None  # Called untimed before every iteration
+
+@dataclass
+class WorkloadResult:
+    """Per-stage histograms collected for one workload"""
+    name: str
+    iterations: int
+    histograms: Dict[str, LatencyHistogram] = field(default_factory=dict)
+
+    def record(self, timings: StageTimings):
+        for stage, value_ns in timings.items():
+            if stage not in self.histograms:
+                self.histograms[stage] = LatencyHistogram()
+            self.histograms[stage].record(value_ns)
+
+    def summary(self) -> Dict[str, Any]:
+        return {stage: hist.summary_ms() for stage, hist in sorted(self.histograms.items())}
+
+def _hybrid_workload(spec: Dict[str, Any], orchestrator: DualPOISearchOrchestrator) -> Callable[[], StageTimings]:
+    def run() -> StageTimings:
+        results = orchestrator.search_hybrid(spec["location"], spec["latitude"], spec["longitude"],
+                                             category=spec.get("category", "attraction"),
+                                             max_results=spec.get("max_results", 8))
+        # Span paths look like "search_hybrid/merge"; report leaf stage names
+        return {path.rsplit("/", 1)[-1]: int(ms * 1_000_000)
+                for path, ms in results["performance"]["stages_ms"].items() if "/" in path}
+    return run
+
+def _merge_workload(spec: Dict[str, Any], orchestrator: DualPOISearchOrchestrator) -> Callable[[], StageTimings]:
+    from generate_poi_dataset import generate_dataset
+
+    per_source = spec.get("pois_per_source", 2000)
+    dataset = generate_dataset(per_source * 2, seed=spec.get("seed", 7))
+    user_lat, user_lon = spec.get("latitude", 45.4979), spec.get("longitude", -121.8209)
+    pois = [dataset.to_poi_data(i, user_lat, user_lon) for i in range(len(dataset))]
+    llm_pois = [p for i, p in enumerate(pois) if dataset.source_ids[i] == 0]
+    api_pois = [p for i, p in enumerate(pois) if dataset.source_ids[i] == 1]
+    max_results = spec.get("max_results", 50)
+
+    def run() -> StageTimings:
+        start = time.perf_counter_ns()
+        orchestrator._merge_pois(llm_pois, api_pois, max_results)
+        return {"merge": time.perf_counter_ns() - start}
+    return run
+
+WORKLOAD_TYPES = {
+    "hybrid": _hybrid_workload,
+    "merge": _merge_workload
+}
+
+def build_workloads(specs: List[Dict[str, Any]], iterations: int, warmup: int,
+                    latency_scale: float, summaries: bool = False) -> List[Workload]:
+    """Turn workload specs into runnable workloads, each with its own orchestrator"""
+    workloads = []
+    for spec in specs:
+        factory = WORKLOAD_TYPES.get(spec.get("type"))
+        if factory is None:
+            raise ValueError(f"Unknown workload type for {spec.get('name')}: {spec.get('type')}")
+        # A shared orchestrator would let one workload's cache entries answer another's searches
+        summarizer = ReviewSummarizer(MockSummaryBackend(latency_scale)) if summaries else None
+        orchestrator = DualPOISearchOrchestrator(latency_scale=latency_scale, summarizer=summarizer)
+        workloads.append(Workload(
+            name=spec["name"],
+            run=factory(spec, orchestrator),
+            iterations=spec.get("iterations", iterations),
+            warmup=spec.get("warmup", warmup),
+            reset=None if spec.get("warm_caches") else orchestrator.clear_caches
+        ))
+    return workloads
+
+def run_workload(workload: Workload) -> WorkloadResult:
+    """Warm up, then time every iteration end-to-end plus its reported stages"""
+    result = WorkloadResult(workload.name, workload.iterations)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(workload.warmup):
+            if workload.reset:
+                workload.reset()
+            workload.run()
+        for _ in range(workload.iterations):
+            if workload.reset:
+                workload.reset()
+            start = time.perf_counter_ns()
+            timings = workload.run()
+            timings["total"] = time.perf_counter_ns() - start
+            result.record(timings)
+    return result
+
+def compare_to_baseline(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+                        min_delta_ms: float) -> List[Dict[str, Any]]:
+    """Return every stage percentile that regressed by more than `threshold`
+
+    Deltas smaller than `min_delta_ms` are treated as timer noise.
+    """
+    regressions = []
+    for workload, stages in current["workloads"].items():
+        baseline_stages = baseline.get("workloads", {}).get(workload, {})
+        for stage, stats in stages.items():
+            if stage not in baseline_stages:
+                continue
+            for key in ("p95_ms", "p99_ms"):
+                before = baseline_stages[stage][key]
+                after = stats[key]
+                if after - before > min_delta_ms and after > before * (1 + threshold):
+                    regressions.append({"workload": workload, "stage": stage, "metric": key,
+                                        "baseline_ms": before, "current_ms": after,
+                                        "change": (after - before) / before if before else float("inf")})
+    return regressions
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n📊 BENCHMARK RESULTS ({report['timestamp']})")
+    print("=" * 80)
+    print(f"{'workload':<20} {'stage':<10} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for workload, stages in report["workloads"].items():
+        for stage, s in stages.items():
+            print(f"{workload:<20} {stage:<10} {s['count']:>6} {s['p50_ms']:>10.3f} "
+                  f"{s['p95_ms']:>10.3f} {s['p99_ms']:>10.3f} {s['max_ms']:>10.3f}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Percentile latency benchmarks for POI search")
+    parser.add_argument("--config", type=Path, help="JSON file with a list of workload specs")
+    parser.add_argument("--workloads", nargs="*", help="Only run workloads with these names")
+    parser.add_argument("--iterations", type=int, default=200, help="Measured iterations per workload")
+    parser.add_argument("--warmup", type=int, default=20, help="Warm-up iterations per workload")
+    parser.add_argument("--latency-scale", type=float, default=0.01,
+                        help="Scale applied to simulated LLM/API latency (1.0 = demo timing)")
+    parser.add_argument("--seed", type=int, default=1234, help="Random seed for simulated latency")
+    parser.add_argument("--summaries", action="store_true",
+                        help="Generate review summaries during searches (adds a summarize stage)")
+    parser.add_argument("--output", type=Path, help="Write the full report to this JSON file")
+    parser.add_argument("--save-baseline", type=Path, help="Store results as a baseline JSON file")
+    parser.add_argument("--baseline", type=Path, help="Compare against a stored baseline")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Allowed relative p95/p99 regression before failing (0.15 = 15%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05,
+                        help="Ignore regressions smaller than this absolute delta")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    specs = json.loads(args.config.read_text()) if args.config else DEFAULT_WORKLOADS
+    if args.workloads:
+        specs = [s for s in specs if s["name"] in args.workloads]
+
+    print("⏱️  POI SEARCH BENCHMARK")
+    print(f"   Workloads: {', '.join(s['name'] for s in specs)}")
+    print(f"   Iterations: {args.iterations} (+{args.warmup} warm-up), latency scale {args.latency_scale}")
+
+    report = {
+        "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),
+        "config": {"iterations": args.iterations, "warmup": args.warmup,
+                   "latency_scale": args.latency_scale, "seed": args.seed, "summaries": args.summaries},
+        "workloads": {}
+    }
+    for workload in build_workloads(specs, args.iterations, args.warmup, args.latency_scale, args.summaries):
+        print(f"   ▶ {workload.name}...", flush=True)
+        report["workloads"][workload.name] = run_workload(workload).summary()
+
+    print_report(report)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Report saved to: {args.output}")
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(report, indent=2))
+        print(f"\n💾 Baseline saved to: {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare_to_baseline(report, baseline, args.threshold, args.min_delta_ms)
+        print(f"\n🎯 Regression check vs {args.baseline} (threshold {args.threshold:.0%}):")
+        if regressions:
+            for r in regressions:
+                print(f"   ❌ {r['workload']}/{r['stage']} {r['metric']}: "
+                      f"{r['baseline_ms']:.3f}ms → {r['current_ms']:.3f}ms (+{r['change']:.0%})")
+            return 1
+        print("   ✅ No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
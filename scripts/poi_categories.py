@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+"""
+POI category taxonomy as bitmasks
+
+Bit positions follow the poi_categories rows seeded in
+backend/database-schema.sql (bit = id - 1), so a set of categories is a
+single int and "does this POI match any requested category" is one AND.
+Client-facing names used by the demo ("attraction", "lodging", "food", ...)
+are aliases that expand to one or more taxonomy bits.
+"""
+
+from typing import Dict, Iterable, List
+
+# Order matters: index == poi_categories.id - 1
+POI_CATEGORIES = [
+    "restaurant", "scenic_spot", "historic_site", "shopping", "entertainment",
+    "outdoor_recreation", "accommodation", "gas_station", "emergency_services", "hidden_gem"
+]
+
+CATEGORY_BITS: Dict[str, int] = {slug: 1 << i for i, slug in enumerate(POI_CATEGORIES)}
+
+CATEGORY_ALIASES: Dict[str, List[str]] = {
+    "attraction": ["scenic_spot", "historic_site", "entertainment", "outdoor_recreation", "hidden_gem"],
+    "lodging": ["accommodation"],
+    "food": ["restaurant"],
+    "dining": ["restaurant"],
+    "gas": ["gas_station"],
+    "fuel": ["gas_station"],
+    "nature": ["scenic_spot", "outdoor_recreation"],
+    "hiking": ["outdoor_recreation"],
+    "scenic": ["scenic_spot"],
+    "historic": ["historic_site"],
+    "emergency": ["emergency_services"]
+}
+
+ALL_CATEGORIES_MASK = (1 << len(POI_CATEGORIES)) - 1
+
+def category_mask(category: str) -> int:
+    """Bitmask for a taxonomy slug or alias (0 if unknown)"""
+    key = category.lower().strip()
+    if key in CATEGORY_BITS:
+        return CATEGORY_BITS[key]
+    mask = 0
+    for slug in CATEGORY_ALIASES.get(key, ()):
+        mask |= CATEGORY_BITS[slug]
+    return mask
+
+def categories_mask(categories: Iterable[str]) -> int:
+    mask = 0
+    for category in categories:
+        mask |= category_mask(category)
+    return mask
+
+def categories_in(mask: int) -> List[str]:
+    """Taxonomy slugs set in a mask"""
+    return [slug for slug, bit in CATEGORY_BITS.items() if mask & bit]
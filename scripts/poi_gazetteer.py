@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+
+"""
+Offline Gazetteer for POI search
+
+Resolves place names to coordinates (forward) and coordinates to the nearest
+named place/region (reverse) without a network geocoder.
+
+- Forward lookups walk a compressed (radix) trie keyed by normalized names,
+  so "Lost Lake, Oregon", "lost lake or" and "Lost Lake" all resolve, and
+  prefixes can be completed for type-ahead.
+- Reverse lookups use a fixed lat/lon grid over the places, scanning rings of
+  cells outward from the query point.
+- Indexes are stored as zlib-compressed JSON; load() rebuilds them in a few
+  milliseconds and lookups then take microseconds.
+
+The built-in place list covers the demo regions and major US metros. Larger
+gazetteers can be built from a GeoNames "cities" TSV export with
+--geonames cities15000.txt; pass --admin1 admin1CodesASCII.txt as well to
+get region names (without it the region is left empty).
+
+Usage:
+    python3 scripts/poi_gazetteer.py --build gazetteer.bin
+    python3 scripts/poi_gazetteer.py --lookup "Lost Lake, Oregon"
+    python3 scripts/poi_gazetteer.py --lookup "Lost Lake" --near 47.6 -121.6
+    python3 scripts/poi_gazetteer.py --reverse 47.61 -122.33
+"""
+
+import re
+import sys
+import json
+import math
+import time
+import zlib
+import argparse
+import unicodedata
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from poi_geo import haversine_miles
+
+# (name, region, region code, latitude, longitude, population)
+BUILTIN_PLACES = [
+    ("Lost Lake", "Oregon", "OR", 45.4979, -121.8209, 0),
+    ("Hood River", "Oregon", "OR", 45.7054, -121.5215, 8300),
+    ("Government Camp", "Oregon", "OR", 45.3040, -121.7548, 200),
+    ("Mount Hood", "Oregon", "OR", 45.3736, -121.6960, 0),
+    ("Timberline Lodge", "Oregon", "OR", 45.3311, -121.7113, 0),
+    ("Portland", "Oregon", "OR", 45.5152, -122.6784, 652000),
+    ("Bend", "Oregon", "OR", 44.0582, -121.3153, 102000),
+    ("Eugene", "Oregon", "OR", 44.0521, -123.0868, 177000),
+    ("Seattle", "Washington", "WA", 47.6062, -122.3321, 737000),
+    ("Tacoma", "Washington", "WA", 47.2529, -122.4443, 219000),
+    ("Spokane", "Washington", "WA", 47.6588, -117.4260, 229000),
+    ("Mount Rainier", "Washington", "WA", 46.8523, -121.7603, 0),
+    ("Boise", "Idaho", "ID", 43.6150, -116.2023, 236000),
+    ("San Francisco", "California", "CA", 37.7749, -122.4194, 815000),
+    ("Los Angeles", "California", "CA", 34.0522, -118.2437, 3820000),
+    ("San Diego", "California", "CA", 32.7157, -117.1611, 1380000),
+    ("Sacramento", "California", "CA", 38.5816, -121.4944, 525000),
+    ("Yosemite Valley", "California", "CA", 37.7456, -119.5936, 1000),
+    ("Las Vegas", "Nevada", "NV", 36.1699, -115.1398, 656000),
+    ("Phoenix", "Arizona", "AZ", 33.4484, -112.0740, 1650000),
+    ("Grand Canyon Village", "Arizona", "AZ", 36.0544, -112.1401, 2000),
+    ("Salt Lake City", "Utah", "UT", 40.7608, -111.8910, 200000),
+    ("Moab", "Utah", "UT", 38.5733, -109.5498, 5300),
+    ("Denver", "Colorado", "CO", 39.7392, -104.9903, 715000),
+    ("Albuquerque", "New Mexico", "NM", 35.0844, -106.6504, 564000),
+    ("Austin", "Texas", "TX", 30.2672, -97.7431, 975000),
+    ("Dallas", "Texas", "TX", 32.7767, -96.7970, 1300000),
+    ("Houston", "Texas", "TX", 29.7604, -95.3698, 2300000),
+    ("San Antonio", "Texas", "TX", 29.4241, -98.4936, 1450000),
+    ("Minneapolis", "Minnesota", "MN", 44.9778, -93.2650, 425000),
+    ("Chicago", "Illinois", "IL", 41.8781, -87.6298, 2700000),
+    ("St. Louis", "Missouri", "MO", 38.6270, -90.1994, 293000),
+    ("Detroit", "Michigan", "MI", 42.3314, -83.0458, 632000),
+    ("Atlanta", "Georgia", "GA", 33.7490, -84.3880, 499000),
+    ("Miami", "Florida", "FL", 25.7617, -80.1918, 449000),
+    ("Orlando", "Florida", "FL", 28.5383, -81.3792, 309000),
+    ("Tampa", "Florida", "FL", 27.9506, -82.4572, 399000),
+    ("Charlotte", "North Carolina", "NC", 35.2271, -80.8431, 880000),
+    ("Washington", "District of Columbia", "DC", 38.9072, -77.0369, 690000),
+    ("Baltimore", "Maryland", "MD", 39.2904, -76.6122, 576000),
+    ("Philadelphia", "Pennsylvania", "PA", 39.9526, -75.1652, 1600000),
+    ("Pittsburgh", "Pennsylvania", "PA", 40.4406, -79.9959, 303000),
+    ("New York", "New York", "NY", 40.7128, -74.0060, 8800000),
+    ("Boston", "Massachusetts", "MA", 42.3601, -71.0589, 675000),
+    ("Lost Lake", "Washington", "WA", 47.6457, -121.5651, 0)
+]
+
+GRID_DEGREES = 0.5
+GAZETTEER_VERSION = 1
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+def normalize_place_name(text: str) -> str:
+    """Lowercase, accent-free, punctuation-free form used as trie key"""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+@dataclass
+class Place:
+    """A gazetteer entry"""
+    id: str
+    name: str
+    region: str
+    region_code: str
+    latitude: float
+    longitude: float
+    population: int = 0
+
+    @property
+    def display_name(self) -> str:
+        return f"{self.name}, {self.region}" if self.region else self.name
+
+class RadixTrie:
+    """Path-compressed trie mapping normalized names to lists of place indices
+
+    Nodes are plain dicts: {"edges": {label: node}, "values": [...]}; edge
+    labels are whole substrings, so depth is bounded by the number of
+    branching points rather than the key length.
+    """
+
+    def __init__(self, root: Optional[dict] = None):
+        self.root = root or {"edges": {}, "values": []}
+
+    def insert(self, key: str, value: int):
+        node = self.root
+        while key:
+            for label, child in node["edges"].items():
+                common = _common_prefix_length(label, key)
+                if common == 0:
+                    continue
+                if common < len(label):
+                    # Split the edge at the divergence point
+                    middle = {"edges": {label[common:]: child}, "values": []}
+                    del node["edges"][label]
+                    node["edges"][label[:common]] = middle
+                    child = middle
+                node = child
+                key = key[common:]
+                break
+            else:
+                leaf = {"edges": {}, "values": []}
+                node["edges"][key] = leaf
+                node = leaf
+                key = ""
+        if value not in node["values"]:
+            node["values"].append(value)
+
+    def _find_node(self, key: str) -> Tuple[Optional[dict], str]:
+        """Node reached by consuming `key`, plus any unconsumed edge remainder"""
+        node = self.root
+        while key:
+            edges = node["edges"]
+            for label, child in edges.items():
+                if label[0] != key[0]:
+                    continue
+                if key.startswith(label):
+                    node = child
+                    key = key[len(label):]
+                    break
+                if label.startswith(key):
+                    return child, label[len(key):]
+                return None, ""
+            else:
+                return None, ""
+        return node, ""
+
+    def get(self, key: str) -> List[int]:
+        node, remainder = self._find_node(key)
+        if node is None or remainder:
+            return []
+        return node["values"]
+
+    def with_prefix(self, prefix: str, limit: int = 10) -> List[int]:
+        node, _ = self._find_node(prefix)
+        if node is None:
+            return []
+        found: List[int] = []
+        pending = [node]
+        while pending and len(found) < limit:
+            current = pending.pop()
+            for value in current["values"]:
+                if value not in found:
+                    found.append(value)
+            pending.extend(current["edges"].values())
+        return found[:limit]
+
+def _common_prefix_length(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+class Gazetteer:
+    """Forward (name → place) and reverse (coordinates → place) lookups"""
+
+    def __init__(self, places: Iterable[Place]):
+        self.places: List[Place] = list(places)
+        self.trie = RadixTrie()
+        self.grid: Dict[Tuple[int, int], List[int]] = {}
+        for index, place in enumerate(self.places):
+            self._index_place(index, place)
+
+    @classmethod
+    def builtin(cls) -> "Gazetteer":
+        return cls(_place_from_row(row) for row in BUILTIN_PLACES)
+
+    def _index_place(self, index: int, place: Place):
+        name = normalize_place_name(place.name)
+        for qualifier in (normalize_place_name(place.region), place.region_code.lower()):
+            if qualifier:
+                self.trie.insert(f"{name} {qualifier}", index)
+        self.trie.insert(name, index)
+        self.grid.setdefault(_grid_cell(place.latitude, place.longitude), []).append(index)
+
+    def _rank(self, indices: Iterable[int]) -> List[Place]:
+        return sorted((self.places[i] for i in indices), key=lambda p: -p.population)
+
+    def resolve(self, name: str, latitude: Optional[float] = None,
+                longitude: Optional[float] = None) -> Optional[Place]:
+        """Best place for a free-text name such as "Lost Lake, Oregon" (None if unknown)
+
+        An ambiguous name ("Lost Lake" exists in several states) resolves to
+        the match nearest the given coordinates, else the most populous one.
+        """
+        indices = self.trie.get(normalize_place_name(name))
+        if not indices:
+            return None
+        if latitude is None or longitude is None:
+            return self._rank(indices)[0]
+        return min((self.places[i] for i in indices),
+                   key=lambda p: haversine_miles(latitude, longitude, p.latitude, p.longitude))
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Place]:
+        """Places whose indexed name starts with `prefix` (type-ahead)"""
+        return self._rank(self.trie.with_prefix(normalize_place_name(prefix), limit * 3))[:limit]
+
+    def reverse(self, latitude: float, longitude: float, max_miles: float = 25.0) -> Optional[Place]:
+        """Nearest place within `max_miles` of the coordinates"""
+        row, col = _grid_cell(latitude, longitude)
+        # Rows are ~34.5 miles tall; columns shrink with latitude
+        col_miles = GRID_DEGREES * 69.0 * max(0.05, math.cos(math.radians(latitude)))
+        max_ring = int(max(max_miles / (GRID_DEGREES * 69.0), max_miles / col_miles)) + 1
+
+        best: Optional[Place] = None
+        best_distance = max_miles
+        for ring in range(max_ring + 1):
+            for r in range(row - ring, row + ring + 1):
+                for c in range(col - ring, col + ring + 1):
+                    if max(abs(r - row), abs(c - col)) != ring:
+                        continue
+                    for index in self.grid.get((r, c), ()):
+                        place = self.places[index]
+                        distance = haversine_miles(latitude, longitude, place.latitude, place.longitude)
+                        if distance <= best_distance:
+                            best, best_distance = place, distance
+            # Anything in a farther ring is at least `ring` rows/cols away
+            if best is not None and best_distance <= ring * min(GRID_DEGREES * 69.0, col_miles):
+                break
+        return best
+
+    def save(self, path: Path):
+        payload = {"version": GAZETTEER_VERSION, "places": [asdict(p) for p in self.places],
+                   "trie": self.trie.root,
+                   "grid": [[r, c, indices] for (r, c), indices in self.grid.items()]}
+        Path(path).write_bytes(zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), 9))
+
+    @classmethod
+    def load(cls, path: Path) -> "Gazetteer":
+        payload = json.loads(zlib.decompress(Path(path).read_bytes()))
+        if payload.get("version") != GAZETTEER_VERSION:
+            raise ValueError(f"{path} is not a version {GAZETTEER_VERSION} gazetteer")
+        gazetteer = cls.__new__(cls)
+        gazetteer.places = [Place(**p) for p in payload["places"]]
+        gazetteer.trie = RadixTrie(payload["trie"])
+        gazetteer.grid = {(r, c): indices for r, c, indices in payload["grid"]}
+        return gazetteer
+
+def _grid_cell(latitude: float, longitude: float) -> Tuple[int, int]:
+    return int(math.floor(latitude / GRID_DEGREES)), int(math.floor(longitude / GRID_DEGREES))
+
+def _place_from_row(row) -> Place:
+    name, region, region_code, latitude, longitude, population = row
+    place_id = f"{normalize_place_name(name).replace(' ', '-')}-{region_code.lower()}"
+    return Place(place_id, name, region, region_code, latitude, longitude, population)
+
+def load_admin1_names(path: Path) -> Dict[str, str]:
+    """"US.OR" -> "Oregon" from a GeoNames admin1CodesASCII.txt"""
+    names = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) >= 2:
+                names[fields[0]] = fields[1]
+    return names
+
+def load_geonames(path: Path, min_population: int = 0,
+                  admin1_names: Optional[Dict[str, str]] = None) -> List[Place]:
+    """Places from a GeoNames cities TSV (geonameid, name, ..., lat, lon, ..., population)
+
+    Field 10 is an admin1 code ("OR" in the US, "08" elsewhere), not a name;
+    the region name comes from `admin1_names` and stays empty without it.
+    """
+    admin1_names = admin1_names or {}
+    places = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 15 or int(fields[14] or 0) < min_population:
+                continue
+            region = admin1_names.get(f"{fields[8]}.{fields[10]}", "")
+            places.append(Place(f"geonames-{fields[0]}", fields[1], region, fields[10],
+                                float(fields[4]), float(fields[5]), int(fields[14] or 0)))
+    return places
+
+_default_gazetteer: Optional[Gazetteer] = None
+
+def default_gazetteer() -> Gazetteer:
+    """Shared built-in gazetteer, built on first use"""
+    global _default_gazetteer
+    if _default_gazetteer is None:
+        _default_gazetteer = Gazetteer.builtin()
+    return _default_gazetteer
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline place-name gazetteer")
+    parser.add_argument("--build", type=Path, help="Write the compressed gazetteer to this file")
+    parser.add_argument("--geonames", type=Path, help="Build from a GeoNames cities TSV instead of built-ins")
+    parser.add_argument("--admin1", type=Path, help="GeoNames admin1CodesASCII.txt for region names")
+    parser.add_argument("--gazetteer", type=Path, help="Load a previously built gazetteer")
+    parser.add_argument("--lookup", help="Resolve a place name to coordinates")
+    parser.add_argument("--near", type=float, nargs=2, metavar=("LAT", "LON"),
+                        help="Break --lookup name ties by distance to this point")
+    parser.add_argument("--complete", help="List places starting with this prefix")
+    parser.add_argument("--reverse", type=float, nargs=2, metavar=("LAT", "LON"),
+                        help="Find the nearest named place")
+    args = parser.parse_args()
+
+    if args.gazetteer:
+        gazetteer = Gazetteer.load(args.gazetteer)
+    elif args.geonames:
+        admin1_names = load_admin1_names(args.admin1) if args.admin1 else None
+        gazetteer = Gazetteer(load_geonames(args.geonames, admin1_names=admin1_names))
+    else:
+        gazetteer = Gazetteer.builtin()
+
+    if args.build:
+        gazetteer.save(args.build)
+        print(f"💾 Saved {len(gazetteer.places)} places to {args.build} ({args.build.stat().st_size} bytes)")
+
+    if args.lookup:
+        start = time.perf_counter_ns()
+        place = gazetteer.resolve(args.lookup, *(args.near or ()))
+        elapsed_us = (time.perf_counter_ns() - start) / 1000
+        if place:
+            print(f"📍 {place.display_name}: {place.latitude}, {place.longitude} ({elapsed_us:.1f}µs)")
+        else:
+            print(f"❌ Unknown place: {args.lookup}")
+            return 1
+
+    if args.complete:
+        for place in gazetteer.complete(args.complete):
+            print(f"   {place.display_name}")
+
+    if args.reverse:
+        start = time.perf_counter_ns()
+        place = gazetteer.reverse(*args.reverse)
+        elapsed_us = (time.perf_counter_ns() - start) / 1000
+        print(f"🧭 {place.display_name if place else 'No named place nearby'} ({elapsed_us:.1f}µs)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
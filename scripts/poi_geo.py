@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+
+"""
+Geographic helpers shared by the POI search scripts
+
+Keeps the distance math and the continental US bounds in one place so the
+dataset generator, benchmarks and search engines agree on units (miles).
+"""
+
+import math
+from typing import Tuple
+
+EARTH_RADIUS_MILES = 3958.8
+
+# Continental US bounding box (south, west, north, east)
+CONUS_BOUNDS = (24.5, -124.8, 49.4, -66.9)
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates in miles"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+def offset_coordinates(latitude: float, longitude: float,
+                       north_miles: float, east_miles: float) -> Tuple[float, float]:
+    """Move a coordinate by a north/east offset expressed in miles"""
+    d_lat = north_miles / 69.0
+    d_lon = east_miles / (69.0 * max(0.01, math.cos(math.radians(latitude))))
+    return latitude + d_lat, longitude + d_lon
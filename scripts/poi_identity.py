@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+"""
+Stable POI identity for the dual search pipeline
+
+POI ids are derived from the normalized name plus quantized coordinates, so
+the same place discovered twice gets the same id and caches, dedup and client
+diffing can key on it. POIIdentityMap links ids from different sources (LLM
+content ids and Google place_ids) to one canonical id and can persist that
+mapping to JSON between runs.
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from poi_geo import haversine_miles
+
+# ~110m grid for content ids; cross-source matching uses MATCH_RADIUS_MILES
+COORDINATE_PRECISION = 3
+# Same normalized name within this distance is treated as the same place
+MATCH_RADIUS_MILES = 1.0
+# Least recently used source ids beyond this are dropped from the alias table
+DEFAULT_MAX_ALIASES = 100_000
+
+_ABBREVIATIONS = {
+    "st": "saint", "mt": "mount", "ft": "fort", "ctr": "center", "co": "company",
+    "natl": "national", "sp": "state park", "&": "and"
+}
+_PARENTHETICAL = re.compile(r"\([^)]*\)")
+_NON_WORD = re.compile(r"[^\w&]+")
+
+def normalize_poi_name(name: str) -> str:
+    """Canonical form of a POI name used for identity and dedup"""
+    text = unicodedata.normalize("NFKD", name)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = _PARENTHETICAL.sub(" ", text)
+    words = [_ABBREVIATIONS.get(word, word) for word in _NON_WORD.sub(" ", text.replace("&", " & ")).split()]
+    if words and words[0] == "the":
+        words = words[1:]
+    return " ".join(words)
+
+def quantize_coordinates(latitude: float, longitude: float,
+                         precision: int = COORDINATE_PRECISION) -> Tuple[int, int]:
+    scale = 10 ** precision
+    return int(round(latitude * scale)), int(round(longitude * scale))
+
+def stable_poi_id(name: str, latitude: float, longitude: float, prefix: str = "poi") -> str:
+    """Deterministic id from normalized name and quantized coordinates"""
+    cell = quantize_coordinates(latitude, longitude)
+    digest = hashlib.blake2b(f"{normalize_poi_name(name)}|{cell[0]}|{cell[1]}".encode("utf-8"),
+                             digest_size=8).hexdigest()
+    return f"{prefix}_{digest}"
+
+class POIIdentityMap:
+    """Cross-source id map: any source id (LLM content id, place_id) → canonical id
+
+    Places are indexed by normalized name so a POI reported by another source
+    resolves to the existing canonical id when it lies within
+    MATCH_RADIUS_MILES, even though its own id differs. That name match also
+    makes the alias table a cache: at most `max_aliases` source ids are kept
+    (least recently used go first), and an evicted one resolves back to the
+    same canonical id. Safe to share between threads.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_aliases: int = DEFAULT_MAX_ALIASES):
+        self.path = Path(path) if path else None
+        self.max_aliases = max_aliases
+        self.aliases: "OrderedDict[str, str]" = OrderedDict()
+        self.places: Dict[str, Dict] = {}
+        self._by_name: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            self._load()
+
+    def _load(self):
+        with open(self.path) as f:
+            data = json.load(f)
+        self.aliases = OrderedDict(data.get("aliases", {}))
+        self._prune_aliases()
+        for canonical_id, place in data.get("places", {}).items():
+            self._add_place(canonical_id, place)
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with self._lock:
+            tmp_path.write_text(json.dumps({"aliases": self.aliases, "places": self.places}))
+            os.replace(tmp_path, self.path)
+
+    def _prune_aliases(self):
+        while len(self.aliases) > self.max_aliases:
+            self.aliases.popitem(last=False)
+
+    def _add_place(self, canonical_id: str, place: Dict):
+        self.places[canonical_id] = place
+        self._by_name.setdefault(place["name"], []).append(canonical_id)
+
+    def lookup(self, source_id: str) -> Optional[str]:
+        with self._lock:
+            canonical_id = self.aliases.get(source_id)
+            if canonical_id is not None:
+                self.aliases.move_to_end(source_id)
+            return canonical_id
+
+    def resolve(self, source_id: str, name: str, latitude: float, longitude: float,
+                source: str = "llm") -> str:
+        """Canonical id for a POI, registering it (and its source id) if new"""
+        with self._lock:
+            canonical_id = self.aliases.get(source_id)
+            if canonical_id is not None:
+                self.aliases.move_to_end(source_id)
+                return canonical_id
+            return self._assign(source_id, name, latitude, longitude, source)
+
+    def _assign(self, source_id: str, name: str, latitude: float, longitude: float, source: str) -> str:
+        canonical_id = None
+        normalized = normalize_poi_name(name)
+        for candidate in self._by_name.get(normalized, ()):
+            place = self.places[candidate]
+            if haversine_miles(latitude, longitude, place["latitude"], place["longitude"]) <= MATCH_RADIUS_MILES:
+                canonical_id = candidate
+                break
+
+        if canonical_id is None:
+            canonical_id = stable_poi_id(name, latitude, longitude)
+            self._add_place(canonical_id, {"name": normalized, "latitude": latitude,
+                                           "longitude": longitude, "sources": {}})
+
+        self.places[canonical_id]["sources"][source] = source_id
+        self.aliases[source_id] = canonical_id
+        self._prune_aliases()
+        return canonical_id
+
+    def source_ids(self, canonical_id: str) -> Dict[str, str]:
+        """Per-source ids known for a canonical POI, e.g. {"llm": ..., "api": place_id}"""
+        with self._lock:
+            place = self.places.get(canonical_id)
+            return dict(place["sources"]) if place else {}
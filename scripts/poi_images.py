@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+
+"""
+POI Image Prefetch and Thumbnail Cache
+
+Fetches POIData.image_url photos for the top-k results ahead of rendering,
+downsizes them to thumbnails and keeps them on disk so repeated renders never
+re-download.
+
+- An asyncio pipeline runs on one background thread. Fetches share a small
+  keep-alive connection pool; its size bounds how many requests are in
+  flight at once, across all hosts.
+- Concurrent requests for the same URL are coalesced into one fetch.
+- Resizing runs in a worker thread so it never stalls the event loop. It
+  needs Pillow; without it the prefetcher refuses to start rather than
+  filling the cache with full-size photos.
+- Thumbnails are stored content-addressed (sha256 of the thumbnail bytes), so
+  photo URLs that serve identical images share one file. A URL → digest index
+  and a byte-size LRU bound the cache on disk.
+
+A failed fetch (bad status, broken connection, undecodable image) is
+counted in `failures` and comes back as None. It never aborts the other
+photos in the batch.
+
+Usage:
+    python3 scripts/poi_images.py --cache-dir /tmp/thumbs URL [URL ...]
+    python3 -m pytest scripts/test_poi_images.py -q
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import zlib
+import struct
+import asyncio
+import hashlib
+import argparse
+import tempfile
+import threading
+import urllib.parse
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+DEFAULT_THUMBNAIL_PX = 256
+MAX_REDIRECTS = 3
+
+PILLOW_MISSING = "Pillow is required for photo thumbnails (pip install Pillow)"
+
+def make_thumbnail(data: bytes, max_px: int = DEFAULT_THUMBNAIL_PX, quality: int = 80) -> bytes:
+    """Downsize an image to fit in max_px x max_px (JPEG)"""
+    if Image is None:
+        raise RuntimeError(PILLOW_MISSING)
+    with Image.open(io.BytesIO(data)) as image:
+        image.thumbnail((max_px, max_px))
+        out = io.BytesIO()
+        image.convert("RGB").save(out, "JPEG", quality=quality, optimize=True)
+        return out.getvalue()
+
+class ThumbnailCache:
+    """Content-addressed thumbnail files with a byte-size LRU bound
+
+    Files live at <root>/<digest[:2]>/<digest>.thumb. index.json maps each
+    URL to a digest and records blob sizes in least- to most-recently-used
+    order. Evicting a blob drops every URL that pointed at it.
+    """
+
+    INDEX_NAME = "index.json"
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._urls: Dict[str, str] = {}
+        self._blobs: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._load_index()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.thumb"
+
+    def _load_index(self):
+        index_path = self.root / self.INDEX_NAME
+        if not index_path.exists():
+            return
+        try:
+            index = json.loads(index_path.read_text())
+        except (OSError, ValueError):
+            return
+        for digest, size in index.get("blobs", []):
+            if self._blob_path(digest).exists():
+                self._blobs[digest] = size
+                self.total_bytes += size
+        self._urls = {url: digest for url, digest in index.get("urls", {}).items() if digest in self._blobs}
+
+    def save_index(self):
+        with self._lock:
+            index = {"urls": dict(self._urls), "blobs": [[d, s] for d, s in self._blobs.items()]}
+        tmp_path = self.root / f"{self.INDEX_NAME}.tmp"
+        tmp_path.write_text(json.dumps(index))
+        os.replace(tmp_path, self.root / self.INDEX_NAME)
+
+    def get(self, url: str) -> Optional[Path]:
+        """Cached thumbnail path for a URL (marks it recently used)"""
+        with self._lock:
+            digest = self._urls.get(url)
+            if digest is None:
+                self.misses += 1
+                return None
+            self._blobs.move_to_end(digest)
+            self.hits += 1
+        return self._blob_path(digest)
+
+    def put(self, url: str, data: bytes) -> Path:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        with self._lock:
+            known = digest in self._blobs
+        if not known:
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        with self._lock:
+            if digest not in self._blobs:
+                self._blobs[digest] = len(data)
+                self.total_bytes += len(data)
+            self._blobs.move_to_end(digest)
+            self._urls[url] = digest
+            evicted = self._evict_locked(keep=digest)
+        for old in evicted:
+            self._blob_path(old).unlink(missing_ok=True)
+        return path
+
+    def _evict_locked(self, keep: str) -> List[str]:
+        evicted = []
+        while self.total_bytes > self.max_bytes and len(self._blobs) > 1:
+            digest, size = next(iter(self._blobs.items()))
+            if digest == keep:
+                break
+            del self._blobs[digest]
+            self.total_bytes -= size
+            evicted.append(digest)
+        if evicted:
+            gone = set(evicted)
+            self._urls = {url: d for url, d in self._urls.items() if d not in gone}
+        return evicted
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+class ConnectionPool:
+    """Bounded pool of keep-alive HTTP/1.1 connections for asyncio
+
+    At most `max_connections` requests are in flight at once (all hosts
+    together); idle connections are reused per (scheme, host, port).
+    """
+
+    def __init__(self, max_connections: int = 6, timeout_s: float = 10.0):
+        self.max_connections = max_connections
+        self.timeout_s = timeout_s
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: Dict[Tuple[str, str, int], List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]]] = {}
+        self.connections_opened = 0
+        self.requests_sent = 0
+
+    async def get(self, url: str) -> Tuple[int, Dict[str, str], bytes]:
+        """GET a URL, following redirects; returns (status, headers, body)"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_connections)
+        async with self._slots:
+            for _ in range(MAX_REDIRECTS + 1):
+                status, headers, body = await asyncio.wait_for(self._request(url), self.timeout_s)
+                if status in (301, 302, 303, 307, 308) and "location" in headers:
+                    url = urllib.parse.urljoin(url, headers["location"])
+                    continue
+                return status, headers, body
+            raise IOError(f"Too many redirects for {url}")
+
+    async def _request(self, url: str) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urllib.parse.urlsplit(url)
+        scheme = parts.scheme or "http"
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        idle = self._idle.setdefault(key, [])
+        # A pooled connection may have been closed by the server; retry once fresh
+        for attempt in range(2):
+            reused = bool(idle)
+            if reused:
+                reader, writer = idle.pop()
+            else:
+                reader, writer = await asyncio.open_connection(parts.hostname, port, ssl=scheme == "https")
+                self.connections_opened += 1
+            try:
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                             f"Accept: image/*\r\nConnection: keep-alive\r\n\r\n".encode("latin-1"))
+                await writer.drain()
+                self.requests_sent += 1
+                status, headers, body = await self._read_response(reader)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            if headers.get("connection", "").lower() == "close":
+                writer.close()
+            else:
+                idle.append((reader, writer))
+            return status, headers, body
+        raise ConnectionError(f"Could not fetch {url}")
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str], bytes]:
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            headers["connection"] = "close"
+        return status, headers, body
+
+    def close(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+class ImagePrefetcher:
+    """Async photo → thumbnail pipeline running on its own event-loop thread
+
+    prefetch_pois() is safe to call from synchronous code (the orchestrator);
+    it returns immediately with a concurrent.futures.Future.
+    """
+
+    def __init__(self, cache: ThumbnailCache, max_connections: int = 6,
+                 thumbnail_px: int = DEFAULT_THUMBNAIL_PX, timeout_s: float = 10.0):
+        if Image is None:
+            raise RuntimeError(PILLOW_MISSING)
+        self.cache = cache
+        self.thumbnail_px = thumbnail_px
+        self.pool = ConnectionPool(max_connections, timeout_s)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.failures = 0
+
+    async def fetch_thumbnail(self, url: str) -> Optional[Path]:
+        """Thumbnail path for a photo URL, fetching it on a cache miss (None on failure)"""
+        cached = self.cache.get(url)
+        if cached is not None:
+            return cached
+        pending = self._inflight.get(url)
+        if pending is not None:
+            return await pending
+
+        pending = asyncio.get_running_loop().create_future()
+        self._inflight[url] = pending
+        path = None
+        try:
+            status, _, body = await self.pool.get(url)
+            if status == 200 and body:
+                thumbnail = await asyncio.to_thread(make_thumbnail, body, self.thumbnail_px)
+                path = self.cache.put(url, thumbnail)
+            else:
+                self.failures += 1
+        except Exception:
+            # Anything from a truncated body to an undecodable image fails this photo only
+            self.failures += 1
+        finally:
+            del self._inflight[url]
+            pending.set_result(path)
+        return path
+
+    async def prefetch(self, urls: Iterable[str]) -> Dict[str, Optional[Path]]:
+        unique = list(dict.fromkeys(url for url in urls if url))
+        paths = await asyncio.gather(*(self.fetch_thumbnail(url) for url in unique))
+        return dict(zip(unique, paths))
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever,
+                                                name="poi-image-prefetch", daemon=True)
+                self._thread.start()
+        return self._loop
+
+    def submit(self, urls: Iterable[str]) -> Future:
+        """Schedule a prefetch from any thread"""
+        return asyncio.run_coroutine_threadsafe(self.prefetch(list(urls)), self._ensure_loop())
+
+    def prefetch_pois(self, pois: Iterable[Any], top_k: int = 5) -> Future:
+        """Prefetch photos for the first `top_k` ranked POIs (POIData or dicts)"""
+        urls = []
+        for poi in pois:
+            url = poi.get("image_url") if isinstance(poi, dict) else getattr(poi, "image_url", None)
+            if url:
+                urls.append(url)
+            if len(urls) >= top_k:
+                break
+        return self.submit(urls)
+
+    def close(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._close_pool(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+        self.cache.save_index()
+
+    async def _close_pool(self):
+        self.pool.close()
+
+# ----------------------------------------------------------------------------
+# Local stand-in image server (used by test_poi_images.py)
+
+def _solid_png(width: int, height: int, rgb: Tuple[int, int, int]) -> bytes:
+    """Minimal PNG encoder for stand-in photos"""
+    def chunk(kind: bytes, payload: bytes) -> bytes:
+        return struct.pack(">I", len(payload)) + kind + payload + \
+            struct.pack(">I", zlib.crc32(kind + payload) & 0xFFFFFFFF)
+    row = b"\x00" + bytes(rgb) * width
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) +
+            chunk(b"IDAT", zlib.compress(row * height, 6)) + chunk(b"IEND", b""))
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    """GET /photo/<n> serves a photo; /redirect/<n> 302s to it like the Places photo API
+
+    /garbage/<n> serves bytes that aren't an image, and /truncated/<n> closes
+    the connection partway through the body.
+    """
+    protocol_version = "HTTP/1.1"
+    delay_s = 0.05
+    state: Dict[str, int] = {}
+    state_lock = threading.Lock()
+
+    def do_GET(self):
+        with self.state_lock:
+            self.state["requests"] += 1
+            self.state["active"] += 1
+            self.state["peak"] = max(self.state["peak"], self.state["active"])
+        try:
+            kind, _, ident = self.path.strip("/").partition("/")
+            if kind == "redirect":
+                self.send_response(302)
+                self.send_header("Location", f"/photo/{ident}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if kind in ("garbage", "truncated"):
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", "1000")
+                self.end_headers()
+                self.wfile.write(b"not a png" * (111 if kind == "garbage" else 1) + b"!")
+                self.close_connection = True
+                return
+            if kind != "photo" or not ident.isdigit():
+                self.send_error(404)
+                return
+            time.sleep(self.delay_s)
+            n = int(ident)
+            # Photos 0/1, 2/3, ... are identical to exercise content addressing
+            body = _solid_png(640, 480, ((n // 2) * 37 % 256, (n // 2) * 91 % 256, 128))
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with self.state_lock:
+                self.state["active"] -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+def start_image_server(delay_s: float = 0.05, host: str = "127.0.0.1",
+                       port: int = 0) -> Tuple[ThreadingHTTPServer, Dict[str, int]]:
+    """Serve stand-in photos on a background thread; returns (server, request counters)"""
+    state = {"requests": 0, "active": 0, "peak": 0}
+    handler = type("ImageHandler", (_ImageHandler,), {"delay_s": delay_s, "state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prefetch POI photos into the thumbnail cache")
+    parser.add_argument("urls", nargs="*", help="Photo URLs to prefetch")
+    parser.add_argument("--cache-dir", type=Path, default=Path("poi_thumbnails"))
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_CACHE_BYTES)
+    parser.add_argument("--max-connections", type=int, default=6)
+    parser.add_argument("--size", type=int, default=DEFAULT_THUMBNAIL_PX, help="Thumbnail edge in pixels")
+    args = parser.parse_args(argv)
+
+    if Image is None:
+        print(f"❌ {PILLOW_MISSING}")
+        return 1
+    prefetcher = ImagePrefetcher(ThumbnailCache(args.cache_dir, args.max_bytes),
+                                 max_connections=args.max_connections, thumbnail_px=args.size)
+    try:
+        for url, path in prefetcher.submit(args.urls).result().items():
+            print(f"{'✅' if path else '❌'} {url} -> {path}")
+    finally:
+        prefetcher.close()
+    return 0 if prefetcher.failures == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
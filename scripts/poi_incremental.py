@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+"""
+Incremental POI result-set maintenance for a moving vehicle
+
+A car moving 100m barely changes the ranked POI set, so instead of running a
+full search and sort for every GPS fix this engine keeps a candidate pool
+around the last fetch position and, per fix:
+
+- recomputes all candidate distances in one vectorized pass (numpy when
+  available, a flat array pass otherwise)
+- admits/evicts only candidates that crossed the search-radius frontier
+- re-ranks only when membership changed or distance tie-breaks moved
+- emits a ResultDelta (added / removed / reordered / distance updates)
+  for the client instead of the full list
+
+The pool is refilled from the source only when the vehicle drifts far enough
+that POIs outside the pool could enter the search radius.
+"""
+
+import math
+import heapq
+import array
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from poi_geo import EARTH_RADIUS_MILES, haversine_miles
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# fetch(latitude, longitude, radius_miles) -> list of POIData
+PoolFetcher = Callable[[float, float, float], List[Any]]
+
+@dataclass
+class ResultDelta:
+    """Changes since the previous GPS fix"""
+    added: List[Dict[str, Any]] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    order: Optional[List[str]] = None  # Full id order, only when it changed
+    distances: Dict[str, float] = field(default_factory=dict)
+    refilled: bool = False
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.order or self.distances)
+
+class IncrementalResultSet:
+    """Keeps the top-k POIs within `radius_miles` current as the user moves"""
+
+    def __init__(self, fetch: PoolFetcher, radius_miles: float = 10.0, max_results: int = 8,
+                 pool_margin_miles: float = 5.0, distance_precision: float = 0.1):
+        self.fetch = fetch
+        self.radius_miles = radius_miles
+        self.max_results = max_results
+        self.pool_margin_miles = pool_margin_miles
+        self.distance_precision = distance_precision
+
+        self.pool: List[Any] = []
+        self.pool_center: Optional[Tuple[float, float]] = None
+        self._lat_rad = array.array("d")
+        self._lon_rad = array.array("d")
+        self._ratings: List[float] = []
+        self._inside: List[int] = []
+        self._visible: List[int] = []  # Pool indices of the ranked results
+        self._visible_ids: List[str] = []
+        self._reported_distance: Dict[str, float] = {}
+
+    def _refill(self, latitude: float, longitude: float):
+        pool_radius = self.radius_miles + self.pool_margin_miles
+        self.pool = list(self.fetch(latitude, longitude, pool_radius))
+        self.pool_center = (latitude, longitude)
+        self._ratings = [poi.rating for poi in self.pool]
+        self._lat_rad = array.array("d", (math.radians(p.latitude) for p in self.pool))
+        self._lon_rad = array.array("d", (math.radians(p.longitude) for p in self.pool))
+        if np is not None:
+            self._lat_np = np.frombuffer(self._lat_rad, dtype=np.float64)
+            self._lon_np = np.frombuffer(self._lon_rad, dtype=np.float64)
+        self._inside = []
+        self._visible = []
+
+    def _distances(self, latitude: float, longitude: float):
+        """Haversine distance from the user to every pool candidate in one pass"""
+        lat0 = math.radians(latitude)
+        lon0 = math.radians(longitude)
+        if np is not None:
+            d_lat = self._lat_np - lat0
+            d_lon = self._lon_np - lon0
+            a = np.sin(d_lat / 2) ** 2 + math.cos(lat0) * np.cos(self._lat_np) * np.sin(d_lon / 2) ** 2
+            return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+        cos0 = math.cos(lat0)
+        sin, cos, asin, sqrt = math.sin, math.cos, math.asin, math.sqrt
+        return [2 * EARTH_RADIUS_MILES * asin(sqrt(min(1.0, sin((la - lat0) / 2) ** 2 +
+                                                        cos0 * cos(la) * sin((lo - lon0) / 2) ** 2)))
+                for la, lo in zip(self._lat_rad, self._lon_rad)]
+
+    def _within_radius(self, distances) -> List[int]:
+        if np is not None:
+            return np.flatnonzero(distances <= self.radius_miles).tolist()
+        radius = self.radius_miles
+        return [i for i, distance in enumerate(distances) if distance <= radius]
+
+    def _needs_refill(self, latitude: float, longitude: float) -> bool:
+        if self.pool_center is None:
+            return True
+        drift = haversine_miles(latitude, longitude, *self.pool_center)
+        return drift > self.pool_margin_miles
+
+    def update(self, latitude: float, longitude: float) -> ResultDelta:
+        """Process one GPS fix and return what changed for the client"""
+        delta = ResultDelta()
+        if self._needs_refill(latitude, longitude):
+            self._refill(latitude, longitude)
+            delta.refilled = True
+
+        distances = self._distances(latitude, longitude)
+        ratings = self._ratings
+
+        # Frontier check: membership only changes when a candidate crosses the radius
+        inside = self._within_radius(distances)
+        membership_changed = delta.refilled or inside != self._inside
+
+        if membership_changed or len(self._visible) < self.max_results:
+            candidates = inside
+        else:
+            # Same members and ratings: only equal-rated POIs can overtake the
+            # last visible one via the distance tie-break
+            cutoff = min(ratings[i] for i in self._visible)
+            visible = set(self._visible)
+            candidates = self._visible + [i for i in inside if ratings[i] == cutoff and i not in visible]
+        self._inside = inside
+
+        new_visible = heapq.nsmallest(self.max_results, candidates, key=lambda i: (-ratings[i], distances[i]))
+        for i in new_visible:
+            self.pool[i].distance_from_user = float(distances[i])
+
+        # Diff by POI id so a pool refill (which renumbers indices) stays incremental
+        new_ids = [self.pool[i].id for i in new_visible]
+        old_ids = self._visible_ids
+        old_set = set(old_ids)
+        new_set = set(new_ids)
+        delta.added = [asdict(self.pool[i]) for i in new_visible if self.pool[i].id not in old_set]
+        delta.removed = [poi_id for poi_id in old_ids if poi_id not in new_set]
+        if new_ids != old_ids:
+            delta.order = new_ids
+
+        reported = {}
+        for i, poi_id in zip(new_visible, new_ids):
+            distance = round(round(float(distances[i]) / self.distance_precision) * self.distance_precision, 3)
+            reported[poi_id] = distance
+            if poi_id in old_set and self._reported_distance.get(poi_id) != distance:
+                delta.distances[poi_id] = distance
+
+        self._visible = new_visible
+        self._visible_ids = new_ids
+        self._reported_distance = reported
+        return delta
+
+    @property
+    def results(self) -> List[Any]:
+        """Current ranked result list (full snapshot)"""
+        return [self.pool[i] for i in self._visible]
+
+def dataset_fetcher(dataset, cell_degrees: float = 0.25) -> PoolFetcher:
+    """Pool fetcher over a POIDataset from generate_poi_dataset using a grid index"""
+    grid: Dict[Tuple[int, int], List[int]] = {}
+    for i, (lat_e6, lon_e6) in enumerate(zip(dataset.latitudes, dataset.longitudes)):
+        key = (int(lat_e6 / 1e6 // cell_degrees), int(lon_e6 / 1e6 // cell_degrees))
+        grid.setdefault(key, []).append(i)
+
+    def fetch(latitude: float, longitude: float, radius_miles: float) -> List[Any]:
+        lat_span = radius_miles / 69.0
+        lon_span = radius_miles / (69.0 * max(0.01, math.cos(math.radians(latitude))))
+        pois = []
+        for row in range(int((latitude - lat_span) // cell_degrees), int((latitude + lat_span) // cell_degrees) + 1):
+            for col in range(int((longitude - lon_span) // cell_degrees),
+                             int((longitude + lon_span) // cell_degrees) + 1):
+                for i in grid.get((row, col), ()):
+                    poi = dataset.to_poi_data(i, latitude, longitude)
+                    if poi.distance_from_user <= radius_miles:
+                        pois.append(poi)
+        return pois
+    return fetch
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+
+"""
+Concurrent Load Generator for the POI Orchestrator
+
+Drives many virtual users through the POI search path and reports sustained
+throughput, latency percentiles per load level and the saturation point.
+
+Targets:
+- inprocess: calls DualPOISearchOrchestrator.search_hybrid directly
+- http: a local HTTP stand-in (GET /pois/search) wrapping the orchestrator,
+  or any compatible server given with --url
+
+Modes:
+- closed: N users each issue a request, wait for it, think, repeat
+- open: requests arrive at a fixed Poisson rate regardless of completions;
+  latency is measured from the scheduled arrival time so queueing delay is
+  not hidden (no coordinated omission)
+
+Usage:
+    python3 scripts/poi_load_test.py --mode closed --levels 1 4 16 64
+    python3 scripts/poi_load_test.py --target http --mode open --levels 10 50 100 200
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import contextlib
+import http.client
+import urllib.parse
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from latency_histogram import LatencyHistogram
+from demo_dual_poi_search import DualPOISearchOrchestrator
+from poi_serialization import BinarySerializer, SERIALIZERS
+
+QUERIES = [
+    {"location": "Lost Lake, Oregon", "latitude": 45.4979, "longitude": -121.8209},
+    {"location": "Seattle, Washington", "latitude": 47.6062, "longitude": -122.3321},
+    {"location": "Unknown Location", "latitude": 43.0, "longitude": -118.0}
+]
+
+SearchCall = Callable[[Dict[str, Any]], None]
+
+@dataclass
+class LevelResult:
+    """Outcome of running one load level"""
+    level: float
+    duration_s: float
+    completed: int
+    errors: int
+    histogram: LatencyHistogram
+    offered_qps: Optional[float] = None
+
+    @property
+    def qps(self) -> float:
+        return self.completed / self.duration_s if self.duration_s else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"level": self.level, "qps": round(self.qps, 2), "offered_qps": self.offered_qps,
+                "completed": self.completed, "errors": self.errors,
+                "latency": self.histogram.summary_ms()}
+
+def in_process_target(latency_scale: float) -> SearchCall:
+    orchestrator = DualPOISearchOrchestrator(latency_scale=latency_scale)
+
+    def call(query: Dict[str, Any]):
+        orchestrator.search_hybrid(query["location"], query["latitude"], query["longitude"])
+    return call
+
+def http_target(base_url: str) -> SearchCall:
+    """Keep-alive HTTP client with one connection per worker thread"""
+    parsed = urllib.parse.urlparse(base_url)
+    local = threading.local()
+
+    def call(query: Dict[str, Any]):
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+        params = urllib.parse.urlencode({"location": query["location"], "lat": query["latitude"],
+                                         "lng": query["longitude"]})
+        try:
+            conn.request("GET", f"{parsed.path.rstrip('/')}/pois/search?{params}")
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            local.conn = None
+            raise
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}")
+    return call
+
+class _SearchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    orchestrator: DualPOISearchOrchestrator = None
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path != "/pois/search":
+            self.send_error(404)
+            return
+        params = urllib.parse.parse_qs(url.query)
+        try:
+            results = self.orchestrator.search_hybrid(
+                params["location"][0], float(params["lat"][0]), float(params["lng"][0]),
+                category=params.get("category", ["attraction"])[0],
+                max_results=int(params.get("max_results", ["8"])[0])
+            )
+        except (KeyError, ValueError):
+            self.send_error(400)
+            return
+        # ?format=binary or an Accept header selects the compact encoding
+        wants_binary = BinarySerializer.content_type in self.headers.get("Accept", "")
+        serializer = SERIALIZERS.get(params.get("format", ["binary" if wants_binary else "json"])[0])
+        if serializer is None:
+            self.send_error(400)
+            return
+        body = serializer.encode(results)
+        self.send_response(200)
+        self.send_header("Content-Type", serializer.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_standin_server(latency_scale: float, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Serve the orchestrator over HTTP on a background thread"""
+    handler = type("SearchHandler", (_SearchHandler,),
+                   {"orchestrator": DualPOISearchOrchestrator(latency_scale=latency_scale)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run_closed_loop(call: SearchCall, users: int, duration_s: float, think_time_s: float) -> LevelResult:
+    """`users` threads each loop request → think until the deadline"""
+    histogram = LatencyHistogram()
+    lock = threading.Lock()
+    counters = {"completed": 0, "errors": 0}
+    deadline = time.perf_counter() + duration_s
+
+    def user(user_id: int):
+        rng = random.Random(user_id)
+        local_hist = LatencyHistogram()
+        completed = errors = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter_ns()
+            try:
+                call(rng.choice(QUERIES))
+                completed += 1
+                local_hist.record(time.perf_counter_ns() - start)
+            except Exception:
+                errors += 1
+            if think_time_s:
+                time.sleep(rng.expovariate(1 / think_time_s))
+        with lock:
+            histogram.merge(local_hist)
+            counters["completed"] += completed
+            counters["errors"] += errors
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return LevelResult(users, time.perf_counter() - start, counters["completed"], counters["errors"], histogram)
+
+def run_open_loop(call: SearchCall, rate_qps: float, duration_s: float, max_workers: int) -> LevelResult:
+    """Poisson arrivals at `rate_qps`; latency includes time spent queued"""
+    histogram = LatencyHistogram()
+    lock = threading.Lock()
+    counters = {"completed": 0, "errors": 0}
+    rng = random.Random(int(rate_qps * 1000))
+
+    def request(scheduled_ns: int, query: Dict[str, Any]):
+        try:
+            call(query)
+            latency = time.perf_counter_ns() - scheduled_ns
+            with lock:
+                histogram.record(latency)
+                counters["completed"] += 1
+        except Exception:
+            with lock:
+                counters["errors"] += 1
+
+    start_ns = time.perf_counter_ns()
+    end_ns = start_ns + int(duration_s * 1e9)
+    next_ns = start_ns
+    submitted = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while next_ns < end_ns:
+            delay = (next_ns - time.perf_counter_ns()) / 1e9
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(request, next_ns, rng.choice(QUERIES))
+            submitted += 1
+            next_ns += int(rng.expovariate(rate_qps) * 1e9)
+    # Elapsed includes draining the backlog, so a saturated server shows qps < offered
+    elapsed = (time.perf_counter_ns() - start_ns) / 1e9
+    return LevelResult(rate_qps, elapsed, counters["completed"], counters["errors"], histogram,
+                       offered_qps=round(submitted / duration_s, 2))
+
+def find_saturation(levels: List[LevelResult], mode: str) -> Optional[float]:
+    """First load level where the system stops keeping up
+
+    Open loop: achieved QPS falls below 90% of the rate actually offered.
+    Closed loop: adding users raises QPS by <10% while p95 latency grows >50%.
+    """
+    for previous, current in zip([None] + levels[:-1], levels):
+        if mode == "open":
+            if current.qps < 0.9 * current.offered_qps:
+                return current.level
+        elif previous is not None:
+            qps_gain = current.qps / previous.qps if previous.qps else 0
+            p95_growth = (current.histogram.value_at_percentile(95) /
+                          max(1, previous.histogram.value_at_percentile(95)))
+            if qps_gain < 1.1 and p95_growth > 1.5:
+                return current.level
+    return None
+
+def print_curve(results: List[LevelResult], mode: str, saturation: Optional[float]):
+    unit = "users" if mode == "closed" else "offered qps"
+    print(f"\n📈 LATENCY VS LOAD ({mode} loop)")
+    print("=" * 80)
+    print(f"{unit:>12} {'qps':>9} {'ok':>7} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for r in results:
+        s = r.histogram.summary_ms()
+        marker = " ⚠️ saturated" if saturation is not None and r.level == saturation else ""
+        print(f"{r.level:>12g} {r.qps:>9.1f} {r.completed:>7} {r.errors:>5} {s['p50_ms']:>9.1f} "
+              f"{s['p95_ms']:>9.1f} {s['p99_ms']:>9.1f} {s['max_ms']:>9.1f}{marker}")
+    peak = max(results, key=lambda r: r.qps)
+    print(f"\n🚀 Peak sustained throughput: {peak.qps:.1f} QPS at {peak.level:g} {unit}")
+    if saturation is not None:
+        print(f"⚠️  Saturation point: {saturation:g} {unit}")
+    else:
+        print("✅ No saturation within the tested levels")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the POI search orchestrator")
+    parser.add_argument("--target", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--url", help="Existing server base URL (default: start a local stand-in)")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--levels", type=float, nargs="+", default=[1, 2, 4, 8, 16, 32],
+                        help="Virtual users (closed) or arrival rates in QPS (open)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per load level")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean think time (closed loop)")
+    parser.add_argument("--max-workers", type=int, default=256, help="Worker pool size (open loop)")
+    parser.add_argument("--latency-scale", type=float, default=0.05,
+                        help="Scale applied to simulated LLM/API latency")
+    parser.add_argument("--output", type=Path, help="Write the latency/load curve to JSON")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.target == "http":
+        if args.url:
+            base_url = args.url
+        else:
+            server = start_standin_server(args.latency_scale)
+            base_url = f"http://127.0.0.1:{server.server_address[1]}"
+            print(f"🌐 Local stand-in server at {base_url}")
+        call = http_target(base_url)
+    else:
+        call = in_process_target(args.latency_scale)
+
+    print(f"🏋️  POI LOAD TEST: target={args.target} mode={args.mode} levels={args.levels}")
+    results = []
+    try:
+        with open(os.devnull, "w") as devnull:
+            for level in args.levels:
+                print(f"   ▶ level {level:g} for {args.duration:g}s...", flush=True)
+                with contextlib.redirect_stdout(devnull):
+                    if args.mode == "closed":
+                        result = run_closed_loop(call, int(level), args.duration, args.think_time)
+                    else:
+                        result = run_open_loop(call, level, args.duration, args.max_workers)
+                results.append(result)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    saturation = find_saturation(results, args.mode)
+    print_curve(results, args.mode, saturation)
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "target": args.target, "mode": args.mode, "duration_s": args.duration,
+            "latency_scale": args.latency_scale, "saturation_level": saturation,
+            "levels": [r.to_dict() for r in results]
+        }, indent=2))
+        print(f"\n💾 Results saved to: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+
+"""
+Serializers for POI search results and demo reports
+
+Orchestrator result dicts (search_hybrid and friends) can be encoded by any
+serializer registered in SERIALIZERS:
+
+- "json": compact JSON (no indentation)
+- "binary": a columnar layout for transport and caches. Non-POI fields
+  travel as a small JSON header. Each POI list is written as typed numeric
+  columns (array.tobytes) plus one UTF-8 string blob per text field with a
+  length column, the same approach generate_poi_dataset uses for datasets.
+  Values that don't fit their column (a missing key, None in a numeric
+  field, an int where a float is expected) and keys outside the POIData
+  schema go in a per-list JSON overflow record, so decode(encode(x)) == x
+  for any JSON-serializable POI dicts.
+
+poi_to_dict() is a shallow replacement for dataclasses.asdict on POIData.
+POIData fields are all scalars, so asdict's recursive deepcopy is pure
+overhead. StreamingJSONWriter writes reports one result at a time instead
+of building the full document and calling json.dump(..., indent=2).
+
+Usage:
+    python3 scripts/poi_serialization.py --benchmark
+"""
+
+import io
+import sys
+import json
+import time
+import array
+import struct
+import argparse
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, IO, List, Optional
+
+BINARY_MAGIC = b"POIR"
+BINARY_VERSION = 2
+_HEADER = struct.Struct("<4sBII")  # magic, version, header JSON length, POI list count
+
+POI_LIST_KEYS = ("llm_results", "api_results", "merged_results")
+STRING_FIELDS = ("id", "name", "description", "category", "image_url", "review_summary", "address")
+FLOAT_FIELDS = ("latitude", "longitude", "distance_from_user", "rating")
+COLUMN_FIELDS = FLOAT_FIELDS + ("price_level", "could_earn_revenue") + STRING_FIELDS
+_COLUMN_FIELD_SET = frozenset(COLUMN_FIELDS)
+_NULL_LENGTH = -1
+_MISSING = object()
+_STRING_TYPES = frozenset({str, type(None)})
+_COLUMN_TYPES = {**{field: frozenset({float}) for field in FLOAT_FIELDS},
+                 "price_level": frozenset({int}), "could_earn_revenue": frozenset({bool})}
+
+def _fits_column(field: str, value: Any) -> bool:
+    """True if `value` round-trips exactly through the typed column for `field`"""
+    if field in FLOAT_FIELDS:
+        return type(value) is float
+    if field == "price_level":
+        return type(value) is int and -128 <= value <= 127
+    if field == "could_earn_revenue":
+        return type(value) is bool
+    return value is None or type(value) is str
+
+def poi_to_dict(poi: Any) -> Dict[str, Any]:
+    """Shallow dict of a POIData (equivalent to asdict for its scalar fields)"""
+    return dict(poi.__dict__)
+
+class JSONSerializer:
+    name = "json"
+    content_type = "application/json"
+
+    def encode(self, results: Dict[str, Any]) -> bytes:
+        return json.dumps(results, separators=(",", ":")).encode("utf-8")
+
+    def decode(self, payload: bytes) -> Dict[str, Any]:
+        return json.loads(payload)
+
+class BinarySerializer:
+    """Columnar binary encoding of orchestrator results"""
+    name = "binary"
+    content_type = "application/x-poi-results"
+
+    def encode(self, results: Dict[str, Any]) -> bytes:
+        header = {key: value for key, value in results.items() if key not in POI_LIST_KEYS}
+        lists = [(key, results[key]) for key in POI_LIST_KEYS if key in results]
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+        out = io.BytesIO()
+        out.write(_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(header_bytes), len(lists)))
+        out.write(header_bytes)
+        for key, pois in lists:
+            key_bytes = key.encode("utf-8")
+            out.write(struct.pack("<BI", len(key_bytes), len(pois)))
+            out.write(key_bytes)
+            self._encode_pois(out, pois)
+        return out.getvalue()
+
+    @staticmethod
+    def _column(rows: List[Dict[str, Any]], field: str, placeholder: Any,
+                overflow: Dict[int, Dict[str, Any]]) -> List[Any]:
+        """Values for one typed column; rows whose value doesn't fit get a placeholder plus an overflow entry"""
+        values = [row.get(field, _MISSING) for row in rows]
+        # Fast path: every value already has the column's type
+        if {type(value) for value in values} <= _COLUMN_TYPES.get(field, _STRING_TYPES) and \
+                (field != "price_level" or not values or -128 <= min(values) and max(values) <= 127):
+            return values
+        for i, value in enumerate(values):
+            if _fits_column(field, value):
+                continue
+            entry = overflow.setdefault(i, {})
+            if value is _MISSING:
+                entry.setdefault("missing", []).append(field)
+            else:
+                entry.setdefault("set", {})[field] = value
+            values[i] = placeholder
+        return values
+
+    @classmethod
+    def _encode_pois(cls, out: io.BytesIO, pois: List[Any]):
+        rows = [poi if isinstance(poi, dict) else poi.__dict__ for poi in pois]
+        overflow: Dict[int, Dict[str, Any]] = {}
+        for field in FLOAT_FIELDS:
+            out.write(array.array("d", cls._column(rows, field, 0.0, overflow)).tobytes())
+        out.write(array.array("b", cls._column(rows, "price_level", 0, overflow)).tobytes())
+        out.write(array.array("B", cls._column(rows, "could_earn_revenue", False, overflow)).tobytes())
+        for field in STRING_FIELDS:
+            values = cls._column(rows, field, None, overflow)
+            encoded = [b"" if value is None else value.encode("utf-8") for value in values]
+            lengths = array.array("i", [_NULL_LENGTH if value is None else len(data)
+                                        for value, data in zip(values, encoded)])
+            blob = b"".join(encoded)
+            out.write(lengths.tobytes())
+            out.write(struct.pack("<I", len(blob)))
+            out.write(blob)
+
+        for i, row in enumerate(rows):
+            if not row.keys() <= _COLUMN_FIELD_SET:
+                extra = overflow.setdefault(i, {}).setdefault("set", {})
+                extra.update((key, value) for key, value in row.items() if key not in _COLUMN_FIELD_SET)
+        try:
+            overflow_bytes = json.dumps(overflow, separators=(",", ":")).encode("utf-8") if overflow else b""
+        except TypeError as e:
+            raise ValueError(f"POI field value cannot be serialized: {e}") from None
+        out.write(struct.pack("<I", len(overflow_bytes)))
+        out.write(overflow_bytes)
+
+    def decode(self, payload: bytes) -> Dict[str, Any]:
+        view = memoryview(payload)
+        magic, version, header_length, list_count = _HEADER.unpack_from(view, 0)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError("Not a POI results payload")
+        offset = _HEADER.size
+        results = json.loads(bytes(view[offset:offset + header_length]))
+        offset += header_length
+        for _ in range(list_count):
+            key_length, count = struct.unpack_from("<BI", view, offset)
+            offset += 5
+            key = bytes(view[offset:offset + key_length]).decode("utf-8")
+            offset += key_length
+            results[key], offset = self._decode_pois(view, offset, count)
+        return results
+
+    @staticmethod
+    def _decode_pois(view: memoryview, offset: int, count: int):
+        columns: Dict[str, List[Any]] = {}
+
+        def take(typecode: str) -> array.array:
+            nonlocal offset
+            column = array.array(typecode)
+            size = column.itemsize * count
+            column.frombytes(view[offset:offset + size])
+            offset += size
+            return column
+
+        for field in FLOAT_FIELDS:
+            columns[field] = take("d").tolist()
+        columns["price_level"] = take("b").tolist()
+        columns["could_earn_revenue"] = [bool(flag) for flag in take("B")]
+        for field in STRING_FIELDS:
+            lengths = take("i")
+            (blob_length,) = struct.unpack_from("<I", view, offset)
+            offset += 4
+            raw = bytes(view[offset:offset + blob_length])
+            offset += blob_length
+            # Lengths are byte counts; slice the decoded text directly when it is ASCII
+            blob = raw.decode("utf-8") if raw.isascii() else raw
+            values, position = [], 0
+            for length in lengths:
+                if length == _NULL_LENGTH:
+                    values.append(None)
+                    continue
+                value = blob[position:position + length]
+                values.append(value if blob is not raw else value.decode("utf-8"))
+                position += length
+            columns[field] = values
+
+        keys = list(columns)
+        rows = [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+        (overflow_length,) = struct.unpack_from("<I", view, offset)
+        offset += 4
+        if overflow_length:
+            overflow = json.loads(bytes(view[offset:offset + overflow_length]))
+            offset += overflow_length
+            for index, entry in overflow.items():
+                row = rows[int(index)]
+                for field in entry.get("missing", ()):
+                    del row[field]
+                row.update(entry.get("set", {}))
+        return rows, offset
+
+SERIALIZERS = {serializer.name: serializer for serializer in (JSONSerializer(), BinarySerializer())}
+
+def get_serializer(name: str):
+    try:
+        return SERIALIZERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown serializer '{name}' (choose from {', '.join(SERIALIZERS)})") from None
+
+class StreamingJSONWriter:
+    """Writes one JSON object incrementally: scalar fields plus one streamed array
+
+        with StreamingJSONWriter(f) as writer:
+            writer.write_field("test_timestamp", timestamp)
+            writer.begin_array("detailed_results")
+            for result in results:
+                writer.write_item(result)
+            writer.end_array()
+            writer.write_field("test_summary", summary)
+    """
+
+    def __init__(self, fp: IO[str]):
+        self.fp = fp
+        self._fields = 0
+        self._items: Optional[int] = None
+        self._encoder = json.JSONEncoder(separators=(",", ":"))
+        fp.write("{")
+
+    def _key(self, key: str):
+        self.fp.write(("," if self._fields else "") + "\n" + json.dumps(key) + ":")
+        self._fields += 1
+
+    def write_field(self, key: str, value: Any):
+        if self._items is not None:
+            raise RuntimeError("Cannot write a field while an array is open")
+        self._key(key)
+        self.fp.write(self._encoder.encode(value))
+
+    def begin_array(self, key: str):
+        self._key(key)
+        self.fp.write("[")
+        self._items = 0
+
+    def write_item(self, value: Any):
+        self.fp.write(",\n" if self._items else "\n")
+        self.fp.write(self._encoder.encode(value))
+        self._items += 1
+
+    def end_array(self):
+        self.fp.write("\n]")
+        self._items = None
+
+    def close(self):
+        if self._items is not None:
+            self.end_array()
+        self.fp.write("\n}\n")
+
+    def __enter__(self) -> "StreamingJSONWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+def _benchmark_results(pois_per_list: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Search results shaped like search_hybrid output, holding POIData objects"""
+    from generate_poi_dataset import generate_dataset
+
+    dataset = generate_dataset(pois_per_list * 3, seed=seed)
+    pois = [dataset.to_poi_data(i, 45.4979, -121.8209) for i in range(len(dataset))]
+    return [{
+        "location": "Lost Lake, Oregon",
+        "coordinates": {"latitude": 45.4979, "longitude": -121.8209},
+        "strategy": "hybrid",
+        "llm_pois": pois[:pois_per_list],
+        "api_pois": pois[pois_per_list:2 * pois_per_list],
+        "merged_pois": pois[:pois_per_list // 2] + pois[pois_per_list:pois_per_list + pois_per_list // 2],
+        "performance": {"llm_time_ms": 312.4, "api_time_ms": 844.1, "total_time_ms": 845.0},
+        "mock_data_check": {"found_mock_data": False, "mock_terms": []}
+    }]
+
+def _to_result_dict(raw: Dict[str, Any], to_dict) -> Dict[str, Any]:
+    result = {key: value for key, value in raw.items() if not key.endswith("_pois")}
+    result["llm_results"] = [to_dict(poi) for poi in raw["llm_pois"]]
+    result["api_results"] = [to_dict(poi) for poi in raw["api_pois"]]
+    result["merged_results"] = [to_dict(poi) for poi in raw["merged_pois"]]
+    return result
+
+def _time_ms(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        func()
+        best = min(best, (time.perf_counter_ns() - start) / 1e6)
+    return best
+
+def run_benchmark(pois_per_list: int = 8, searches: int = 50, repeat: int = 5) -> List[Dict[str, Any]]:
+    """Encode/decode cost and size of each path for `searches` search results"""
+    raw_results = _benchmark_results(pois_per_list) * searches
+    rows = []
+
+    def current_path():
+        report = [_to_result_dict(raw, asdict) for raw in raw_results]
+        return json.dumps({"detailed_results": report}, indent=2).encode("utf-8")
+
+    def streaming_path():
+        out = io.StringIO()
+        with StreamingJSONWriter(out) as writer:
+            writer.begin_array("detailed_results")
+            for raw in raw_results:
+                writer.write_item(_to_result_dict(raw, poi_to_dict))
+        return out.getvalue().encode("utf-8")
+
+    for label, encode in (("asdict + json.dump(indent=2)", current_path),
+                          ("poi_to_dict + streaming JSON", streaming_path)):
+        payload = encode()
+        rows.append({"path": label, "encode_ms": _time_ms(encode, repeat),
+                     "decode_ms": _time_ms(lambda: json.loads(payload), repeat), "bytes": len(payload)})
+
+    dicts = [_to_result_dict(raw, poi_to_dict) for raw in raw_results]
+    for serializer in SERIALIZERS.values():
+        payloads = [serializer.encode(result) for result in dicts]
+        assert serializer.decode(payloads[0]) == dicts[0], f"{serializer.name} round trip mismatch"
+        rows.append({
+            "path": f"poi_to_dict + {serializer.name} serializer",
+            "encode_ms": _time_ms(lambda: [serializer.encode(_to_result_dict(raw, poi_to_dict))
+                                           for raw in raw_results], repeat),
+            "decode_ms": _time_ms(lambda: [serializer.decode(p) for p in payloads], repeat),
+            "bytes": sum(len(p) for p in payloads)
+        })
+    return rows
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark POI result serializers")
+    parser.add_argument("--benchmark", action="store_true", help="Compare against asdict + json.dump")
+    parser.add_argument("--pois", type=int, default=8, help="POIs per result list")
+    parser.add_argument("--searches", type=int, default=50, help="Search results per report")
+    parser.add_argument("--encode", type=Path, help="Re-encode a saved demo report with --format")
+    parser.add_argument("--format", choices=sorted(SERIALIZERS), default="binary")
+    args = parser.parse_args(argv)
+
+    if args.encode:
+        report = json.loads(args.encode.read_text())
+        serializer = get_serializer(args.format)
+        payloads = [serializer.encode(result) for result in report.get("detailed_results", [])]
+        size = sum(len(p) for p in payloads)
+        print(f"📦 {args.encode}: {args.encode.stat().st_size:,} bytes as indented JSON, "
+              f"{size:,} bytes as {serializer.name}")
+        return 0
+
+    if not args.benchmark:
+        parser.print_help()
+        return 0
+
+    print(f"⚡ SERIALIZATION BENCHMARK: {args.searches} searches x 3 lists x {args.pois} POIs")
+    rows = run_benchmark(args.pois, args.searches)
+    baseline = rows[0]
+    print(f"{'path':<40} {'encode ms':>10} {'decode ms':>10} {'bytes':>10}")
+    for row in rows:
+        print(f"{row['path']:<40} {row['encode_ms']:>10.2f} {row['decode_ms']:>10.2f} {row['bytes']:>10,}"
+              f"  ({baseline['encode_ms'] / row['encode_ms']:.1f}x encode, "
+              f"{row['bytes'] / baseline['bytes']:.0%} size)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
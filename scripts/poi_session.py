@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+
+"""
+Bounded-Memory Trip Session Store
+
+Keeps what a long road trip needs to remember (POIs already announced,
+POIs already seen and the last few search results) without growing with
+trip length.
+
+- Announced POIs are tracked in a pair of rotating Bloom filters. The
+  "already announced?" check is a few hash probes. When the current filter
+  fills, the older one is dropped, so memory stays fixed and only very old
+  announcements are forgotten.
+- Seen POIs are packed 22 bytes each into a fixed-capacity ring buffer,
+  oldest overwritten first, and can be pruned by age or distance from the car.
+- Recent search results are kept zlib-compressed under a byte budget and are
+  evicted by age, distance and size. A single search too large for the
+  budget is cut to its top-ranked POIs (or not stored at all).
+
+All capacities are derived from `max_bytes` up front, so a 10-hour drive uses
+the same memory as a 10-minute one.
+
+Usage:
+    python3 scripts/poi_session.py --hours 10 --search-interval 30
+"""
+
+import json
+import math
+import time
+import zlib
+import struct
+import hashlib
+import argparse
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from poi_geo import haversine_miles, offset_coordinates
+
+_SEEN_RECORD = struct.Struct("<QiiHI")  # id hash, lat e6, lon e6, rating x10, seen_at (unix s)
+SEEN_INDEX_OVERHEAD = 100  # Estimated bytes per dict entry mapping id hash -> ring slot
+_EMPTY_SLOT = 0
+
+def _id_hash(poi_id: str) -> int:
+    value = int.from_bytes(hashlib.blake2b(poi_id.encode("utf-8"), digest_size=8).digest(), "little")
+    return value or 1  # 0 marks an empty ring slot
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest"""
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.001):
+        self.capacity = capacity
+        self.size_bits = max(64, int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.size_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size_bits
+        return [(h1 + i * h2) % size for i in range(self.hash_count)]
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits)
+
+class TripSessionStore:
+    """Session state for one trip with a hard memory ceiling"""
+
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024, announced_capacity: int = 20_000,
+                 false_positive_rate: float = 0.001, results_fraction: float = 0.4,
+                 max_age_s: float = 6 * 3600.0, max_distance_miles: float = 150.0,
+                 clock: Callable[[], float] = time.time):
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.max_distance_miles = max_distance_miles
+        self.clock = clock
+        self._lock = threading.Lock()
+
+        self.announced_capacity = announced_capacity
+        self.false_positive_rate = false_positive_rate
+        self._announced = BloomFilter(announced_capacity, false_positive_rate)
+        self._announced_previous: Optional[BloomFilter] = None
+        bloom_bytes = 2 * self._announced.nbytes
+
+        remaining = max_bytes - bloom_bytes
+        if remaining <= 0:
+            raise ValueError(f"max_bytes={max_bytes} is too small for the announced-POI filters")
+        self.results_budget = int(remaining * results_fraction)
+        self.seen_capacity = max(1, (remaining - self.results_budget) //
+                                 (_SEEN_RECORD.size + SEEN_INDEX_OVERHEAD))
+        self._seen = bytearray(self.seen_capacity * _SEEN_RECORD.size)
+        self._seen_slots: Dict[int, int] = {}
+        self._seen_next = 0
+
+        # (recorded_at, latitude, longitude, compressed merged results)
+        self._results: Deque[Tuple[float, float, float, bytes]] = deque()
+        self._results_bytes = 0
+
+    # -- announced --------------------------------------------------------
+
+    def mark_announced(self, poi_id: str):
+        with self._lock:
+            if self._announced.full:
+                self._announced_previous = self._announced
+                self._announced = BloomFilter(self.announced_capacity, self.false_positive_rate)
+            self._announced.add(poi_id)
+
+    def was_announced(self, poi_id: str) -> bool:
+        """True if announced this trip (false positives at ~false_positive_rate)"""
+        previous = self._announced_previous
+        return poi_id in self._announced or (previous is not None and poi_id in previous)
+
+    # -- seen -------------------------------------------------------------
+
+    def record_seen(self, poi: Any, seen_at: Optional[float] = None):
+        """Remember a POIData or result dict"""
+        if isinstance(poi, dict):
+            poi_id, lat, lon, rating = poi["id"], poi["latitude"], poi["longitude"], poi.get("rating", 0.0)
+        else:
+            poi_id, lat, lon, rating = poi.id, poi.latitude, poi.longitude, poi.rating
+        key = _id_hash(poi_id)
+        seen_at = self.clock() if seen_at is None else seen_at
+        with self._lock:
+            slot = self._seen_slots.get(key)
+            if slot is None:
+                slot = self._seen_next
+                self._seen_next = (slot + 1) % self.seen_capacity
+                old_key = _SEEN_RECORD.unpack_from(self._seen, slot * _SEEN_RECORD.size)[0]
+                if old_key != _EMPTY_SLOT and self._seen_slots.get(old_key) == slot:
+                    del self._seen_slots[old_key]
+                self._seen_slots[key] = slot
+            _SEEN_RECORD.pack_into(self._seen, slot * _SEEN_RECORD.size, key, round(lat * 1e6),
+                                   round(lon * 1e6), round(rating * 10), int(seen_at))
+
+    def is_seen(self, poi_id: str) -> bool:
+        return _id_hash(poi_id) in self._seen_slots
+
+    @property
+    def seen_count(self) -> int:
+        return len(self._seen_slots)
+
+    # -- recent results ---------------------------------------------------
+
+    def record_search(self, results: Dict[str, Any]) -> bool:
+        """Store an orchestrator result dict: merged POIs become seen, the rest is compacted
+
+        Returns False if the search could not be stored within the results budget.
+        """
+        merged = results.get("merged_results", [])
+        now = self.clock()
+        for poi in merged:
+            self.record_seen(poi, now)
+        coordinates = results.get("coordinates", {})
+        payload = self._compact(results.get("location"), coordinates, merged)
+        # Results are ranked, so an oversized search keeps its best POIs
+        kept = len(merged)
+        while len(payload) > self.results_budget and kept > 1:
+            kept //= 2
+            payload = self._compact(results.get("location"), coordinates, merged[:kept], truncated=True)
+        if len(payload) > self.results_budget:
+            return False
+        with self._lock:
+            self._results.append((now, coordinates.get("latitude", 0.0),
+                                  coordinates.get("longitude", 0.0), payload))
+            self._results_bytes += len(payload)
+            while self._results_bytes > self.results_budget:
+                self._results_bytes -= len(self._results.popleft()[3])
+        return True
+
+    @staticmethod
+    def _compact(location: Any, coordinates: Dict[str, Any], merged: List[Dict[str, Any]],
+                 truncated: bool = False) -> bytes:
+        record = {"location": location, "coordinates": coordinates, "merged_results": merged}
+        if truncated:
+            record["truncated"] = True
+        return zlib.compress(json.dumps(record, separators=(",", ":")).encode("utf-8"), 6)
+
+    def recent_results(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Most recent stored searches, newest first"""
+        with self._lock:
+            entries = list(self._results)[-limit:]
+        return [json.loads(zlib.decompress(payload)) for _, _, _, payload in reversed(entries)]
+
+    # -- eviction ---------------------------------------------------------
+
+    def prune(self, latitude: float, longitude: float, now: Optional[float] = None) -> int:
+        """Drop seen POIs and results that are too old or too far from the car"""
+        now = self.clock() if now is None else now
+        oldest = now - self.max_age_s
+        record_size = _SEEN_RECORD.size
+        removed = 0
+        with self._lock:
+            for key, slot in list(self._seen_slots.items()):
+                _, lat_e6, lon_e6, _, seen_at = _SEEN_RECORD.unpack_from(self._seen, slot * record_size)
+                if seen_at < oldest or \
+                        haversine_miles(latitude, longitude, lat_e6 / 1e6, lon_e6 / 1e6) > self.max_distance_miles:
+                    del self._seen_slots[key]
+                    _SEEN_RECORD.pack_into(self._seen, slot * record_size, _EMPTY_SLOT, 0, 0, 0, 0)
+                    removed += 1
+            kept = deque()
+            for entry in self._results:
+                recorded_at, lat, lon, payload = entry
+                if recorded_at < oldest or haversine_miles(latitude, longitude, lat, lon) > self.max_distance_miles:
+                    self._results_bytes -= len(payload)
+                    removed += 1
+                else:
+                    kept.append(entry)
+            self._results = kept
+        return removed
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held (bounded by max_bytes)"""
+        blooms = self._announced.nbytes + (self._announced_previous.nbytes if self._announced_previous else 0)
+        return (blooms + len(self._seen) + len(self._seen_slots) * SEEN_INDEX_OVERHEAD +
+                self._results_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"memory_bytes": self.memory_bytes(), "max_bytes": self.max_bytes,
+                "seen": self.seen_count, "seen_capacity": self.seen_capacity,
+                "stored_searches": len(self._results), "results_bytes": self._results_bytes}
+
+def simulate_trip(hours: float, search_interval_s: float, pois_per_search: int = 8,
+                  speed_mph: float = 65.0, **store_options) -> Tuple[TripSessionStore, List[Dict[str, Any]]]:
+    """Drive east across the country, storing every search; returns the store and hourly stats"""
+    clock = [0.0]
+    store = TripSessionStore(clock=lambda: clock[0], **store_options)
+    lat, lon = 45.5152, -122.6784
+    hourly = []
+    searches = int(hours * 3600 / search_interval_s)
+    for i in range(searches):
+        clock[0] = i * search_interval_s
+        lat, lon = offset_coordinates(lat, lon, 0.0, speed_mph * search_interval_s / 3600)
+        merged = [{"id": f"poi_{i}_{j}", "name": f"Stop {i}-{j}", "latitude": lat + j * 0.001,
+                   "longitude": lon, "rating": 4.2, "description": "A roadside point of interest"}
+                  for j in range(pois_per_search)]
+        store.record_search({"location": f"Mile {i}", "coordinates": {"latitude": lat, "longitude": lon},
+                             "merged_results": merged})
+        store.mark_announced(merged[0]["id"])
+        if i % max(1, int(600 / search_interval_s)) == 0:
+            store.prune(lat, lon)
+        if i % max(1, int(3600 / search_interval_s)) == 0:
+            hourly.append({"hour": round(clock[0] / 3600), **store.stats()})
+    return store, hourly
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a long trip against the bounded session store")
+    parser.add_argument("--hours", type=float, default=10.0)
+    parser.add_argument("--search-interval", type=float, default=30.0, help="Seconds between searches")
+    parser.add_argument("--max-bytes", type=int, default=4 * 1024 * 1024)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store, hourly = simulate_trip(args.hours, args.search_interval, max_bytes=args.max_bytes)
+    elapsed = time.perf_counter() - start
+    print(f"🧳 {args.hours:g}h trip, one search every {args.search_interval:g}s (ceiling {args.max_bytes:,} bytes)")
+    for row in hourly:
+        print(f"   hour {row['hour']:>3}: {row['memory_bytes']:>10,} bytes, {row['seen']:>6,} seen, "
+              f"{row['stored_searches']:>5} searches kept")
+
+    lookups = 100_000
+    start_lookup = time.perf_counter()
+    for i in range(lookups):
+        store.was_announced(f"poi_{i}_0")
+    per_lookup_us = (time.perf_counter() - start_lookup) / lookups * 1e6
+    print(f"   ✅ simulated in {elapsed:.1f}s; was_announced() {per_lookup_us:.1f}µs per check")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+"""
+Batched Review-Summary Generation
+
+Generates POIData.review_summary with an LLM without making one call per POI
+per search:
+
+- Summaries are cached by stable POI id together with a hash of the source
+  content (name, description, reviews). A cached summary is reused until that
+  content changes, so the summarization cost is O(new or changed POIs)
+  rather than O(searches x POIs).
+- Cache misses from one search are grouped into a single numbered batch
+  prompt (up to `batch_size` POIs per call), so the fixed per-call overhead
+  is paid once per batch.
+
+Backends implement summarize_batch(prompt, count) -> List[str]. The mock
+backend goes through the same prompt/parse path with simulated latency.
+
+Usage:
+    python3 scripts/poi_summaries.py --searches 50
+"""
+
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+SUMMARY_MAX_WORDS = 30
+
+def content_hash(poi: Any) -> str:
+    """Hash of the source text a summary is generated from"""
+    reviews = getattr(poi, "reviews", None) or []
+    source = "\x1f".join([poi.name, poi.description or "", *reviews])
+    return hashlib.blake2b(source.encode("utf-8"), digest_size=12).hexdigest()
+
+def build_batch_prompt(items: Sequence[Tuple[str, str]]) -> str:
+    """One prompt asking for a numbered summary per (name, source text) item"""
+    lines = [f"Summarize what visitors say about each place in one sentence of at most "
+             f"{SUMMARY_MAX_WORDS} words. Answer with one numbered line per place, in order.", ""]
+    for number, (name, text) in enumerate(items, 1):
+        lines.append(f"{number}. {name}: {text}")
+    return "\n".join(lines)
+
+_NUMBERED_LINE = re.compile(r"^\s*(\d+)[.)]\s*(.+?)\s*$")
+
+def parse_batch_response(response: str, count: int) -> List[Optional[str]]:
+    """Numbered answer lines back to a list (None where a line is missing)"""
+    summaries: List[Optional[str]] = [None] * count
+    for line in response.splitlines():
+        match = _NUMBERED_LINE.match(line)
+        if match:
+            index = int(match.group(1)) - 1
+            if 0 <= index < count and summaries[index] is None:
+                summaries[index] = match.group(2)
+    return summaries
+
+class MockSummaryBackend:
+    """Simulated local LLM: fixed per-call cost plus a small per-item cost"""
+
+    def __init__(self, latency_scale: float = 1.0, call_overhead_s: float = 0.25, per_item_s: float = 0.04):
+        self.latency_scale = latency_scale
+        self.call_overhead_s = call_overhead_s
+        self.per_item_s = per_item_s
+        self.calls = 0
+
+    def summarize_batch(self, prompt: str, count: int) -> List[Optional[str]]:
+        self.calls += 1
+        time.sleep((self.call_overhead_s + self.per_item_s * count) * self.latency_scale)
+        answers = []
+        for line in prompt.splitlines():
+            match = _NUMBERED_LINE.match(line)
+            if match:
+                name, _, text = match.group(2).partition(": ")
+                first = text.split(". ")[0].rstrip(".") or name
+                words = first.split()[:SUMMARY_MAX_WORDS]
+                answers.append(f"{match.group(1)}. Visitors recommend it: {' '.join(words).lower()}.")
+        return parse_batch_response("\n".join(answers), count)
+
+class ReviewSummarizer:
+    """Fills review_summary for POIs, batching misses and caching by id + content hash"""
+
+    def __init__(self, backend: Any, cache_path: Optional[Path] = None,
+                 batch_size: int = 16, max_entries: int = 50_000):
+        self.backend = backend
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.batch_size = batch_size
+        self.max_entries = max_entries
+        # poi id -> (content hash, summary), least recently used first
+        self._cache: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.batches = 0
+        if self.cache_path and self.cache_path.exists():
+            with open(self.cache_path) as f:
+                for poi_id, (digest, summary) in json.load(f).items():
+                    self._cache[poi_id] = (digest, summary)
+
+    def cached(self, poi_id: str, digest: str) -> Optional[str]:
+        with self._lock:
+            entry = self._cache.get(poi_id)
+            if entry is None or entry[0] != digest:
+                return None
+            self._cache.move_to_end(poi_id)
+            return entry[1]
+
+    def _store(self, poi_id: str, digest: str, summary: str):
+        with self._lock:
+            self._cache[poi_id] = (digest, summary)
+            self._cache.move_to_end(poi_id)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def summarize(self, pois: Sequence[Any], ids: Optional[Sequence[str]] = None) -> int:
+        """Set review_summary on every POI; returns how many were newly generated
+
+        `ids` gives the stable id for each POI (defaults to poi.id); merged
+        results pass canonical ids so LLM and API copies share a summary.
+        """
+        ids = ids or [poi.id for poi in pois]
+        pending: Dict[Tuple[str, str], List[Any]] = {}
+        for poi, poi_id in zip(pois, ids):
+            digest = content_hash(poi)
+            summary = self.cached(poi_id, digest)
+            if summary is not None:
+                poi.review_summary = summary
+                self.hits += 1
+            else:
+                # Duplicates of one POI within a search share one batch slot
+                pending.setdefault((poi_id, digest), []).append(poi)
+        self.misses += len(pending)
+
+        keys = list(pending)
+        generated = 0
+        for start in range(0, len(keys), self.batch_size):
+            batch = keys[start:start + self.batch_size]
+            items = [(pending[key][0].name, self._source_text(pending[key][0])) for key in batch]
+            summaries = self.backend.summarize_batch(build_batch_prompt(items), len(items))
+            self.batches += 1
+            for key, summary in zip(batch, summaries):
+                if not summary:
+                    continue  # Leave the POI unsummarized; it is retried next search
+                self._store(key[0], key[1], summary)
+                for poi in pending[key]:
+                    poi.review_summary = summary
+                generated += 1
+        self.generated += generated
+        return generated
+
+    @staticmethod
+    def _source_text(poi: Any) -> str:
+        reviews = getattr(poi, "reviews", None) or []
+        return " ".join([poi.description or "", *reviews]).strip()
+
+    def save(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            data = {poi_id: list(entry) for poi_id, entry in self._cache.items()}
+        tmp_path = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, self.cache_path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "generated": self.generated,
+                "batches": self.batches, "cached": len(self._cache)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-POI and batched+cached review summarization")
+    parser.add_argument("--searches", type=int, default=50)
+    parser.add_argument("--latency-scale", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    import io
+    import contextlib
+    from demo_dual_poi_search import DualPOISearchOrchestrator
+
+    rng = random.Random(args.seed)
+    locations = [("Lost Lake, Oregon", 45.4979, -121.8209), ("Seattle, Washington", 47.6062, -122.3321)]
+    orchestrator = DualPOISearchOrchestrator(latency_scale=0.0)
+    searches = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.searches):
+            name, lat, lon = rng.choice(locations)
+            llm_pois, api_pois = orchestrator._query_sources(name, lat, lon, "attraction", 4)
+            searches.append(orchestrator._merge_pois(llm_pois, api_pois, 8))
+
+    naive_backend = MockSummaryBackend(args.latency_scale)
+    start = time.perf_counter()
+    for pois in searches:
+        for poi in pois:
+            naive_backend.summarize_batch(build_batch_prompt([(poi.name, poi.description)]), 1)
+    naive_s = time.perf_counter() - start
+
+    summarizer = ReviewSummarizer(MockSummaryBackend(args.latency_scale))
+    start = time.perf_counter()
+    for pois in searches:
+        summarizer.summarize(pois, [orchestrator.identity_map.lookup(poi.id) or poi.id for poi in pois])
+    batched_s = time.perf_counter() - start
+
+    total = sum(len(pois) for pois in searches)
+    print(f"📝 REVIEW SUMMARIES: {args.searches} searches, {total} POI results")
+    print(f"   per-POI calls:    {naive_backend.calls:>5} LLM calls, {naive_s * 1000:8.1f}ms")
+    print(f"   batched + cached: {summarizer.backend.calls:>5} LLM calls, {batched_s * 1000:8.1f}ms "
+          f"({summarizer.generated} summaries generated, {summarizer.hits} cache hits)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+Tile-keyed caches for the POI search orchestrator
+
+The map is split into fixed lat/lon tiles so that what one search learns
+about an area (how dense it is, or that it is empty) can be reused by the
+next search nearby.
+"""
+
+import math
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+TILE_DEGREES = 0.1  # ~7 x 5 miles at US latitudes
+
+TileKey = Tuple[int, int]
+
+def tile_key(latitude: float, longitude: float, tile_degrees: float = TILE_DEGREES) -> TileKey:
+    return int(math.floor(latitude / tile_degrees)), int(math.floor(longitude / tile_degrees))
+
+class TileDensityCache:
+    """Per-tile, per-category estimate of good POIs per square mile
+
+    Used by the expanding-ring search to pick a starting radius that should
+    yield `max_results` candidates on the first ring.
+    """
+
+    def __init__(self, min_radius_miles: float = 0.5, max_radius_miles: float = 50.0,
+                 smoothing: float = 0.5, tile_degrees: float = TILE_DEGREES):
+        self.min_radius_miles = min_radius_miles
+        self.max_radius_miles = max_radius_miles
+        self.smoothing = smoothing
+        self.tile_degrees = tile_degrees
+        self._density: Dict[Tuple[TileKey, str], float] = {}
+        self._lock = threading.Lock()
+
+    def density(self, latitude: float, longitude: float, category: str) -> Optional[float]:
+        return self._density.get((tile_key(latitude, longitude, self.tile_degrees), category))
+
+    def starting_radius(self, latitude: float, longitude: float, category: str,
+                        wanted: int, default_radius_miles: float) -> float:
+        """Radius expected to contain `wanted` candidates, or the default if the tile is unknown"""
+        density = self.density(latitude, longitude, category)
+        if density is None:
+            return default_radius_miles
+        if density <= 0:
+            return self.max_radius_miles
+        radius = math.sqrt(wanted / (math.pi * density))
+        return min(self.max_radius_miles, max(self.min_radius_miles, radius))
+
+    def record(self, latitude: float, longitude: float, category: str,
+               found: int, radius_miles: float):
+        """Fold an observation (`found` good POIs within `radius_miles`) into the estimate"""
+        observed = found / (math.pi * radius_miles ** 2)
+        key = (tile_key(latitude, longitude, self.tile_degrees), category)
+        with self._lock:
+            previous = self._density.get(key)
+            self._density[key] = observed if previous is None else \
+                self.smoothing * observed + (1 - self.smoothing) * previous
+
+class NegativeResultCache:
+    """Remembers tiles where a source returned nothing
+
+    Keys are (tile, category, query variant). An empty answer is trusted for
+    `ttl_seconds`; if the tile is still empty when re-checked after expiry the
+    TTL doubles (up to `max_ttl_seconds`), so long empty stretches of highway
+    are re-probed less and less often. Any non-empty answer clears the entry.
+
+    An expired entry is kept for one more TTL so a re-check can still back
+    off, then pruned on the next insert. At most `max_entries` are held (the
+    least recently recorded go first), so a long drive past empty tiles
+    can't grow the cache without bound.
+    """
+
+    def __init__(self, ttl_seconds: float = 600.0, max_ttl_seconds: float = 6 * 3600.0,
+                 backoff: float = 2.0, tile_degrees: float = TILE_DEGREES,
+                 max_entries: int = 4096, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_ttl_seconds = max_ttl_seconds
+        self.backoff = backoff
+        self.tile_degrees = tile_degrees
+        self.max_entries = max_entries
+        self.clock = clock
+        # key -> (expires_at, current ttl), oldest record first
+        self._entries: "OrderedDict[Tuple, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, latitude: float, longitude: float, category: str, variant: Hashable) -> Tuple:
+        return (tile_key(latitude, longitude, self.tile_degrees), category, variant)
+
+    def is_known_empty(self, latitude: float, longitude: float, category: str,
+                       variant: Hashable = None) -> bool:
+        key = self._key(latitude, longitude, category, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() < entry[0]:
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def record(self, latitude: float, longitude: float, category: str, found: int,
+               variant: Hashable = None):
+        """Store the outcome of an upstream lookup"""
+        key = self._key(latitude, longitude, category, variant)
+        with self._lock:
+            if found:
+                self._entries.pop(key, None)
+                return
+            now = self.clock()
+            previous = self._entries.pop(key, None)
+            ttl = self.ttl_seconds if previous is None else min(self.max_ttl_seconds, previous[1] * self.backoff)
+            self._entries[key] = (now + ttl, ttl)
+            self._prune(now)
+
+    def _prune(self, now: float):
+        # Oldest records first; stop at the first one still worth keeping
+        entries = self._entries
+        while entries:
+            expires_at, ttl = next(iter(entries.values()))
+            if len(entries) <= self.max_entries and now < expires_at + ttl:
+                break
+            entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
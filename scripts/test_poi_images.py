@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for poi_images against the local stand-in image server
+
+Run with:
+    python3 -m pytest scripts/test_poi_images.py -q
+"""
+
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("PIL", reason="Pillow is required for photo thumbnails")
+from PIL import Image
+
+from poi_images import ImagePrefetcher, ThumbnailCache, start_image_server
+
+PHOTOS = 24
+MAX_CONNECTIONS = 4
+
+@pytest.fixture
+def server():
+    """(base URL, request counters) of the stand-in image server"""
+    httpd, state = start_image_server()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", state
+    httpd.shutdown()
+
+@pytest.fixture
+def prefetcher(tmp_path: Path):
+    prefetcher = ImagePrefetcher(ThumbnailCache(tmp_path / "thumbs"), max_connections=MAX_CONNECTIONS)
+    yield prefetcher
+    prefetcher.close()
+
+def photo_urls(base_url: str):
+    # Every third photo goes through a redirect, like the Places photo API
+    return [f"{base_url}/redirect/{n}" if n % 3 == 0 else f"{base_url}/photo/{n}" for n in range(PHOTOS)]
+
+def test_cold_prefetch_caches_downsized_thumbnails(server, prefetcher):
+    base_url, _ = server
+    urls = photo_urls(base_url)
+    paths = prefetcher.submit(urls + urls[:4]).result()
+    assert len(paths) == PHOTOS and all(paths.values())
+    with Image.open(paths[urls[1]]) as thumbnail:
+        assert max(thumbnail.size) <= prefetcher.thumbnail_px  # 640x480 source
+    assert prefetcher.failures == 0
+
+def test_connections_are_bounded_and_reused(server, prefetcher):
+    base_url, state = server
+    prefetcher.submit(photo_urls(base_url)).result()
+    assert state["peak"] <= MAX_CONNECTIONS
+    assert prefetcher.pool.connections_opened <= MAX_CONNECTIONS
+
+def test_identical_photos_share_one_blob(server, prefetcher):
+    base_url, _ = server
+    prefetcher.submit(photo_urls(base_url)).result()
+    assert len(prefetcher.cache) == (PHOTOS + 1) // 2  # Photos 0/1, 2/3, ... are identical
+
+def test_warm_pass_is_served_from_cache(server, prefetcher):
+    base_url, state = server
+    urls = photo_urls(base_url)
+    prefetcher.submit(urls).result()
+    requests_before = state["requests"]
+    assert all(prefetcher.submit(urls).result().values())
+    assert state["requests"] == requests_before
+
+def test_index_survives_restart_and_evicts_least_recently_used(server, prefetcher, tmp_path: Path):
+    base_url, _ = server
+    urls = photo_urls(base_url)
+    prefetcher.submit(urls).result()
+    prefetcher.close()
+
+    reopened = ThumbnailCache(tmp_path / "thumbs", max_bytes=prefetcher.cache.total_bytes // 2)
+    assert reopened.get(urls[-1]) is not None
+    reopened.put(f"{base_url}/extra", b"x" * 10)
+    assert reopened.total_bytes <= reopened.max_bytes
+    assert reopened.get(urls[0]) is None
+
+def test_failed_fetches_do_not_abort_the_batch(server, prefetcher):
+    base_url, _ = server
+    good = [f"{base_url}/photo/{n}" for n in range(4)]
+    bad = [f"{base_url}/missing/1", f"{base_url}/garbage/1", f"{base_url}/truncated/1"]
+    paths = prefetcher.submit(good + bad).result()
+    assert all(paths[url] is not None for url in good)
+    assert all(paths[url] is None for url in bad)
+    assert prefetcher.failures == len(bad)
@@ -226,21 +226,23 @@ def main():
     lost_lake_results = [r for r in results if "Lost Lake" in r['location']]
     
     if lost_lake_results:
-        avg_time = sum(r['execution_time_ms'] for r in lost_lake_results) / len(lost_lake_results)
-        max_time = max(r['execution_time_ms'] for r in lost_lake_results)
-        min_time = min(r['execution_time_ms'] for r in lost_lake_results)
+        # Three single runs are too few for an average or percentiles to mean
+        # much; list them and judge the slowest (scripts/poi_benchmark.py does
+        # many-iteration p50/p95/p99 runs)
+        llm_times = [r['llm_analysis']['response_time_ms'] for r in lost_lake_results if r.get('llm_analysis')]
+        api_times = [r['api_results']['response_time_ms'] for r in lost_lake_results if r.get('api_results')]
         
         print(f"Lost Lake, Oregon Results:")
-        print(f"  Average Response Time: {avg_time:.0f}ms")
-        print(f"  Fastest Response: {min_time}ms")
-        print(f"  Slowest Response: {max_time}ms")
+        for r in lost_lake_results:
+            print(f"  {r['strategy']:<10} {r['execution_time_ms']}ms")
+        print("  (Single runs - use scripts/poi_benchmark.py for percentiles)")
         
         performance_target = 350  # <350ms LLM target
         api_target = 1000  # <1000ms API target
         
         print(f"\n🎯 Performance Targets:")
-        print(f"  LLM Target (<350ms): {'✅ PASS' if avg_time < performance_target else '❌ FAIL'}")
-        print(f"  API Target (<1000ms): {'✅ PASS' if avg_time < api_target else '❌ FAIL'}")
+        print(f"  LLM Target (<350ms): {'✅ PASS' if max(llm_times, default=0) < performance_target else '❌ FAIL'}")
+        print(f"  API Target (<1000ms): {'✅ PASS' if max(api_times, default=0) < api_target else '❌ FAIL'}")
     
     print("\n🔍 Lost Lake, Oregon Validation:")
     lost_lake_hybrid = next((r for r in results if "Lost Lake" in r['location'] and r['strategy'] == 'hybrid'), None)